@@ -0,0 +1,121 @@
+"""Ritmo da inferência e da tela, medido em vez de fixo.
+
+A thread de inferência não pega frames mais rápido do que o limite de CPU
+permite (LIBRAS_CPU_MAX, fração do tempo que ela pode passar processando; 1.0
+desliga o limite) e, sem mão nenhuma por ESPERA_OCIOSO segundos, cai para
+FPS_OCIOSO frames por segundo até uma mão aparecer. O Tk agenda o próximo
+tick para quando houver frame novo e a tela puder desenhar, em vez de
+consultar a fila a cada 10 ms.
+"""
+import os
+import time
+
+# ===============================
+# Configuração
+# ===============================
+CPU_MAXIMA = float(os.environ.get("LIBRAS_CPU_MAX", "1.0"))
+FPS_OCIOSO = 5.0            # frames por segundo processados sem mão na imagem
+ESPERA_OCIOSO = 2.0         # segundos sem mão até entrar no modo ocioso
+PESO_MEDIA = 0.1            # peso de cada amostra nas médias móveis
+ESPERA_MINIMA_MS = 4        # ticks do Tk nunca mais próximos que isso
+ESPERA_MAXIMA_MS = 250      # nem mais distantes (a janela continua respondendo)
+
+def _media(anterior, valor, peso=PESO_MEDIA):
+    return valor if anterior is None else anterior + peso * (valor - anterior)
+
+# ===============================
+# Inferência
+# ===============================
+class AgendadorInferencia:
+    """Decide quando a thread de inferência pega o próximo frame.
+
+    Um frame que custou c segundos só deixa o próximo começar c / cpu_max
+    segundos depois do início dele; no modo ocioso, no mínimo 1 / fps_ocioso.
+    Frames que a câmera entrega nesse meio tempo são descartados pela captura
+    (ela guarda só o mais novo), então a espera não acumula atraso.
+    """
+
+    def __init__(self, cpu_max=CPU_MAXIMA, fps_ocioso=FPS_OCIOSO, espera_ocioso=ESPERA_OCIOSO):
+        self.cpu_max = min(max(cpu_max, 0.05), 1.0)
+        self.fps_ocioso = fps_ocioso
+        self.espera_ocioso = espera_ocioso
+        self._inicio = None
+        self.ultimo_custo = 0.0
+        self.custo_medio = None
+        self.intervalo_camera = None
+        self._ultima_captura = None     # (seq, t_captura)
+        self._ultima_mao = time.perf_counter()
+
+    def registrar_captura(self, seq, t_captura):
+        """Mede o intervalo entre frames da câmera, inclusive os que foram pulados."""
+        if self._ultima_captura is not None and seq > self._ultima_captura[0]:
+            intervalo = (t_captura - self._ultima_captura[1]) / (seq - self._ultima_captura[0])
+            self.intervalo_camera = _media(self.intervalo_camera, intervalo)
+        self._ultima_captura = (seq, t_captura)
+
+    def inicio_quadro(self, agora=None):
+        self._inicio = time.perf_counter() if agora is None else agora
+
+    def fim_quadro(self, tem_mao, agora=None):
+        agora = time.perf_counter() if agora is None else agora
+        self.ultimo_custo = agora - self._inicio
+        self.custo_medio = _media(self.custo_medio, self.ultimo_custo)
+        if tem_mao:
+            self._ultima_mao = agora
+
+    def ocioso(self, agora=None):
+        agora = time.perf_counter() if agora is None else agora
+        return agora - self._ultima_mao > self.espera_ocioso
+
+    def proximo_inicio(self, agora=None):
+        """Instante (perf_counter) a partir do qual o próximo frame pode ser processado."""
+        if self._inicio is None:
+            return 0.0
+        intervalo = self.ultimo_custo / self.cpu_max
+        if self.ocioso(agora):
+            intervalo = max(intervalo, 1.0 / self.fps_ocioso)
+        return self._inicio + intervalo
+
+    def estatisticas(self):
+        return {
+            "fps_camera": 1.0 / self.intervalo_camera if self.intervalo_camera else 0.0,
+            "custo_ms": 1000 * (self.custo_medio or 0.0),
+            "cpu_max": self.cpu_max,
+            "ocioso": self.ocioso(),
+        }
+
+# ===============================
+# Tela (Tk)
+# ===============================
+class AgendadorTela:
+    """Calcula a espera até o próximo tick da janela.
+
+    O tick é marcado para o mais tarde entre a próxima vez que a tela pode
+    desenhar (no máximo fps por segundo, e menos se desenhar custar mais que
+    cpu_max do intervalo) e a chegada prevista do próximo frame.
+    """
+
+    def __init__(self, fps, cpu_max=CPU_MAXIMA):
+        self.intervalo_minimo = 1.0 / fps
+        self.cpu_max = min(max(cpu_max, 0.05), 1.0)
+        self.custo_medio = None
+        self._proxima = 0.0
+
+    def pode_mostrar(self, agora=None):
+        return (time.perf_counter() if agora is None else agora) >= self._proxima
+
+    def mostrou(self, inicio, fim=None):
+        """Registra um frame desenhado entre inicio e fim (perf_counter)."""
+        fim = time.perf_counter() if fim is None else fim
+        self.custo_medio = _media(self.custo_medio, fim - inicio)
+        intervalo = max(self.intervalo_minimo, self.custo_medio / self.cpu_max)
+        # sem acumular atraso: se o tick veio tarde, o próximo conta a partir de agora
+        self._proxima = max(self._proxima + intervalo, fim + intervalo / 2)
+
+    def espera_ms(self, chegada_prevista, agora=None):
+        """Milissegundos para o after() do Tk; chegada_prevista em perf_counter (0 = já chegou, None = sem ideia)."""
+        agora = time.perf_counter() if agora is None else agora
+        if chegada_prevista is None:
+            chegada_prevista = agora + self.intervalo_minimo
+        espera = max(self._proxima, chegada_prevista) - agora
+        return int(min(max(1000 * espera, ESPERA_MINIMA_MS), ESPERA_MAXIMA_MS))
@@ -0,0 +1,184 @@
+import json
+import os
+
+import numpy as np
+
+from reconhecedor import NUM_PONTOS
+
+# ===============================
+# Formato
+# ===============================
+# <base>.f64  linhas float64 (little-endian) de 21x3 (ou da forma dada), só acrescentadas no fim
+# <base>.idx  uma linha por registro com o nome em JSON, na mesma ordem
+# Um nome salvo de novo ganha um registro novo; o registro antigo vira "morto"
+# e some na próxima compactação.
+DTYPE = np.dtype("<f8")
+MIN_MORTOS_COMPACTAR = 64
+
+FORMA = (NUM_PONTOS, 3)
+
+class ArmazemGestos:
+    """Banco de gestos binário: append a cada gesto salvo e leitura por memmap.
+
+    forma é a forma de cada registro; outra forma (ex.: trajetórias) usa outra base.
+    """
+
+    def __init__(self, base="gestos_salvos", forma=FORMA):
+        self.arquivo_dados = base + ".f64"
+        self.arquivo_nomes = base + ".idx"
+        self.forma = tuple(forma)
+        self.dim = int(np.prod(self.forma))
+        self._reparado = False
+
+    def existe(self):
+        return os.path.exists(self.arquivo_dados) and os.path.exists(self.arquivo_nomes)
+
+    # -------------------------------
+    # Leitura
+    # -------------------------------
+    def carregar(self):
+        """Retorna (nomes, templates) com templates (N, *forma) sem cópia quando não há mortos."""
+        self._reparar()
+        nomes = self._ler_nomes()
+        if self._mortos(nomes) >= max(MIN_MORTOS_COMPACTAR, len(nomes) // 2):
+            try:
+                self.compactar()
+                nomes = self._ler_nomes()
+            except OSError:
+                # no Windows o arquivo pode estar mapeado por outra janela; tenta depois
+                pass
+
+        if not nomes:
+            return [], np.empty((0,) + self.forma, dtype=np.float64)
+        dados = np.memmap(self.arquivo_dados, dtype=DTYPE, mode="r", shape=(len(nomes),) + self.forma)
+
+        ultima = {nome: i for i, nome in enumerate(nomes)}
+        if len(ultima) == len(nomes):
+            return nomes, dados
+        vivos = sorted(ultima.values())
+        return [nomes[i] for i in vivos], np.ascontiguousarray(dados[vivos])
+
+    def carregar_dict(self):
+        nomes, templates = self.carregar()
+        return {nome: templates[i] for i, nome in enumerate(nomes)}
+
+    def _ler_nomes(self):
+        if not os.path.exists(self.arquivo_nomes):
+            return []
+        with open(self.arquivo_nomes, "r", encoding="utf-8") as f:
+            return [json.loads(linha) for linha in f.read().splitlines()]
+
+    def _mortos(self, nomes):
+        return len(nomes) - len(set(nomes))
+
+    # -------------------------------
+    # Escrita
+    # -------------------------------
+    def salvar(self, nome, coords_normalizadas):
+        self.salvar_varios([(nome, coords_normalizadas)])
+
+    def salvar_varios(self, itens):
+        """Acrescenta vários gestos de uma vez (uma escrita em cada arquivo)."""
+        if not itens:
+            return
+        self._reparar()
+        dados = np.stack([np.asarray(c, dtype=DTYPE).reshape(self.forma) for _, c in itens])
+        linhas = "".join(json.dumps(nome, ensure_ascii=False) + "\n" for nome, _ in itens)
+        # dados antes dos nomes: um registro só existe depois que o nome foi escrito
+        with open(self.arquivo_dados, "ab") as f:
+            f.write(dados.tobytes())
+        with open(self.arquivo_nomes, "a", encoding="utf-8") as f:
+            f.write(linhas)
+
+    def compactar(self):
+        """Reescreve os arquivos só com o último registro de cada nome."""
+        self._reparar()
+        nomes = self._ler_nomes()
+        ultima = {nome: i for i, nome in enumerate(nomes)}
+        vivos = sorted(ultima.values())
+        if nomes:
+            dados = np.fromfile(self.arquivo_dados, dtype=DTYPE, count=len(nomes) * self.dim)
+            dados = dados.reshape(len(nomes), self.dim)[vivos]
+        else:
+            dados = np.empty((0, self.dim), dtype=DTYPE)
+        self._gravar([nomes[i] for i in vivos], dados)
+
+    def reescrever(self, itens):
+        """Substitui o banco inteiro pelos itens (nome, coords) dados."""
+        dados = np.array([np.asarray(c, dtype=DTYPE).reshape(self.dim) for _, c in itens], dtype=DTYPE)
+        self._gravar([nome for nome, _ in itens], dados.reshape(-1, self.dim))
+
+    def _gravar(self, nomes, dados):
+        with open(self.arquivo_dados + ".tmp", "wb") as f:
+            f.write(np.ascontiguousarray(dados, dtype=DTYPE).tobytes())
+        with open(self.arquivo_nomes + ".tmp", "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(nome, ensure_ascii=False) + "\n" for nome in nomes))
+        os.replace(self.arquivo_dados + ".tmp", self.arquivo_dados)
+        os.replace(self.arquivo_nomes + ".tmp", self.arquivo_nomes)
+
+    def _reparar(self):
+        """Conclui uma compactação interrompida e descarta restos de um save interrompido."""
+        if self._reparado:
+            return
+        dados_tmp, nomes_tmp = self.arquivo_dados + ".tmp", self.arquivo_nomes + ".tmp"
+        if os.path.exists(nomes_tmp):
+            if os.path.exists(dados_tmp):
+                # nenhum dos dois foi trocado: a compactação não chegou a valer
+                os.remove(dados_tmp)
+                os.remove(nomes_tmp)
+            else:
+                os.replace(nomes_tmp, self.arquivo_nomes)
+
+        if not self.existe():
+            open(self.arquivo_dados, "ab").close()
+            open(self.arquivo_nomes, "ab").close()
+
+        with open(self.arquivo_nomes, "rb") as f:
+            linhas = f.read().split(b"\n")[:-1]
+        tamanho_linha = self.dim * DTYPE.itemsize
+        n = min(len(linhas), os.path.getsize(self.arquivo_dados) // tamanho_linha)
+        if os.path.getsize(self.arquivo_nomes) != sum(len(l) + 1 for l in linhas[:n]):
+            with open(self.arquivo_nomes, "wb") as f:
+                f.write(b"".join(l + b"\n" for l in linhas[:n]))
+        if os.path.getsize(self.arquivo_dados) != n * tamanho_linha:
+            with open(self.arquivo_dados, "r+b") as f:
+                f.truncate(n * tamanho_linha)
+        self._reparado = True
+
+# ===============================
+# Migração do JSON
+# ===============================
+def migrar_json(arquivo_json="gestos_salvos.json", base="gestos_salvos"):
+    """Converte o gestos_salvos.json antigo para o formato binário, sem perda (float64).
+
+    Retorna a lista de nomes ignorados por não terem 21 pontos (x, y, z).
+    """
+    with open(arquivo_json, "r", encoding="utf-8") as f:
+        gestos = json.load(f)
+    itens, ignorados = [], []
+    for nome, coords in gestos.items():
+        if np.shape(coords) == (NUM_PONTOS, 3):
+            itens.append((nome, coords))
+        else:
+            ignorados.append(nome)
+
+    ArmazemGestos(base).reescrever(itens)
+    return ignorados
+
+def migrar_se_preciso(arquivo_json="gestos_salvos.json", base="gestos_salvos"):
+    """Migra o JSON só se o banco binário ainda não existir."""
+    if not ArmazemGestos(base).existe() and os.path.exists(arquivo_json):
+        try:
+            migrar_json(arquivo_json, base)
+        except (ValueError, OSError):
+            pass
+
+if __name__ == "__main__":
+    import sys
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "gestos_salvos.json"
+    destino = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(origem)[0]
+    ignorados = migrar_json(origem, destino)
+    print(f"Migrado para {destino}.f64 / {destino}.idx")
+    if ignorados:
+        print("Ignorados (formato inválido):", ", ".join(ignorados))
@@ -0,0 +1,273 @@
+"""Benchmark do reconhecimento sem câmera, com mãos e sequências sintéticas.
+
+Uso:
+    python benchmark.py -o bench.json
+    python benchmark.py --rapido -o bench.json --comparar bench_anterior.json
+
+As mãos sintéticas são templates de gestos_salvos.json com ruído, escala e
+translação aleatórias (para a normalização ter trabalho de verdade); as
+sequências de gestos misturam frases de frases_salvas.json com gestos soltos.
+"""
+import argparse
+import math
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from reconhecedor import (ReconhecedorGestos, PortaoMovimento, normalizar_landmarks,
+                          media_distancia, NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO)
+from indice_gestos import IndiceGestos
+from quantizacao import ReconhecedorQuantizado
+from frases import HistoricoFrases
+
+TAMANHOS_BANCO = [26, 100, 1000, 10000]
+QTDS_FRASES = [3, 30, 300]
+TAMANHOS_SEQUENCIA = [2, 4, 8]
+TEMPO_POR_CASO = 0.5        # segundos medidos por caso (no máximo)
+MAX_CHAMADAS = 2000
+MIN_CHAMADAS = 5
+
+# ===============================
+# Dados sintéticos
+# ===============================
+def carregar_templates(arquivo):
+    with open(arquivo, "r", encoding="utf-8") as f:
+        gestos = json.load(f)
+    return {nome: np.asarray(c, dtype=np.float64) for nome, c in gestos.items()
+            if np.shape(c) == (NUM_PONTOS, 3)}
+
+def mao_sintetica(template, rng, ruido=0.05):
+    """Landmarks "crus" (coordenadas de imagem) a partir de um template normalizado."""
+    escala = rng.uniform(0.08, 0.25)
+    centro = rng.uniform(0.3, 0.7, size=3) * [1, 1, 0]
+    return (template + rng.normal(0, ruido, template.shape)) * escala + centro
+
+def banco_sintetico(templates, n, rng):
+    """n templates normalizados (variações dos reais) com nomes únicos."""
+    base = list(templates.items())
+    gestos = {}
+    for i in range(n):
+        nome, t = base[i % len(base)]
+        if i < len(base):
+            gestos[nome] = t
+        else:
+            gestos[f"{nome}_{i}"] = np.asarray(normalizar_landmarks(mao_sintetica(t, rng, 0.08)))
+    return gestos
+
+def frases_sinteticas(nomes, qtd, tamanho, rng):
+    return {"frases": [{"nome": f"frase_{i}", "sequencia": list(rng.choice(nomes, size=tamanho))}
+                       for i in range(qtd)]}
+
+def fluxo_gestos(frases_salvas, nomes, n, rng):
+    """Sequência de gestos por frame: frases inteiras intercaladas com gestos soltos e repetições."""
+    fluxo = []
+    frases = frases_salvas["frases"]
+    while len(fluxo) < n:
+        if frases and rng.random() < 0.5:
+            seq = frases[rng.integers(len(frases))]["sequencia"]
+        else:
+            seq = list(rng.choice(nomes, size=rng.integers(1, 4)))
+        for gesto in seq:
+            # o mesmo gesto aparece em vários frames seguidos, como na câmera
+            fluxo.extend([gesto] * int(rng.integers(1, 6)))
+            if rng.random() < 0.1:
+                fluxo.append(SEM_GESTO)
+    return fluxo[:n]
+
+# ===============================
+# Versões antigas (linha de base)
+# ===============================
+def normalizar_landmarks_antigo(landmarks):
+    if not landmarks or len(landmarks) == 0:
+        return []
+
+    pts = [[float(p[0]), float(p[1]), float(p[2])] for p in landmarks]
+    base_x, base_y, base_z = pts[0]
+    centralizados = [[p[0]-base_x, p[1]-base_y, p[2]-base_z] for p in pts]
+
+    soma = sum([math.sqrt(p[0]**2+p[1]**2+p[2]**2) for p in centralizados])
+    escala = soma / len(centralizados) if len(centralizados)>0 else 1.0
+    if escala == 0: escala = 1.0
+
+    normalizados = [[p[0]/escala, p[1]/escala, p[2]/escala] for p in centralizados]
+    return normalizados
+
+def reconhecer_por_coords_antigo(gestos, coords_atual):
+    atual_norm = normalizar_landmarks(coords_atual)
+    melhor = None
+    melhor_val = float("inf")
+    for nome, coords_salvas in gestos.items():
+        d = media_distancia(atual_norm, coords_salvas)
+        if d < melhor_val:
+            melhor_val = d
+            melhor = nome
+    if melhor_val <= LIMIAR_RECONHECIMENTO:
+        return melhor
+    return SEM_GESTO
+
+def frases_antigo(frases_salvas):
+    gestos_recentes = []
+
+    def atualizar(gesto_atual):
+        if gesto_atual != SEM_GESTO:
+            if len(gestos_recentes) == 0 or gestos_recentes[-1] != gesto_atual:
+                gestos_recentes.append(gesto_atual)
+                if len(gestos_recentes) > 10:
+                    gestos_recentes.pop(0)
+        for f in frases_salvas.get("frases", []):
+            seq = f["sequencia"]
+            if len(gestos_recentes) >= len(seq) and gestos_recentes[-len(seq):] == seq:
+                return f["nome"]
+        return ""
+    return atualizar
+
+# ===============================
+# Medição
+# ===============================
+def medir(funcao, entradas, tempo=TEMPO_POR_CASO):
+    """Chama funcao(entrada) em sequência e devolve percentis de latência e vazão."""
+    tempos = []
+    inicio = time.perf_counter()
+    for i, entrada in enumerate(entradas):
+        t0 = time.perf_counter_ns()
+        funcao(entrada)
+        tempos.append(time.perf_counter_ns() - t0)
+        if i + 1 >= MIN_CHAMADAS and time.perf_counter() - inicio > tempo:
+            break
+    total = time.perf_counter() - inicio
+
+    # memória numa passada separada: o tracemalloc deixaria os tempos maiores
+    tracemalloc.start()
+    for entrada in entradas[:min(len(tempos), 50)]:
+        funcao(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    us = np.array(tempos) / 1000
+    return {
+        "chamadas": len(tempos),
+        "p50_us": float(np.percentile(us, 50)),
+        "p90_us": float(np.percentile(us, 90)),
+        "p99_us": float(np.percentile(us, 99)),
+        "media_us": float(us.mean()),
+        "chamadas_por_s": len(tempos) / total if total else 0.0,
+        "pico_memoria_kb": pico / 1024,
+    }
+
+def bench_gestos(templates, tamanhos, rng, tempo):
+    resultados = []
+    nomes_base = list(templates)
+    maos = [mao_sintetica(templates[nomes_base[i % len(nomes_base)]], rng)
+            for i in range(MAX_CHAMADAS)]
+    maos_listas = [m.tolist() for m in maos]
+
+    caso = {"caso": "normalizar_landmarks"}
+    caso.update(medir(normalizar_landmarks, maos_listas, tempo))
+    # a versão vetorizada tem que dar os mesmos valores, bit a bit, que a em listas
+    caso["diferentes_da_antiga"] = sum(normalizar_landmarks(m) != normalizar_landmarks_antigo(m)
+                                       for m in maos_listas + [[[0.5, 0.5, 0.0]] * NUM_PONTOS])
+    resultados.append(caso)
+
+    pares = [(normalizar_landmarks(m), templates[nomes_base[i % len(nomes_base)]].tolist())
+             for i, m in enumerate(maos_listas[:500])]
+    caso = {"caso": "media_distancia"}
+    caso.update(medir(lambda p: media_distancia(*p), pares, tempo))
+    resultados.append(caso)
+
+    for n in tamanhos:
+        gestos = banco_sintetico(templates, n, rng)
+        gestos_listas = {k: v.tolist() for k, v in gestos.items()}
+        exato = ReconhecedorGestos(gestos)
+        indice = IndiceGestos(gestos)
+        portao = PortaoMovimento(indice)
+        quantizado = ReconhecedorQuantizado.de_array(exato.nomes, exato.templates)
+        # mão parada com tremor pequeno, para o portão de movimento
+        parada = [maos[0] + rng.normal(0, 0.0003, maos[0].shape) for _ in range(MAX_CHAMADAS)]
+        casos = [
+            ("reconhecer_por_coords_antigo", lambda m: reconhecer_por_coords_antigo(gestos_listas, m), maos_listas),
+            ("ReconhecedorGestos", lambda m: exato.reconhecer(m, k=1), maos),
+            ("IndiceGestos", lambda m: indice.reconhecer(m, k=1), maos),
+            ("ReconhecedorQuantizado(int8)", lambda m: quantizado.reconhecer(m, k=1), maos),
+            ("PortaoMovimento(mao parada)", lambda m: portao.reconhecer(m, k=1), parada),
+        ]
+        for nome, funcao, entradas in casos:
+            caso = {"caso": nome, "banco": n}
+            caso.update(medir(funcao, entradas, tempo))
+            resultados.append(caso)
+    return resultados
+
+def bench_frases(templates, qtds, tamanhos, rng, tempo):
+    resultados = []
+    nomes = np.array(list(templates))
+    for qtd in qtds:
+        for tamanho in tamanhos:
+            frases_salvas = frases_sinteticas(nomes, qtd, tamanho, rng)
+            fluxo = fluxo_gestos(frases_salvas, nomes, MAX_CHAMADAS, rng)
+            for nome, atualizar in (("frases_antigo", frases_antigo(frases_salvas)),
+                                    ("HistoricoFrases", HistoricoFrases(frases_salvas).atualizar)):
+                caso = {"caso": nome, "frases": qtd, "tamanho_sequencia": tamanho}
+                caso.update(medir(atualizar, fluxo, tempo))
+                resultados.append(caso)
+    return resultados
+
+# ===============================
+# Saída
+# ===============================
+def _chave(caso):
+    return tuple((k, caso[k]) for k in ("caso", "banco", "frases", "tamanho_sequencia") if k in caso)
+
+def comparar(atual, anterior):
+    antes = {_chave(c): c for c in anterior["resultados"]}
+    print(f"{'caso':<60} {'p50 antes':>12} {'p50 agora':>12} {'razão':>8}")
+    for caso in atual["resultados"]:
+        c0 = antes.get(_chave(caso))
+        if c0 is None:
+            continue
+        rotulo = " ".join(f"{k}={v}" for k, v in _chave(caso))
+        razao = caso["p50_us"] / c0["p50_us"] if c0["p50_us"] else float("nan")
+        print(f"{rotulo:<60} {c0['p50_us']:>10.1f}us {caso['p50_us']:>10.1f}us {razao:>7.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do reconhecimento com dados sintéticos.")
+    parser.add_argument("-o", "--saida", default="bench_resultados.json")
+    parser.add_argument("--gestos", default="gestos_salvos.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rapido", action="store_true", help="menos casos e menos tempo por caso")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    templates = carregar_templates(args.gestos)
+    tempo = TEMPO_POR_CASO / 5 if args.rapido else TEMPO_POR_CASO
+    tamanhos = TAMANHOS_BANCO[:3] if args.rapido else TAMANHOS_BANCO
+    qtds = QTDS_FRASES[:2] if args.rapido else QTDS_FRASES
+
+    resultados = bench_gestos(templates, tamanhos, rng, tempo)
+    resultados += bench_frases(templates, qtds, TAMANHOS_SEQUENCIA, rng, tempo)
+    saida = {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor(),
+        "seed": args.seed,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(saida, f, ensure_ascii=False, indent=4)
+
+    for caso in resultados:
+        if caso.get("diferentes_da_antiga"):
+            print(f"ATENÇÃO: normalizar_landmarks difere da versão antiga em {caso['diferentes_da_antiga']} mãos")
+        rotulo = " ".join(f"{k}={v}" for k, v in _chave(caso))
+        print(f"{rotulo:<60} p50={caso['p50_us']:9.1f}us p99={caso['p99_us']:9.1f}us "
+              f"{caso['chamadas_por_s']:10.0f}/s pico={caso['pico_memoria_kb']:8.1f}KB")
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar(saida, json.load(f))
+
+if __name__ == "__main__":
+    main()
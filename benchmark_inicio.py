@@ -0,0 +1,105 @@
+"""Benchmark do tempo de início: quanto custa importar cada parte do app.
+
+Uso:
+    python benchmark_inicio.py -o inicio.json
+    python benchmark_inicio.py --limite-main-ms 800      # falha (código 1) se main ficar lento
+
+Cada medição roda num interpretador novo, para não aproveitar módulos já
+carregados. O importante é que "main" (o que roda antes da tela de login)
+não carregue cv2 nem mediapipe: isso também faz o benchmark falhar.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+MODULOS = ["main", "reconhecedor", "frases", "traducao", "cv2", "mediapipe"]
+PESADOS = ("cv2", "mediapipe")
+REPETICOES = 5
+
+CODIGO_IMPORT = """
+import json, sys, time
+t0 = time.perf_counter()
+import {modulo}
+t1 = time.perf_counter()
+print(json.dumps({{"s": t1 - t0, "pesados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+CODIGO_AQUECIMENTO = """
+import json, time
+t0 = time.perf_counter()
+from servico_visao import obter_servico
+t1 = time.perf_counter()
+obter_servico().aquecer()
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "aquecer_s": t2 - t1}))
+"""
+
+def _rodar(codigo):
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=pasta, capture_output=True,
+                           text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def medir_import(modulo, repeticoes=REPETICOES):
+    medidas = [_rodar(CODIGO_IMPORT.format(modulo=modulo, pesados=PESADOS)) for _ in range(repeticoes)]
+    tempos = [1000 * m["s"] for m in medidas]
+    return {
+        "modulo": modulo,
+        "mediana_ms": statistics.median(tempos),
+        "min_ms": min(tempos),
+        "max_ms": max(tempos),
+        "carrega": medidas[-1]["pesados"],
+    }
+
+def medir_aquecimento():
+    m = _rodar(CODIGO_AQUECIMENTO)
+    return {"import_visao_ms": 1000 * m["import_s"], "aquecer_hands_ms": 1000 * m["aquecer_s"]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de import dos módulos do app.")
+    parser.add_argument("-o", "--saida", default="bench_inicio.json")
+    parser.add_argument("-n", "--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--limite-main-ms", type=float, default=None,
+                        help="falha se importar main demorar mais que isso (mediana)")
+    parser.add_argument("--sem-aquecimento", action="store_true",
+                        help="não mede a criação do MediaPipe Hands")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for modulo in MODULOS:
+        r = medir_import(modulo, args.repeticoes)
+        resultados.append(r)
+        print(f"{modulo:<14} mediana {r['mediana_ms']:8.1f} ms  (min {r['min_ms']:.1f}, max {r['max_ms']:.1f})"
+              + (f"  carrega {', '.join(r['carrega'])}" if r["carrega"] else ""))
+    aquecimento = None
+    if not args.sem_aquecimento:
+        aquecimento = medir_aquecimento()
+        print(f"aquecimento: import {aquecimento['import_visao_ms']:.0f} ms, "
+              f"Hands {aquecimento['aquecer_hands_ms']:.0f} ms")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "imports": resultados,
+            "aquecimento": aquecimento,
+        }, f, ensure_ascii=False, indent=4)
+
+    falhas = []
+    principal = next(r for r in resultados if r["modulo"] == "main")
+    if principal["carrega"]:
+        falhas.append(f"main carrega {', '.join(principal['carrega'])} antes do login")
+    if args.limite_main_ms is not None and principal["mediana_ms"] > args.limite_main_ms:
+        falhas.append(f"main levou {principal['mediana_ms']:.0f} ms (limite {args.limite_main_ms:.0f} ms)")
+    for falha in falhas:
+        print("FALHA:", falha)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
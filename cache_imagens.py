@@ -0,0 +1,233 @@
+"""Cache das imagens das telas de Alfabeto e Frases Simples.
+
+As imagens já redimensionadas ficam num LRU com limite de memória, e o PhotoImage
+de cada uma é criado uma vez só. Opcionalmente, todas podem ser empacotadas num
+atlas na instalação: um arquivo RGB cru (lido sem decodificar PNG nem
+redimensionar) mais um JSON com a posição de cada imagem:
+
+    python cache_imagens.py --atlas
+"""
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# ===============================
+# Configuração
+# ===============================
+TAMANHO_LETRA = (150, 150)
+TAMANHO_FRASE = (955, 245)
+PASTA_LETRAS = "imagens_libras"
+PASTA_FRASES = "frases_libras"
+ARQUIVO_ATLAS = "atlas_imagens"         # atlas_imagens.rgb + atlas_imagens.json
+LIMITE_MEMORIA = 32 * 1024 * 1024       # bytes (imagens PIL + PhotoImages)
+FOTOS_POR_PASSO = 4                     # PhotoImages criados por vez na thread do Tk
+
+def itens_alfabeto():
+    return [(os.path.join(PASTA_LETRAS, f"{letra}.png"), TAMANHO_LETRA)
+            for letra in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"]
+
+def itens_frases():
+    if not os.path.isdir(PASTA_FRASES):
+        return []
+    return [(os.path.join(PASTA_FRASES, f), TAMANHO_FRASE)
+            for f in sorted(os.listdir(PASTA_FRASES)) if f.lower().endswith(".png")]
+
+def _assinatura_arquivo(caminho):
+    st = os.stat(caminho)
+    return [st.st_mtime_ns, st.st_size]
+
+# ===============================
+# Cache
+# ===============================
+class CacheImagens:
+    """LRU de imagens redimensionadas, chaveado por (caminho, tamanho).
+
+    preparar() decodifica e redimensiona, e pode rodar em qualquer thread.
+    obter() devolve o PhotoImage e só deve ser chamado na thread do Tk.
+    """
+
+    def __init__(self, limite_bytes=LIMITE_MEMORIA, arquivo_atlas=ARQUIVO_ATLAS):
+        self.limite_bytes = limite_bytes
+        self.arquivo_atlas = arquivo_atlas
+        self._itens = OrderedDict()     # chave -> [imagem PIL ou None, PhotoImage ou None, bytes]
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self._descartados = []          # PhotoImages removidos fora da thread do Tk
+        self._indice_atlas = None
+        self._tamanho_atlas = None
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, caminho, tamanho):
+        """PhotoImage já redimensionado, ou None se o arquivo não existir."""
+        chave = (caminho, tuple(tamanho))
+        with self._trava:
+            # PhotoImages só podem ser apagados na thread do Tk
+            self._descartados.clear()
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+        if item is None:
+            self.faltas += 1
+            self.preparar(caminho, tamanho)
+            with self._trava:
+                item = self._itens.get(chave)
+        if item is None or item[0] is None:
+            return None
+        if item[1] is None:
+            self._criar_foto(chave, item)
+        return item[1]
+
+    def _criar_foto(self, chave, item):
+        foto = ImageTk.PhotoImage(item[0])
+        with self._trava:
+            if self._itens.get(chave) is item and item[1] is None:
+                item[1] = foto
+                extra = foto.width() * foto.height() * 4
+                item[2] += extra
+                self._bytes += extra
+                self._limitar()
+
+    def preparar(self, caminho, tamanho):
+        """Carrega e redimensiona uma imagem para o cache, sem criar o PhotoImage."""
+        chave = (caminho, tuple(tamanho))
+        with self._trava:
+            if chave in self._itens:
+                return
+        imagem = self._do_atlas(caminho, tamanho)
+        if imagem is None and os.path.exists(caminho):
+            imagem = Image.open(caminho)
+            imagem = imagem.resize(tuple(tamanho))
+        custo = 0 if imagem is None else imagem.width * imagem.height * len(imagem.getbands())
+        with self._trava:
+            if chave in self._itens:
+                return
+            # arquivo ausente também fica no cache, para não ir ao disco a cada clique
+            self._itens[chave] = [imagem, None, custo]
+            self._bytes += custo
+            self._limitar()
+
+    def _limitar(self):
+        while self._bytes > self.limite_bytes and len(self._itens) > 1:
+            _, (_, foto, custo) = self._itens.popitem(last=False)
+            self._bytes -= custo
+            if foto is not None:
+                self._descartados.append(foto)
+
+    def pre_carregar(self, itens, raiz=None):
+        """Prepara os itens numa thread; com raiz (janela Tk), cria os PhotoImages aos poucos depois."""
+        itens = list(itens)
+
+        def preparar_todos():
+            for caminho, tamanho in itens:
+                self.preparar(caminho, tamanho)
+
+        thread = threading.Thread(target=preparar_todos, daemon=True)
+        thread.start()
+        if raiz is None:
+            return
+
+        def converter():
+            feitos = 0
+            for caminho, tamanho in itens:
+                chave = (caminho, tuple(tamanho))
+                with self._trava:
+                    item = self._itens.get(chave)
+                if item is not None and item[0] is not None and item[1] is None:
+                    self._criar_foto(chave, item)
+                    feitos += 1
+                    if feitos >= FOTOS_POR_PASSO:
+                        break
+            if feitos or thread.is_alive():
+                try:
+                    raiz.after(50, converter)
+                except Exception:
+                    # janela fechada antes de terminar
+                    pass
+
+        raiz.after(50, converter)
+
+    # ===============================
+    # Atlas
+    # ===============================
+    def _do_atlas(self, caminho, tamanho):
+        if self._indice_atlas is None:
+            self._indice_atlas = {}
+            try:
+                with open(self.arquivo_atlas + ".json", "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                self._tamanho_atlas = tuple(dados["tamanho"])
+                for item in dados["itens"]:
+                    self._indice_atlas[(item["caminho"], tuple(item["tamanho"]))] = item
+            except Exception:
+                pass
+        item = self._indice_atlas.get((caminho, tuple(tamanho)))
+        if item is None:
+            return None
+        try:
+            # imagem alterada depois de gerar o atlas: usa o arquivo original
+            if _assinatura_arquivo(caminho) != item["arquivo"]:
+                return None
+            return self._recortar_atlas(item["x"], item["y"], tamanho[0], tamanho[1])
+        except Exception:
+            return None
+
+    def _recortar_atlas(self, x, y, largura, altura):
+        """Lê do .rgb só as linhas do retângulo, sem carregar o atlas inteiro nem usar a trava."""
+        passo = self._tamanho_atlas[0] * 3
+        linhas = []
+        with open(self.arquivo_atlas + ".rgb", "rb") as f:
+            for i in range(altura):
+                f.seek((y + i) * passo + x * 3)
+                linhas.append(f.read(largura * 3))
+        dados = b"".join(linhas)
+        # atlas truncado ou de outra versão: usa o arquivo original
+        if len(dados) != largura * altura * 3:
+            return None
+        return Image.frombytes("RGB", (largura, altura), dados)
+
+def construir_atlas(itens, arquivo_atlas=ARQUIVO_ATLAS, largura_max=2048):
+    """Empacota as imagens redimensionadas (em RGB) em prateleiras num arquivo só."""
+    imagens = []
+    for caminho, tamanho in itens:
+        if os.path.exists(caminho):
+            imagem = Image.open(caminho).resize(tuple(tamanho)).convert("RGB")
+            imagens.append((caminho, tuple(tamanho), imagem))
+    # mais altas primeiro: as prateleiras desperdiçam menos espaço
+    imagens.sort(key=lambda i: -i[1][1])
+
+    posicoes, x, y, altura_linha, largura = [], 0, 0, 0, 0
+    for caminho, tamanho, imagem in imagens:
+        if x + tamanho[0] > largura_max and x > 0:
+            x, y, altura_linha = 0, y + altura_linha, 0
+        posicoes.append((x, y))
+        x += tamanho[0]
+        largura = max(largura, x)
+        altura_linha = max(altura_linha, tamanho[1])
+
+    atlas = Image.new("RGB", (max(largura, 1), max(y + altura_linha, 1)))
+    registros = []
+    for (caminho, tamanho, imagem), (x, y) in zip(imagens, posicoes):
+        atlas.paste(imagem, (x, y))
+        registros.append({"caminho": caminho, "tamanho": list(tamanho), "x": x, "y": y,
+                          "arquivo": _assinatura_arquivo(caminho)})
+    with open(arquivo_atlas + ".rgb", "wb") as f:
+        f.write(atlas.tobytes())
+    with open(arquivo_atlas + ".json", "w", encoding="utf-8") as f:
+        json.dump({"tamanho": list(atlas.size), "itens": registros}, f, ensure_ascii=False, indent=4)
+    return atlas.size, len(registros)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o atlas de imagens das telas de Alfabeto e Frases.")
+    parser.add_argument("--atlas", action="store_true", help="gera atlas_imagens.rgb/.json")
+    args = parser.parse_args()
+    if args.atlas:
+        tamanho, n = construir_atlas(itens_alfabeto() + itens_frases())
+        print(f"Atlas {tamanho[0]}x{tamanho[1]} com {n} imagens salvo em {ARQUIVO_ATLAS}.rgb")
+    else:
+        parser.print_help()
@@ -0,0 +1,226 @@
+"""Cadastro de gestos em lote a partir de pastas de imagens e vídeos, sem câmera nem Tk.
+
+Uso:
+    python cadastro_lote.py amostras/ -j 4 --max-templates 5
+
+amostras/<nome do gesto>/ com imagens (.png, .jpg, ...) e vídeos (.mp4, .avi, ...):
+cada subpasta é um gesto. Os landmarks são extraídos em paralelo (um MediaPipe
+por processo), espelhados como na câmera ao vivo e normalizados com
+normalizar_landmarks. Amostras quase iguais viram um template só, e cada gesto
+fica com no máximo --max-templates, gravados como "A#1", "A#2", ... (todos
+reconhecidos como "A") numa escrita só no banco.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from reconhecedor import (normalizar_landmarks, distancias_medias, distancias_medias_lote,
+                          chave_amostra, nome_gesto, NUM_PONTOS)
+from armazenamento_gestos import ArmazemGestos, migrar_se_preciso
+from rastreio_mao import RastreadorMao, maos_do_resultado
+from servico_visao import OPCOES_HANDS, OPCOES_RASTREIO
+from fontes_quadros import EXTENSOES_IMAGEM
+
+# ===============================
+# Configuração
+# ===============================
+EXTENSOES_VIDEO = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+AMOSTRAS_POR_SEGUNDO = 5.0  # frames de vídeo aproveitados por segundo (os vizinhos são quase iguais)
+IMAGENS_POR_TAREFA = 32
+MAX_TEMPLATES = 5
+RAIO_DUPLICATA = 0.08       # distância média abaixo da qual duas amostras contam como a mesma
+MAX_MEDOIDE = 400           # amostras usadas para escolher o representante de um grupo grande
+DIM = NUM_PONTOS * 3
+
+# ===============================
+# Worker (um Hands por processo)
+# ===============================
+_hands_video = None
+_hands_imagem = None
+_espelhar = True
+
+def _iniciar_worker(espelhar):
+    global _hands_video, _hands_imagem, _espelhar
+    # cada processo usa um núcleo; threads internas do OpenCV só disputariam CPU
+    cv2.setNumThreads(1)
+    _espelhar = espelhar
+    _hands_video = mp.solutions.hands.Hands(**OPCOES_HANDS)
+    _hands_imagem = mp.solutions.hands.Hands(static_image_mode=True, **OPCOES_HANDS)
+
+def _amostra(frame, detector, contagem):
+    """Landmarks normalizados de um frame com exatamente uma mão, ou None."""
+    maos = maos_do_resultado(detector.processar(cv2.flip(frame, 1) if _espelhar else frame))
+    if len(maos) != 1:
+        contagem["sem_mao" if not maos else "duas_maos"] += 1
+        return None
+    return np.asarray(normalizar_landmarks(maos[0][1]), dtype=np.float64).reshape(DIM)
+
+def _extrair(tarefa):
+    """(gesto, amostras (n, 63), contagem) de um vídeo ou de um lote de imagens."""
+    gesto, tipo, caminhos = tarefa
+    amostras = []
+    contagem = {"frames": 0, "sem_mao": 0, "duas_maos": 0}
+    if tipo == "video":
+        _hands_video.reset()
+        detector = RastreadorMao(_hands_video, **OPCOES_RASTREIO)
+        cap = cv2.VideoCapture(caminhos[0])
+        passo = max(1, round((cap.get(cv2.CAP_PROP_FPS) or 30.0) / AMOSTRAS_POR_SEGUNDO))
+        i = 0
+        while True:
+            # grab() só avança; decodifica só os frames aproveitados
+            if not cap.grab():
+                break
+            if i % passo == 0:
+                ret, frame = cap.retrieve()
+                if ret:
+                    contagem["frames"] += 1
+                    amostra = _amostra(frame, detector, contagem)
+                    if amostra is not None:
+                        amostras.append(amostra)
+            i += 1
+        cap.release()
+    else:
+        # imagens soltas não têm frame anterior: sem ROI, sempre o frame inteiro
+        detector = RastreadorMao(_hands_imagem, **dict(OPCOES_RASTREIO, usar_roi=False))
+        for caminho in caminhos:
+            frame = cv2.imread(caminho)
+            if frame is None:
+                continue
+            contagem["frames"] += 1
+            amostra = _amostra(frame, detector, contagem)
+            if amostra is not None:
+                amostras.append(amostra)
+    return gesto, np.array(amostras, dtype=np.float64).reshape(-1, DIM), contagem
+
+def _tarefas(pasta):
+    """Um vídeo ou até IMAGENS_POR_TAREFA imagens por tarefa, em ordem (gesto, arquivo)."""
+    tarefas = []
+    for gesto in sorted(os.listdir(pasta)):
+        subpasta = os.path.join(pasta, gesto)
+        if not os.path.isdir(subpasta):
+            continue
+        arquivos = sorted(os.path.join(subpasta, f) for f in os.listdir(subpasta))
+        imagens = [a for a in arquivos if a.lower().endswith(EXTENSOES_IMAGEM)]
+        tarefas += [(gesto, "imagens", imagens[i:i + IMAGENS_POR_TAREFA])
+                    for i in range(0, len(imagens), IMAGENS_POR_TAREFA)]
+        tarefas += [(gesto, "video", [a]) for a in arquivos if a.lower().endswith(EXTENSOES_VIDEO)]
+    return tarefas
+
+# ===============================
+# Agrupamento
+# ===============================
+def agrupar(amostras, max_templates=MAX_TEMPLATES, raio=RAIO_DUPLICATA):
+    """Escolhe até max_templates representantes das amostras (n, 63) de um gesto.
+
+    Centros gulosos: começa pela amostra mais típica (a mais perto da média) e
+    acrescenta sempre a mais distante de todos os centros, até que ela esteja a
+    menos de raio de algum (o resto são quase duplicatas) ou o limite chegue.
+    Cada grupo é representado pelo seu medoide, uma amostra real. Retorna
+    (representantes (k, 21, 3), tamanhos dos grupos, maior distância de uma
+    amostra ao seu representante), do grupo maior para o menor.
+    """
+    x = np.ascontiguousarray(amostras, dtype=np.float64).reshape(-1, DIM)
+    primeiro = int(np.argmin(distancias_medias(x, x.mean(axis=0))))
+    centros = [primeiro]
+    mais_perto = distancias_medias(x, x[primeiro])
+    while len(centros) < max_templates:
+        j = int(np.argmax(mais_perto))
+        if mais_perto[j] <= raio:
+            break
+        centros.append(j)
+        np.minimum(mais_perto, distancias_medias(x, x[j]), out=mais_perto)
+
+    rotulos = np.argmin(distancias_medias_lote(x, x[centros]), axis=0)
+    rng = np.random.default_rng(0)
+    grupos = []
+    for c in range(len(centros)):
+        membros = np.flatnonzero(rotulos == c)
+        if len(membros) > MAX_MEDOIDE:
+            candidatos = np.sort(rng.choice(membros, MAX_MEDOIDE, replace=False))
+        else:
+            candidatos = membros
+        # medoide: a amostra com a menor soma de distâncias até as outras do grupo
+        soma = distancias_medias_lote(x[membros], x[candidatos]).sum(axis=1)
+        grupos.append((len(membros), int(candidatos[np.argmin(soma)])))
+    grupos.sort(key=lambda g: (-g[0], g[1]))
+    representantes = x[[i for _, i in grupos]]
+    cobertura = float(distancias_medias_lote(x, representantes).min(axis=0).max())
+    return representantes.reshape(-1, NUM_PONTOS, 3), [n for n, _ in grupos], cobertura
+
+# ===============================
+# Cadastro
+# ===============================
+def cadastrar(pasta, base_gestos="gestos_salvos", processos=None, max_templates=MAX_TEMPLATES,
+              raio=RAIO_DUPLICATA, espelhar=True, arquivo_gestos="gestos_salvos.json"):
+    """Extrai, agrupa e grava os gestos de pasta; retorna um relatório por gesto."""
+    tarefas = _tarefas(pasta)
+    amostras = defaultdict(list)
+    contagens = defaultdict(lambda: {"frames": 0, "sem_mao": 0, "duas_maos": 0})
+    # migra antes de abrir o pool e de ler o banco
+    migrar_se_preciso(arquivo_gestos, base_gestos)
+    with multiprocessing.Pool(processes=processos, initializer=_iniciar_worker, initargs=(espelhar,)) as pool:
+        # imap mantém a ordem das tarefas: o mesmo conjunto de arquivos dá sempre os mesmos templates
+        for gesto, extraidas, contagem in pool.imap(_extrair, tarefas):
+            amostras[gesto].append(extraidas)
+            for chave, valor in contagem.items():
+                contagens[gesto][chave] += valor
+
+    itens, relatorio = [], {}
+    for gesto in sorted(amostras):
+        x = np.concatenate(amostras[gesto])
+        relatorio[gesto] = dict(contagens[gesto], amostras=len(x), templates=0, cobertura=None)
+        if len(x) == 0:
+            continue
+        representantes, tamanhos, cobertura = agrupar(x, max_templates, raio)
+        itens += [(chave_amostra(gesto, i + 1), r) for i, r in enumerate(representantes)]
+        relatorio[gesto].update(templates=len(representantes), grupos=tamanhos, cobertura=cobertura)
+
+    armazem = ArmazemGestos(base_gestos)
+    novos = {nome for nome, _ in itens}
+    cadastrados = {nome_gesto(nome) for nome in novos}
+    nomes, templates = armazem.carregar()
+    # templates "gesto#n" de um cadastro anterior que agora teria menos grupos
+    sobras = [n for n in nomes if n not in novos and n != nome_gesto(n) and nome_gesto(n) in cadastrados]
+    if sobras:
+        # o banco é só de acréscimos: para apagar as sobras, reescreve tudo de uma vez
+        # cópias: o memmap do banco não pode estar aberto quando os arquivos forem trocados
+        mantidos = [(n, np.array(templates[i])) for i, n in enumerate(nomes) if n not in novos and n not in sobras]
+        del templates
+        armazem.reescrever(mantidos + itens)
+    else:
+        armazem.salvar_varios(itens)
+    return relatorio
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cadastro de gestos em lote (pastas <gesto>/*.png|*.mp4).")
+    parser.add_argument("pasta", help="pasta com uma subpasta por gesto")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="número de processos (padrão: núcleos)")
+    parser.add_argument("--max-templates", type=int, default=MAX_TEMPLATES, help="templates por gesto, no máximo")
+    parser.add_argument("--raio", type=float, default=RAIO_DUPLICATA,
+                        help="distância média abaixo da qual amostras são tratadas como duplicatas")
+    parser.add_argument("--gestos", default="gestos_salvos", help="base do banco de gestos (.f64/.idx)")
+    parser.add_argument("--sem-espelhar", action="store_true", help="as imagens já estão espelhadas como na câmera")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    relatorio = cadastrar(args.pasta, args.gestos, args.processos, args.max_templates, args.raio,
+                          espelhar=not args.sem_espelhar, arquivo_gestos=args.gestos + ".json")
+    for gesto, r in relatorio.items():
+        linha = (f"{gesto}: {r['amostras']} amostras de {r['frames']} frames "
+                 f"({r['sem_mao']} sem mão, {r['duas_maos']} com duas mãos) -> {r['templates']} templates")
+        if r["templates"]:
+            linha += f" {r['grupos']}, cobertura {r['cobertura']:.3f}"
+        print(linha)
+    total = sum(r["amostras"] for r in relatorio.values())
+    print(f"{total} amostras, {sum(r['templates'] for r in relatorio.values())} templates "
+          f"em {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Cliente do servidor_reconhecimento e gerador de carga.
+
+Uso:
+    python carga_reconhecimento.py -c 32 -n 500 -o carga.json
+    python carga_reconhecimento.py --unix /tmp/libras.sock -c 8 --em-voo 4
+
+Cada cliente simula um quiosque: uma conexão, uma sessão e mãos sintéticas
+(templates de gestos_salvos.json com ruído). Mede pedidos/s e a latência de
+cada pedido (envio -> resposta).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from benchmark import carregar_templates, mao_sintetica
+from servidor_reconhecimento import ENDERECO, PORTA, LIMITE_LINHA
+
+# ===============================
+# Cliente
+# ===============================
+class ClienteReconhecimento:
+    """Conexão com o servidor; vários pedidos podem estar em andamento ao mesmo tempo."""
+
+    def __init__(self, sessao=""):
+        self.sessao = sessao
+        self._leitor = None
+        self._escritor = None
+        self._proximo_id = 0
+        self._esperando = {}
+        self._tarefa = None
+
+    async def conectar(self, endereco=ENDERECO, porta=PORTA, unix=None):
+        if unix:
+            self._leitor, self._escritor = await asyncio.open_unix_connection(unix, limit=LIMITE_LINHA)
+        else:
+            self._leitor, self._escritor = await asyncio.open_connection(endereco, porta, limit=LIMITE_LINHA)
+        self._tarefa = asyncio.create_task(self._receber())
+
+    async def _receber(self):
+        while True:
+            linha = await self._leitor.readline()
+            if not linha:
+                break
+            resposta = json.loads(linha)
+            futuro = self._esperando.pop(resposta.get("id"), None)
+            if futuro is not None and not futuro.done():
+                futuro.set_result(resposta)
+        for futuro in self._esperando.values():
+            if not futuro.done():
+                futuro.set_exception(ConnectionError("servidor fechou a conexão"))
+
+    async def pedir(self, pedido):
+        self._proximo_id += 1
+        pedido = dict(pedido, id=self._proximo_id, sessao=self.sessao)
+        futuro = asyncio.get_running_loop().create_future()
+        self._esperando[self._proximo_id] = futuro
+        self._escritor.write((json.dumps(pedido) + "\n").encode("utf-8"))
+        await self._escritor.drain()
+        return await futuro
+
+    async def reconhecer(self, maos, lados=None):
+        """maos: lista de mãos com 21 pontos (x, y, z) cada; lados: "Esquerda"/"Direita" por mão (opcional)."""
+        pedido = {"maos": maos}
+        if lados is not None:
+            pedido["lados"] = lados
+        return await self.pedir(pedido)
+
+    async def fechar(self):
+        self._escritor.close()
+        try:
+            await self._escritor.wait_closed()
+        except ConnectionError:
+            pass
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+
+# ===============================
+# Gerador de carga
+# ===============================
+async def _quiosque(n, args, maos, latencias, erros):
+    cliente = ClienteReconhecimento(sessao=f"carga{n}")
+    await cliente.conectar(args.endereco, args.porta, args.unix)
+    fila = asyncio.Queue()
+    for i in range(args.pedidos):
+        fila.put_nowait(i)
+
+    async def trabalhar():
+        while not fila.empty():
+            i = fila.get_nowait()
+            mao = maos[(n * args.pedidos + i) % len(maos)]
+            t0 = time.perf_counter()
+            resposta = await cliente.reconhecer([mao] * args.maos)
+            latencias.append(time.perf_counter() - t0)
+            if "erro" in resposta:
+                erros.append(resposta["erro"])
+
+    await asyncio.gather(*(trabalhar() for _ in range(args.em_voo)))
+    await cliente.fechar()
+
+async def gerar_carga(args):
+    rng = np.random.default_rng(args.seed)
+    templates = list(carregar_templates(args.gestos).values())
+    maos = [mao_sintetica(templates[i % len(templates)], rng).tolist() for i in range(1000)]
+    latencias, erros = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_quiosque(n, args, maos, latencias, erros) for n in range(args.clientes)))
+    total = time.perf_counter() - t0
+
+    estatisticas = None
+    cliente = ClienteReconhecimento()
+    await cliente.conectar(args.endereco, args.porta, args.unix)
+    estatisticas = await cliente.pedir({"tipo": "estatisticas"})
+    await cliente.fechar()
+
+    ms = np.array(latencias) * 1000
+    return {
+        "clientes": args.clientes,
+        "em_voo_por_cliente": args.em_voo,
+        "maos_por_pedido": args.maos,
+        "pedidos": len(latencias),
+        "erros": len(erros),
+        "segundos": total,
+        "pedidos_por_s": len(latencias) / total if total else 0.0,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "servidor": estatisticas,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerador de carga para o servidor de reconhecimento.")
+    parser.add_argument("--endereco", default=ENDERECO)
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--unix")
+    parser.add_argument("-c", "--clientes", type=int, default=16, help="conexões simultâneas (quiosques)")
+    parser.add_argument("-n", "--pedidos", type=int, default=200, help="pedidos por cliente")
+    parser.add_argument("--em-voo", type=int, default=1, help="pedidos sem resposta por cliente")
+    parser.add_argument("--maos", type=int, default=1, help="mãos por pedido")
+    parser.add_argument("--gestos", default="gestos_salvos.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--saida")
+    args = parser.parse_args(argv)
+
+    resultado = asyncio.run(gerar_carga(args))
+    print(f"{resultado['pedidos']} pedidos em {resultado['segundos']:.2f} s: "
+          f"{resultado['pedidos_por_s']:.0f} pedidos/s, p50 {resultado['p50_ms']:.2f} ms, "
+          f"p95 {resultado['p95_ms']:.2f} ms, p99 {resultado['p99_ms']:.2f} ms, "
+          f"{resultado['servidor']['pedidos_por_lote']:.1f} pedidos por lote, {resultado['erros']} erros")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=4)
+
+if __name__ == "__main__":
+    main()
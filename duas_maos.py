@@ -0,0 +1,135 @@
+import threading
+
+import numpy as np
+
+from reconhecedor import (Resultado, normalizar_array, distancias_medias_lote, resultado_de_distancias,
+                          NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO)
+
+# ===============================
+# Constantes
+# ===============================
+MAO_ESQUERDA = "Esquerda"
+MAO_DIREITA = "Direita"
+LADOS = (MAO_ESQUERDA, MAO_DIREITA)
+# rótulos do MediaPipe (corretos porque o frame é espelhado antes do Hands)
+LADOS_MEDIAPIPE = {"Left": MAO_ESQUERDA, "Right": MAO_DIREITA}
+SEPARADOR_MAO = "::"        # "Obrigado::Esquerda" e "Obrigado::Direita" formam um gesto de duas mãos
+DIM = NUM_PONTOS * 3
+
+# ===============================
+# Nomes no banco
+# ===============================
+def chave_mao(nome, lado):
+    """Nome da linha no banco para uma das mãos de um gesto de duas mãos."""
+    return f"{nome}{SEPARADOR_MAO}{lado}"
+
+def separar_chave(chave):
+    """(nome, lado) de uma linha do banco; lado é None para gestos de uma mão."""
+    nome, sep, lado = chave.rpartition(SEPARADOR_MAO)
+    if sep and lado in LADOS:
+        return nome, lado
+    return chave, None
+
+def separar_banco(nomes, templates):
+    """Divide o banco em gestos de uma mão e partes de gestos de duas mãos.
+
+    Retorna ((nomes, templates), (chaves, templates)). Sem nenhum gesto de duas
+    mãos, o array original (ex.: memmap) é devolvido sem cópia.
+    """
+    duplas = [i for i, chave in enumerate(nomes) if separar_chave(chave)[1] is not None]
+    if not duplas:
+        return (list(nomes), templates), ([], templates[:0])
+    simples = [i for i in range(len(nomes)) if separar_chave(nomes[i])[1] is None]
+    return (([nomes[i] for i in simples], templates[simples]),
+            ([nomes[i] for i in duplas], templates[duplas]))
+
+# ===============================
+# Reconhecedor de gestos de duas mãos
+# ===============================
+class ReconhecedorDuasMaos:
+    """Gestos compostos: um template por mão, guardados juntos num array (M, 2, 21, 3).
+
+    As duas mãos detectadas são comparadas com as duas partes de todos os gestos
+    numa matriz de distâncias só; a nota de cada gesto é a média das distâncias
+    da mão esquerda à parte esquerda e da direita à parte direita.
+    """
+
+    def __init__(self, chaves=(), templates=(), limiar=LIMIAR_RECONHECIMENTO):
+        self._trava = threading.RLock()
+        self.limiar = limiar
+        self.versao = 0
+        self._partes = {}           # nome -> {lado: (21, 3)}, inclusive gestos ainda sem as duas mãos
+        for chave, coords in zip(chaves, templates):
+            nome, lado = separar_chave(chave)
+            if lado is not None:
+                self._partes.setdefault(nome, {})[lado] = np.asarray(coords, dtype=np.float64).reshape(NUM_PONTOS, 3)
+        self._montar()
+
+    def _montar(self):
+        completos = [(nome, p) for nome, p in self._partes.items() if len(p) == len(LADOS)]
+        self.nomes = [nome for nome, _ in completos]
+        if completos:
+            self.templates = np.ascontiguousarray(np.stack([[p[lado] for lado in LADOS] for _, p in completos]))
+        else:
+            self.templates = np.empty((0, len(LADOS), NUM_PONTOS, 3), dtype=np.float64)
+        self.versao += 1
+
+    def adicionar(self, nome, lado, coords_normalizadas):
+        """Insere ou substitui a parte de uma mão; o gesto entra na busca quando tiver as duas."""
+        with self._trava:
+            self._partes.setdefault(nome, {})[lado] = np.array(coords_normalizadas, dtype=np.float64).reshape(NUM_PONTOS, 3)
+            self._montar()
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def reconhecer(self, maos, k=1):
+        """maos: [(lado, coords crus), (lado, coords crus)], lado em LADOS ou None.
+
+        Se os lados vierem trocados ou repetidos (o MediaPipe às vezes erra), vale
+        a melhor das duas atribuições.
+        """
+        vazio = Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        if len(maos) < 2 or any(c is None or len(c) != NUM_PONTOS for _, c in maos[:2]):
+            return vazio
+        (lado_a, coords_a), (lado_b, coords_b) = maos[:2]
+        consultas = np.stack([normalizar_array(coords_a).reshape(DIM), normalizar_array(coords_b).reshape(DIM)])
+        with self._trava:
+            if len(self.nomes) == 0:
+                return vazio
+            # colunas intercaladas: 2j é a parte esquerda do gesto j, 2j + 1 a direita
+            d = distancias_medias_lote(self.templates.reshape(-1, DIM), consultas)
+            esq, dir_ = d[:, 0::2], d[:, 1::2]
+            a_esquerda = (esq[0] + dir_[1]) / 2
+            b_esquerda = (esq[1] + dir_[0]) / 2
+            if (lado_a, lado_b) == LADOS:
+                pontos = a_esquerda
+            elif (lado_b, lado_a) == LADOS:
+                pontos = b_esquerda
+            else:
+                pontos = np.minimum(a_esquerda, b_esquerda)
+            return resultado_de_distancias(self.nomes, pontos, k, self.limiar)
+
+class ReconhecedorMaos:
+    """Escolhe entre gestos de uma mão e de duas mãos conforme as mãos detectadas.
+
+    Com uma mão só o reconhecedor de uma mão é usado (pode ser um PortaoMovimento).
+    Com duas, um gesto de duas mãos dentro do limiar vence; se nenhum casar, vale
+    o melhor gesto de uma mão entre as duas, reconhecidas num lote só.
+    """
+
+    def __init__(self, simples, duas, uma_mao=None):
+        self.simples = simples
+        self.duas = duas
+        self.uma_mao = simples if uma_mao is None else uma_mao
+
+    def reconhecer(self, maos, k=1):
+        if not maos:
+            return Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        if len(maos) == 1:
+            return self.uma_mao.reconhecer(maos[0][1], k=k)
+        dupla = self.duas.reconhecer(maos, k=k)
+        if dupla.nome != SEM_GESTO:
+            return dupla
+        cada = self.simples.reconhecer_lote([coords for _, coords in maos[:2]], k=k)
+        return min(cada, key=lambda r: r.distancia)
@@ -0,0 +1,370 @@
+"""Fontes de frames, gravação das mãos detectadas e reprodução sem câmera.
+
+Uso:
+    python fontes_quadros.py gravar 0 sessao.lmk --segundos 30      # câmera -> landmarks
+    python fontes_quadros.py gravar aula.mp4 aula.lmk               # vídeo ou pasta de imagens
+    python fontes_quadros.py reproduzir sessao.lmk -o saida.jsonl   # gestos e frases, sem MediaPipe
+    python fontes_quadros.py reproduzir sessao.lmk --tempo-real
+
+Uma fonte pode ser um índice de câmera, um arquivo de vídeo, uma pasta de
+imagens ou uma gravação de landmarks (.lmk). As janelas da câmera usam a fonte
+de LIBRAS_FONTE (padrão: câmera 0); com LIBRAS_GRAVAR=arquivo.lmk, as mãos de
+cada frame processado são gravadas. Reproduzir uma gravação passa as mesmas
+mãos, com os mesmos tempos, pelo reconhecimento e pelas frases, então duas
+reproduções do mesmo arquivo dão sempre a mesma saída.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from reconhecedor import NUM_PONTOS, SEM_GESTO
+from duas_maos import MAO_ESQUERDA, MAO_DIREITA
+
+# ===============================
+# Configuração
+# ===============================
+EXTENSAO_GRAVACAO = ".lmk"
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".bmp")
+FPS_IMAGENS = 1.0
+FPS_PADRAO = 30.0           # vídeos sem FPS no cabeçalho
+ESPERA_FALHA_CAMERA = 0.05  # segundos entre tentativas quando a câmera não entrega um frame
+MAX_FALHAS_CAMERA = 100     # falhas seguidas (~5 s) até a gravação desistir da câmera
+
+# formato: cabeçalho, depois um registro por frame (t, número de mãos) seguido,
+# para cada mão, do lado e das 21 x 3 coordenadas em float32 (o MediaPipe já
+# entrega float32, então a reprodução recebe exatamente os mesmos valores)
+MAGICA = b"LIBRASLM"
+VERSAO = 1
+CABECALHO = struct.Struct("<8sHHH")     # mágica, versão, largura, altura do frame
+REGISTRO = struct.Struct("<dB")         # segundos desde o primeiro frame, mãos
+LADO = struct.Struct("<B")
+DIM = NUM_PONTOS * 3
+BYTES_MAO = LADO.size + 4 * DIM
+CODIGOS_LADO = {None: 0, MAO_ESQUERDA: 1, MAO_DIREITA: 2}
+LADOS_CODIGO = {codigo: lado for lado, codigo in CODIGOS_LADO.items()}
+
+def e_gravacao(fonte):
+    return isinstance(fonte, str) and fonte.lower().endswith(EXTENSAO_GRAVACAO)
+
+def interpretar_fonte(texto):
+    """"0" vira o índice de câmera 0; o resto é caminho."""
+    return int(texto) if isinstance(texto, str) and texto.isdigit() else texto
+
+# ===============================
+# Ritmo
+# ===============================
+class Ritmo:
+    """Espera até a hora de cada frame (tempo real) ou não espera nada (velocidade máxima)."""
+
+    def __init__(self, tempo_real=True):
+        self.tempo_real = tempo_real
+        self._inicio = None
+
+    def esperar(self, t):
+        """t: segundos desde o começo da fonte."""
+        if not self.tempo_real:
+            return
+        agora = time.perf_counter()
+        if self._inicio is None:
+            self._inicio = agora - t
+        atraso = self._inicio + t - agora
+        if atraso > 0:
+            time.sleep(atraso)
+
+# ===============================
+# Fontes de frames
+# ===============================
+# Todas têm a interface do cv2.VideoCapture usada pelo pipeline (read, release,
+# isOpened) e guardam em t o tempo do último frame lido, em segundos desde o início.
+
+class FonteVideo:
+    """Arquivo de vídeo; em tempo real, entrega os frames no FPS do arquivo."""
+
+    def __init__(self, caminho, tempo_real=True):
+        self.caminho = caminho
+        self.cap = cv2.VideoCapture(caminho)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or FPS_PADRAO
+        self.ritmo = Ritmo(tempo_real)
+        self.t = 0.0
+        self._frames = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+        self.t = self._frames / self.fps
+        self._frames += 1
+        self.ritmo.esperar(self.t)
+        return True, frame
+
+    def release(self):
+        self.cap.release()
+
+class FontePasta:
+    """Imagens de uma pasta em ordem alfabética, como frames a fps por segundo."""
+
+    def __init__(self, pasta, fps=FPS_IMAGENS, tempo_real=True):
+        self.arquivos = sorted(os.path.join(pasta, f) for f in os.listdir(pasta)
+                               if f.lower().endswith(EXTENSOES_IMAGEM))
+        self.fps = fps
+        self.ritmo = Ritmo(tempo_real)
+        self.t = 0.0
+        self._proximo = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        while self._proximo < len(self.arquivos):
+            i = self._proximo
+            self._proximo += 1
+            frame = cv2.imread(self.arquivos[i])
+            if frame is None:
+                continue
+            self.t = i / self.fps
+            self.ritmo.esperar(self.t)
+            return True, frame
+        return False, None
+
+    def release(self):
+        self._proximo = len(self.arquivos)
+
+class FonteCamera:
+    """Webcam; t é o tempo desde o primeiro frame."""
+
+    def __init__(self, indice):
+        self.cap = cv2.VideoCapture(indice)
+        self.t = 0.0
+        self._inicio = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        agora = time.perf_counter()
+        if self._inicio is None:
+            self._inicio = agora
+        self.t = agora - self._inicio
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+def abrir_fonte(fonte, tempo_real=True):
+    """Fonte de frames para um índice de câmera, vídeo ou pasta de imagens.
+
+    Gravações de landmarks não têm frames: use GravacaoLandmarks (e_gravacao(fonte)).
+    """
+    fonte = interpretar_fonte(fonte)
+    if isinstance(fonte, int):
+        return FonteCamera(fonte)
+    if e_gravacao(fonte):
+        raise ValueError(f"{fonte} é uma gravação de landmarks, não uma fonte de frames")
+    if os.path.isdir(fonte):
+        return FontePasta(fonte, tempo_real=tempo_real)
+    return FonteVideo(fonte, tempo_real=tempo_real)
+
+# ===============================
+# Gravação de landmarks
+# ===============================
+class GravadorLandmarks:
+    """Grava as mãos de cada frame (inclusive frames sem mão) num arquivo binário.
+
+    O cabeçalho é escrito no primeiro frame, quando o tamanho do frame é conhecido.
+    Pode ser chamado da thread de inferência enquanto outra fecha o arquivo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.registros = 0
+        self._arquivo = open(caminho, "wb")
+        self._t0 = None
+        self._trava = threading.Lock()
+
+    def gravar(self, t, maos, tamanho=(0, 0)):
+        """t em segundos (qualquer relógio); maos: [(lado, 21 coords)]; tamanho: (largura, altura)."""
+        with self._trava:
+            if self._arquivo is None:
+                return
+            if self._t0 is None:
+                self._t0 = t
+                self._arquivo.write(CABECALHO.pack(MAGICA, VERSAO, *tamanho))
+            partes = [REGISTRO.pack(t - self._t0, len(maos))]
+            for lado, coords in maos:
+                partes.append(LADO.pack(CODIGOS_LADO.get(lado, 0)))
+                partes.append(np.asarray(coords, dtype="<f4").reshape(DIM).tobytes())
+            self._arquivo.write(b"".join(partes))
+            self.registros += 1
+
+    def fechar(self):
+        with self._trava:
+            if self._arquivo is None:
+                return
+            if self._t0 is None:
+                # nenhum frame: ainda assim um arquivo válido (e vazio)
+                self._arquivo.write(CABECALHO.pack(MAGICA, VERSAO, 0, 0))
+            self._arquivo.close()
+            self._arquivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+class GravacaoLandmarks:
+    """Uma gravação lida inteira: tamanho (largura, altura) e registros [(t, maos)].
+
+    As coordenadas voltam como listas de floats, como as de maos_do_resultado.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            dados = f.read()
+        if len(dados) < CABECALHO.size:
+            raise ValueError(f"{caminho}: gravação vazia ou cortada")
+        magica, versao, larg, alt = CABECALHO.unpack_from(dados, 0)
+        if magica != MAGICA or versao != VERSAO:
+            raise ValueError(f"{caminho}: não é uma gravação de landmarks (versão {VERSAO})")
+        self.tamanho = (larg, alt)
+        self.registros = []
+        pos = CABECALHO.size
+        while pos + REGISTRO.size <= len(dados):
+            t, n = REGISTRO.unpack_from(dados, pos)
+            fim = pos + REGISTRO.size + n * BYTES_MAO
+            if fim > len(dados):
+                break           # último registro cortado (programa encerrado no meio da escrita)
+            pos += REGISTRO.size
+            maos = []
+            for _ in range(n):
+                (codigo,) = LADO.unpack_from(dados, pos)
+                coords = np.frombuffer(dados, dtype="<f4", count=DIM, offset=pos + LADO.size)
+                maos.append((LADOS_CODIGO.get(codigo), coords.reshape(NUM_PONTOS, 3).tolist()))
+                pos += BYTES_MAO
+            self.registros.append((t, maos))
+
+    def __len__(self):
+        return len(self.registros)
+
+    def __iter__(self):
+        return iter(self.registros)
+
+    def duracao(self):
+        return self.registros[-1][0] if self.registros else 0.0
+
+# ===============================
+# Gravar e reproduzir sem janela
+# ===============================
+def gravar(fonte, caminho, segundos=None, opcoes_hands=None, opcoes_rastreio=None):
+    """Roda o MediaPipe numa fonte (vídeo e pasta na velocidade máxima) e grava as mãos."""
+    import mediapipe as mp
+    from rastreio_mao import RastreadorMao, maos_do_resultado
+    from servico_visao import OPCOES_HANDS, OPCOES_RASTREIO
+
+    cap = abrir_fonte(fonte, tempo_real=False)
+    if not cap.isOpened():
+        cap.release()
+        raise OSError(f"não foi possível abrir a fonte {fonte}")
+    hands = mp.solutions.hands.Hands(**(opcoes_hands or OPCOES_HANDS))
+    detector = RastreadorMao(hands, **(opcoes_rastreio or OPCOES_RASTREIO))
+    espelhado = rgb = None
+    falhas = 0
+    try:
+        with GravadorLandmarks(caminho) as gravador:
+            while segundos is None or cap.t < segundos:
+                ret, frame = cap.read()
+                if not ret:
+                    if not isinstance(cap, FonteCamera):
+                        break
+                    # câmera: uma falha solta acontece; muitas seguidas, ela foi desconectada
+                    falhas += 1
+                    if falhas >= MAX_FALHAS_CAMERA:
+                        print(f"A câmera {fonte} parou de enviar frames; gravação encerrada.", file=sys.stderr)
+                        break
+                    time.sleep(ESPERA_FALHA_CAMERA)
+                    continue
+                falhas = 0
+                # espelhado como na câmera ao vivo, igual aos templates salvos
+                if espelhado is None or espelhado.shape != frame.shape:
+                    espelhado, rgb = np.empty_like(frame), np.empty_like(frame)
+                cv2.flip(frame, 1, dst=espelhado)
+                cv2.cvtColor(espelhado, cv2.COLOR_BGR2RGB, dst=rgb)
+                maos = maos_do_resultado(detector.processar(rgb, rgb=True))
+                gravador.gravar(cap.t, maos, (frame.shape[1], frame.shape[0]))
+            return gravador.registros
+    finally:
+        cap.release()
+        hands.close()
+
+def reproduzir(gravacao, tradutor, tempo_real=False):
+    """Passa cada registro pelo tradutor (como a janela de tradução); gera (t, maos, gesto, frase).
+
+    Frames sem mão não chegam ao tradutor, do mesmo jeito que no pipeline ao vivo.
+    """
+    ritmo = Ritmo(tempo_real)
+    for t, maos in gravacao:
+        ritmo.esperar(t)
+        if not maos:
+            yield t, maos, SEM_GESTO, None
+            continue
+        gesto, frase = tradutor.processar(maos, t)
+        yield t, maos, gesto, frase
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava landmarks de uma fonte ou reproduz uma gravação.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    p_gravar = comandos.add_parser("gravar", help="fonte (câmera, vídeo ou pasta) -> arquivo .lmk")
+    p_gravar.add_argument("fonte", help="índice de câmera, arquivo de vídeo ou pasta de imagens")
+    p_gravar.add_argument("saida", help="arquivo .lmk")
+    p_gravar.add_argument("--segundos", type=float, default=None, help="para depois de tantos segundos da fonte")
+    p_reproduzir = comandos.add_parser("reproduzir", help="gestos e frases de um arquivo .lmk, sem MediaPipe")
+    p_reproduzir.add_argument("gravacao")
+    p_reproduzir.add_argument("-o", "--saida", help="arquivo JSONL de saída (padrão: stdout)")
+    p_reproduzir.add_argument("--tempo-real", action="store_true", help="no ritmo gravado em vez da velocidade máxima")
+    args = parser.parse_args(argv)
+
+    if args.comando == "gravar":
+        try:
+            registros = gravar(interpretar_fonte(args.fonte), args.saida, args.segundos)
+        except OSError as erro:
+            parser.error(str(erro))
+        print(f"{registros} frames gravados em {args.saida}", file=sys.stderr)
+        return
+
+    from traducao import TradutorFluxo
+
+    gravacao = GravacaoLandmarks(args.gravacao)
+    tradutor = TradutorFluxo()
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    t0 = time.perf_counter()
+    frase_anterior = ""
+    try:
+        for t, maos, gesto, frase in reproduzir(gravacao, tradutor, args.tempo_real):
+            saida.write(json.dumps({"tipo": "gesto", "t": round(t, 3), "maos": len(maos), "gesto": gesto},
+                                   ensure_ascii=False) + "\n")
+            if frase and frase != frase_anterior:
+                saida.write(json.dumps({"tipo": "frase", "t": round(t, 3), "frase": frase},
+                                       ensure_ascii=False) + "\n")
+            if frase is not None:
+                frase_anterior = frase
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    total = time.perf_counter() - t0
+    print(f"{len(gravacao)} frames ({gravacao.duracao():.1f} s gravados) em {total:.2f} s "
+          f"({len(gravacao) / total if total else 0:.0f} frames/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+from collections import deque
+
+from reconhecedor import SEM_GESTO
+
+# ===============================
+# Arquivo de frases
+# ===============================
+ARQUIVO_FRASES = "frases_salvas.json"
+
+def carregar_frases(arquivo=ARQUIVO_FRASES):
+    if os.path.exists(arquivo):
+        try:
+            with open(arquivo, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            return {"frases": []}
+    return {"frases": []}
+
+def salvar_frases(frases, arquivo=ARQUIVO_FRASES):
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump(frases, f, ensure_ascii=False, indent=4)
+
+# ===============================
+# Autômato de frases (Aho-Corasick sobre gestos)
+# ===============================
+POLITICA_FRASES = "mais_longa"     # ou "ordem": a primeira cadastrada vence
+HISTORICO_MINIMO = 10
+
+class _Tabelas:
+    """Trie, ligações de falha e saídas de um AutomatoFrases.
+
+    Depois de publicadas no autômato nunca mudam: uma frase nova é inserida numa
+    cópia. Os estados só são acrescentados, então um estado de uma tabela antiga
+    continua valendo (e quer dizer a mesma sequência) nas mais novas.
+    """
+
+    def __init__(self):
+        self.frases = []
+        self.maior = 0
+        self.filhos = [{}]
+        self.falha = [0]
+        self.termina = [[]]      # frases que terminam exatamente neste estado
+        self.saida = [[]]        # todas as frases reconhecidas neste estado, já ordenadas
+
+    def copia(self):
+        nova = _Tabelas()
+        nova.frases = list(self.frases)
+        nova.maior = self.maior
+        nova.filhos = [dict(filhos) for filhos in self.filhos]
+        nova.falha = list(self.falha)
+        nova.termina = [list(t) for t in self.termina]
+        nova.saida = list(self.saida)
+        return nova
+
+    def inserir(self, nome, sequencia):
+        if not sequencia:
+            return
+        estado = 0
+        for gesto in sequencia:
+            proximo = self.filhos[estado].get(gesto)
+            if proximo is None:
+                proximo = len(self.filhos)
+                self.filhos.append({})
+                self.falha.append(0)
+                self.termina.append([])
+                self.saida.append([])
+                self.filhos[estado][gesto] = proximo
+            estado = proximo
+        self.termina[estado].append(len(self.frases))
+        self.frases.append((nome, list(sequencia)))
+        self.maior = max(self.maior, len(sequencia))
+
+    def avancar(self, estado, gesto):
+        while estado and gesto not in self.filhos[estado]:
+            estado = self.falha[estado]
+        return self.filhos[estado].get(gesto, 0)
+
+class AutomatoFrases:
+    """Trie das sequências de gestos com ligações de falha (Aho-Corasick).
+
+    Cada estado corresponde ao maior sufixo dos gestos recentes que ainda é início
+    de alguma frase, então basta avançar um estado por gesto novo em vez de comparar
+    o histórico com todas as frases. Quando várias frases terminam no mesmo gesto, a
+    política decide a ordem: "mais_longa" (a sequência mais específica vence, empate
+    pela ordem de cadastro) ou "ordem" (a primeira cadastrada vence).
+
+    adicionar() roda no Tk enquanto avancar()/frases_em() rodam na thread de
+    inferência: as tabelas novas são montadas à parte e trocadas numa atribuição
+    só, então quem lê vê a trie antiga ou a nova, nunca uma pela metade.
+    """
+
+    def __init__(self, frases_salvas=None, politica=POLITICA_FRASES):
+        self.politica = politica
+        self.versao = 0
+        self._trava = threading.Lock()     # só entre quem acrescenta frases
+        tabelas = _Tabelas()
+        for f in (frases_salvas or {}).get("frases", []):
+            tabelas.inserir(f["nome"], f["sequencia"])
+        self._ligar(tabelas)
+        self._tabelas = tabelas
+
+    @property
+    def frases(self):
+        return self._tabelas.frases
+
+    @property
+    def maior(self):
+        return self._tabelas.maior
+
+    def adicionar(self, nome, sequencia):
+        """Acrescenta uma frase sem recriar a trie a partir do arquivo.
+
+        Os estados novos entram numa cópia da trie, mas as ligações de falha e as
+        saídas são recalculadas para a trie inteira (BFS): estados antigos podem
+        passar a ter como sufixo um estado novo. Custa O(tamanho da trie), o que
+        com algumas centenas de frases é bem menos que um frame.
+        """
+        with self._trava:
+            tabelas = self._tabelas.copia()
+            tabelas.inserir(nome, sequencia)
+            self._ligar(tabelas)
+            self._tabelas = tabelas
+            self.versao += 1
+
+    def _ligar(self, t):
+        # BFS: a falha de um estado é o maior sufixo próprio dele que também está na trie
+        fila = deque()
+        for filho in t.filhos[0].values():
+            t.falha[filho] = 0
+            fila.append(filho)
+        t.saida[0] = []
+        while fila:
+            estado = fila.popleft()
+            t.saida[estado] = self._ordenar(t, t.termina[estado] + t.saida[t.falha[estado]])
+            for gesto, filho in t.filhos[estado].items():
+                t.falha[filho] = t.avancar(t.falha[estado], gesto)
+                fila.append(filho)
+
+    def _ordenar(self, t, indices):
+        if self.politica == "mais_longa":
+            return sorted(indices, key=lambda i: (-len(t.frases[i][1]), i))
+        return sorted(indices)
+
+    def avancar(self, estado, gesto):
+        return self._tabelas.avancar(estado, gesto)
+
+    def frases_em(self, estado):
+        """Nomes de todas as frases que terminam no estado, na ordem da política."""
+        t = self._tabelas
+        return [t.frases[i][0] for i in t.saida[estado]]
+
+# ===============================
+# Detecção de frases
+# ===============================
+class HistoricoFrases:
+    """Gestos recentes (sem repetições seguidas) e a frase que eles formam.
+
+    Aceita o dicionário de frases_salvas.json ou um AutomatoFrases compartilhado; neste
+    caso, frases cadastradas depois passam a valer sem recriar o histórico.
+    """
+
+    def __init__(self, frases, politica=POLITICA_FRASES):
+        if not isinstance(frases, AutomatoFrases):
+            frases = AutomatoFrases(frases, politica)
+        self.automato = frases
+        self.estado = 0
+        self.frases_atuais = []
+        self.gestos_recentes = deque(maxlen=self._tamanho())
+        self._versao = self.automato.versao
+
+    def _tamanho(self):
+        # só é preciso lembrar tantos gestos quanto a maior frase
+        return max(self.automato.maior, HISTORICO_MINIMO)
+
+    def _sincronizar(self):
+        """Refaz o estado com os gestos recentes depois que uma frase foi cadastrada."""
+        self.gestos_recentes = deque(self.gestos_recentes, maxlen=self._tamanho())
+        self.estado = 0
+        for gesto in self.gestos_recentes:
+            self.estado = self.automato.avancar(self.estado, gesto)
+        self.frases_atuais = self.automato.frases_em(self.estado)
+        self._versao = self.automato.versao
+
+    def trocar_automato(self, automato):
+        """Passa a usar outro autômato (ex.: frases recarregadas do arquivo), mantendo os gestos recentes."""
+        self.automato = automato
+        self._sincronizar()
+
+    def atualizar(self, gesto_atual):
+        """Registra o gesto do frame e retorna o nome da frase reconhecida (ou "")."""
+        if self._versao != self.automato.versao:
+            self._sincronizar()
+        if gesto_atual != SEM_GESTO:
+            if len(self.gestos_recentes) == 0 or self.gestos_recentes[-1] != gesto_atual:
+                self.gestos_recentes.append(gesto_atual)
+                # o autômato só anda quando chega um gesto novo
+                self.estado = self.automato.avancar(self.estado, gesto_atual)
+                self.frases_atuais = self.automato.frases_em(self.estado)
+        return self.frases_atuais[0] if self.frases_atuais else ""
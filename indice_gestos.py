@@ -0,0 +1,284 @@
+import math
+import time
+
+import numpy as np
+
+from reconhecedor import (ReconhecedorGestos, Resultado, normalizar_array, distancias_medias,
+                          distancias_medias_lote, nome_gesto, NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO)
+
+# ===============================
+# Constantes
+# ===============================
+DIM = NUM_PONTOS * 3
+TAMANHO_CLUSTER = 128       # tamanho alvo de cada lista do índice
+ITERACOES_KMEANS = 8
+
+# ===============================
+# K-means
+# ===============================
+def _kmeans(vetores, k, rng):
+    centros = vetores[rng.choice(len(vetores), size=k, replace=False)].copy()
+    for _ in range(ITERACOES_KMEANS):
+        rotulos = _mais_proximo_l2(vetores, centros)
+        for j in range(k):
+            membros = vetores[rotulos == j]
+            if len(membros):
+                centros[j] = membros.mean(axis=0)
+    return centros, _mais_proximo_l2(vetores, centros)
+
+def _mais_proximo_l2(vetores, centros):
+    d2 = (vetores**2).sum(axis=1)[:, None] - 2 * vetores @ centros.T + (centros**2).sum(axis=1)[None, :]
+    return np.argmin(d2, axis=1)
+
+def _distancias_pares(vetores, consultas, ids, linhas):
+    """distancias_medias de cada par (consultas[linhas[p]], vetores[ids[p]]), num passe só."""
+    diff = vetores[ids] - consultas[linhas]
+    diff *= diff
+    s = diff[:, 0::3] + diff[:, 1::3]
+    s += diff[:, 2::3]
+    np.sqrt(s, out=s)
+    return s.mean(axis=1)
+
+def _kesimo_por_linha(linhas, d, b, k, limite):
+    """Corte de cada uma das b consultas: a k-ésima menor distância dela em d (ou limite)."""
+    corte = np.full(b, float(limite))
+    ordem = np.lexsort((d, linhas))
+    linhas, d = linhas[ordem], d[ordem]
+    inicio = np.searchsorted(linhas, np.arange(b))
+    tem = np.bincount(linhas, minlength=b) >= k
+    corte[tem] = np.minimum(corte[tem], d[inicio[tem] + k - 1])
+    return corte
+
+# ===============================
+# Índice de vizinho mais próximo
+# ===============================
+class IndiceGestos(ReconhecedorGestos):
+    """Índice por listas (quantização grosseira) sobre os vetores normalizados de 63 dimensões.
+
+    Cada template pertence à lista do centro mais próximo e guarda a distância até
+    ele. Pela desigualdade triangular |d(x, c) - d(q, c)| <= d(q, x), então um
+    template só é comparado de fato se esse limite inferior não passar do melhor
+    valor já encontrado (nem do limiar, já que acima dele o resultado seria "---").
+    Com nprobe=None a busca é exata; com nprobe=n só os templates das n listas
+    mais próximas são considerados (busca aproximada).
+    """
+
+    def __init__(self, gestos=None, limiar=LIMIAR_RECONHECIMENTO, nprobe=None, seed=0):
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        super().__init__(gestos, limiar)
+
+    def _definir(self, nomes, templates):
+        super()._definir(nomes, templates)
+        self._construir()
+
+    def _construir(self):
+        vetores = self.templates.reshape(-1, DIM)
+        n = len(vetores)
+        k = max(1, math.ceil(n / TAMANHO_CLUSTER))
+        if n == 0:
+            self._centros = np.empty((0, DIM))
+            rotulos = np.empty(0, dtype=np.int64)
+        elif k == 1:
+            self._centros = vetores.mean(axis=0, keepdims=True)
+            rotulos = np.zeros(n, dtype=np.int64)
+        else:
+            self._centros, rotulos = _kmeans(vetores, k, self._rng)
+        self._lista = rotulos.astype(np.int64)
+        self._dist_centro = np.empty(n)
+        for j in range(len(self._centros)):
+            membros = self._lista == j
+            self._dist_centro[membros] = distancias_medias(vetores[membros], self._centros[j])
+
+    def adicionar(self, nome, coords_normalizadas):
+        """Insere (ou substitui) um gesto só na lista mais próxima, sem reconstruir o índice."""
+        with self._trava:
+            i = super().adicionar(nome, coords_normalizadas)
+            v = self.templates[i].reshape(DIM)
+            if len(self._centros) == 0:
+                self._centros = v[None, :].copy()
+            dc = distancias_medias(self._centros, v)
+            j = int(np.argmin(dc))
+            if i == len(self._lista):
+                self._lista = np.append(self._lista, j)
+                self._dist_centro = np.append(self._dist_centro, dc[j])
+            else:
+                self._lista[i] = j
+                self._dist_centro[i] = dc[j]
+            if np.count_nonzero(self._lista == j) > 2 * TAMANHO_CLUSTER:
+                self._dividir(j)
+            return i
+
+    def _dividir(self, j):
+        """Divide uma lista que cresceu demais em duas (2-means local)."""
+        ids = np.flatnonzero(self._lista == j)
+        vetores = self.templates.reshape(-1, DIM)[ids]
+        centros, rotulos = _kmeans(vetores, 2, self._rng)
+        if rotulos.min() == rotulos.max():
+            return
+        novo = len(self._centros)
+        self._centros[j] = centros[0]
+        self._centros = np.vstack([self._centros, centros[1]])
+        for rotulo, lista in ((0, j), (1, novo)):
+            membros = ids[rotulos == rotulo]
+            self._lista[membros] = lista
+            self._dist_centro[membros] = distancias_medias(vetores[rotulos == rotulo], self._centros[lista])
+
+    def reconhecer_normalizado(self, atual_norm, k=1):
+        with self._trava:
+            if len(self.nomes) == 0:
+                return Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+            ids, dist = self.buscar(np.asarray(atual_norm, dtype=np.float64).reshape(DIM), k)
+            return self._resultado_busca(ids, dist)
+
+    def _resultado_busca(self, ids, dist):
+        top_k = [(self.nomes[i], float(d)) for i, d in zip(ids, dist)]
+        if not top_k:
+            return Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        melhor_val = top_k[0][1]
+        margem = top_k[1][1] - melhor_val if len(top_k) > 1 else float("inf")
+        nome = nome_gesto(top_k[0][0]) if melhor_val <= self.limiar else SEM_GESTO
+        return Resultado(nome, melhor_val, top_k, margem, self.limiar - melhor_val)
+
+    def reconhecer_lote(self, lista_coords, k=1):
+        """Como ReconhecedorGestos.reconhecer_lote: todas as mãos numa busca podada só (buscar_lote)."""
+        vazio = Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        resultados = [vazio] * len(lista_coords)
+        validas = [i for i, c in enumerate(lista_coords) if c is not None and len(c) == NUM_PONTOS]
+        if not validas:
+            return resultados
+        consultas = np.stack([normalizar_array(lista_coords[i]).reshape(DIM) for i in validas])
+        with self._trava:
+            if len(self.nomes) == 0:
+                return resultados
+            for i, (ids, dist) in zip(validas, self.buscar_lote(consultas, k)):
+                resultados[i] = self._resultado_busca(ids, dist)
+        return resultados
+
+    def buscar(self, q, k=1, limite=None):
+        """Retorna (ids, distâncias) dos k mais próximos com distância <= limite.
+
+        limite=None usa o limiar de reconhecimento; use float("inf") para busca sem corte.
+        """
+        limite = self.limiar if limite is None else limite
+        vetores = self.templates.reshape(-1, DIM)
+        if len(self._centros) <= 1:
+            # banco pequeno: a força bruta vetorizada já é o caminho mais rápido
+            d = distancias_medias(vetores, q)
+            ids = np.flatnonzero(d <= limite)
+            sel = np.lexsort((ids, d[ids]))[:k]
+            return ids[sel].tolist(), d[ids[sel]]
+
+        dq = distancias_medias(self._centros, q)
+        inferior = np.abs(self._dist_centro - dq[self._lista])
+        if self.nprobe is not None and self.nprobe < len(self._centros):
+            fora = np.ones(len(self._centros), dtype=bool)
+            fora[np.argpartition(dq, self.nprobe - 1)[:self.nprobe]] = False
+            inferior[fora[self._lista]] = np.inf
+
+        # primeiro a lista mais próxima, para achar um corte apertado,
+        # depois só o que ainda pode vencer esse corte
+        primeiros = np.flatnonzero((self._lista == int(np.argmin(dq))) & (inferior <= limite))
+        ids = primeiros
+        d = distancias_medias(vetores[primeiros], q)
+        corte = limite
+        if len(d) >= k:
+            corte = min(limite, float(np.partition(d, k - 1)[k - 1]))
+
+        inferior[primeiros] = np.inf
+        resto = np.flatnonzero(inferior <= corte)
+        if len(resto):
+            ids = np.concatenate([ids, resto])
+            d = np.concatenate([d, distancias_medias(vetores[resto], q)])
+
+        dentro = d <= limite
+        ids, d = ids[dentro], d[dentro]
+        sel = np.lexsort((ids, d))[:k]
+        return ids[sel].tolist(), d[sel]
+
+    def buscar_lote(self, consultas, k=1, limite=None):
+        """buscar() para várias consultas (B, 63) de uma vez; retorna [(ids, distâncias)] na mesma ordem.
+
+        As mesmas etapas de buscar(), mas cada uma para todas as consultas juntas:
+        as distâncias aos centros numa matriz só, e os pares (consulta, template)
+        que sobram da poda de cada etapa calculados num único passe vetorizado.
+        """
+        limite = self.limiar if limite is None else limite
+        vetores = self.templates.reshape(-1, DIM)
+        b, n = len(consultas), len(vetores)
+        if len(self._centros) <= 1:
+            todas = distancias_medias_lote(vetores, consultas)
+            linhas, ids = np.nonzero(todas <= limite)
+            d = todas[linhas, ids]
+        else:
+            dq = distancias_medias_lote(self._centros, consultas)
+            inferior = np.abs(self._dist_centro[None, :] - dq[:, self._lista])
+            if self.nprobe is not None and self.nprobe < len(self._centros):
+                fora = np.ones(dq.shape, dtype=bool)
+                np.put_along_axis(fora, np.argpartition(dq, self.nprobe - 1, axis=1)[:, :self.nprobe], False, axis=1)
+                inferior[fora[:, self._lista]] = np.inf
+
+            # primeiro a lista mais próxima de cada consulta, para achar os cortes
+            primeiros = (self._lista[None, :] == np.argmin(dq, axis=1)[:, None]) & (inferior <= limite)
+            linhas, ids = np.nonzero(primeiros)
+            d = _distancias_pares(vetores, consultas, ids, linhas)
+            corte = _kesimo_por_linha(linhas, d, b, k, limite)
+            inferior[primeiros] = np.inf
+            linhas2, ids2 = np.nonzero(inferior <= corte[:, None])
+            if len(ids2):
+                linhas = np.concatenate([linhas, linhas2])
+                ids = np.concatenate([ids, ids2])
+                d = np.concatenate([d, _distancias_pares(vetores, consultas, ids2, linhas2)])
+
+        dentro = d <= limite
+        linhas, ids, d = linhas[dentro], ids[dentro], d[dentro]
+        # por consulta, a menor distância primeiro (empate: menor id), e só os k primeiros
+        ordem = np.lexsort((ids, d, linhas))
+        linhas, ids, d = linhas[ordem], ids[ordem], d[ordem]
+        limites = np.searchsorted(linhas, np.arange(b + 1))
+        return [(ids[i:min(i + k, j)].tolist(), d[i:min(i + k, j)]) for i, j in zip(limites[:-1], limites[1:])]
+
+    def medir_recall(self, consultas, k=1):
+        """Compara a busca do índice com a busca exata (força bruta) nas consultas dadas.
+
+        consultas: landmarks crus (Q, 21, 3). Recall é a fração dos k vizinhos exatos
+        (dentro do limiar) que o índice também devolveu.
+        """
+        acertos = total = 0
+        t_indice = t_exato = 0.0
+        for coords in consultas:
+            q = normalizar_array(coords).reshape(DIM)
+            t0 = time.perf_counter()
+            ids, _ = self.buscar(q, k)
+            t1 = time.perf_counter()
+            d = self.distancias(q)
+            exatos = [i for i in np.argsort(d, kind="stable")[:k] if d[i] <= self.limiar]
+            t2 = time.perf_counter()
+            acertos += len(set(exatos) & set(ids))
+            total += len(exatos)
+            t_indice += t1 - t0
+            t_exato += t2 - t1
+        n = max(len(consultas), 1)
+        return {
+            "recall": acertos / total if total else 1.0,
+            "consultas": len(consultas),
+            "listas": len(self._centros),
+            "ms_indice": 1000 * t_indice / n,
+            "ms_exato": 1000 * t_exato / n,
+        }
+
+# ===============================
+# Ajuste do nprobe
+# ===============================
+if __name__ == "__main__":
+    import json
+    import sys
+
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else "gestos_salvos.json"
+    with open(arquivo, "r", encoding="utf-8") as f:
+        indice = IndiceGestos(json.load(f))
+    rng = np.random.default_rng(0)
+    consultas = indice.templates[rng.integers(len(indice), size=500)] + rng.normal(0, 0.05, (500, NUM_PONTOS, 3))
+    for nprobe in (None, 1, 2, 4, 8, 16):
+        indice.nprobe = nprobe
+        print(f"nprobe={nprobe}: {indice.medir_recall(consultas)}")
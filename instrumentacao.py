@@ -0,0 +1,143 @@
+"""Medição por etapa do caminho de cada frame (captura, MediaPipe, desenho, Tk...).
+
+Desligada por padrão. Liga com a variável de ambiente LIBRAS_PERF=1 ou com
+a opção --perf na linha de comando (python main.py --perf). O rastro é salvo
+em LIBRAS_PERF_DIR (padrão: pasta atual) quando a janela da câmera fecha, só
+com os eventos desde a exportação anterior.
+"""
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+ATIVO = os.environ.get("LIBRAS_PERF", "") not in ("", "0") or "--perf" in sys.argv
+PASTA_RASTRO = os.environ.get("LIBRAS_PERF_DIR", ".")
+JANELA_PERCENTIS = 300      # amostras por etapa usadas nos percentis
+MAX_EVENTOS = 200000        # eventos guardados para o rastro exportado
+
+# ===============================
+# Um frame
+# ===============================
+class Quadro:
+    """Tempos das etapas de um frame. etapa(nome) fecha o intervalo desde a marca anterior."""
+    __slots__ = ("seq", "t0", "_ultimo", "etapas")
+
+    def __init__(self, seq):
+        self.seq = seq
+        self.t0 = self._ultimo = time.perf_counter_ns()
+        self.etapas = {}
+
+    def etapa(self, nome):
+        agora = time.perf_counter_ns()
+        # etapas repetidas no mesmo frame (ex.: ROI e depois frame inteiro) somam
+        self.etapas[nome] = self.etapas.get(nome, 0) + agora - self._ultimo
+        self._ultimo = agora
+
+class _QuadroNulo:
+    __slots__ = ()
+    seq = 0
+
+    def etapa(self, nome):
+        pass
+
+QUADRO_NULO = _QuadroNulo()
+
+# ===============================
+# Coletor
+# ===============================
+class Instrumentacao:
+    """Guarda janelas móveis por etapa (para percentis) e o rastro completo para exportar."""
+
+    def __init__(self, ativo=ATIVO, janela=JANELA_PERCENTIS, max_eventos=MAX_EVENTOS):
+        self.ativo = ativo
+        self._tamanho_janela = janela
+        self._janelas = {}
+        self._eventos = deque(maxlen=max_eventos)
+        self._trava = threading.Lock()
+        self._inicio = time.perf_counter()
+
+    def quadro(self, seq):
+        return Quadro(seq) if self.ativo else QUADRO_NULO
+
+    def registrar(self, quadro):
+        """Grava as etapas de um Quadro e o total do frame."""
+        if quadro is QUADRO_NULO:
+            return
+        for nome, ns in quadro.etapas.items():
+            self.amostra(nome, ns / 1e6, quadro.seq)
+        self.amostra("pipeline_total", (time.perf_counter_ns() - quadro.t0) / 1e6, quadro.seq)
+
+    def amostra(self, etapa, ms, frame=None):
+        if not self.ativo:
+            return
+        with self._trava:
+            janela = self._janelas.get(etapa)
+            if janela is None:
+                janela = self._janelas[etapa] = deque(maxlen=self._tamanho_janela)
+            janela.append(ms)
+            self._eventos.append((time.perf_counter() - self._inicio, frame, etapa, ms))
+
+    def percentis(self, etapa, ps=(50, 95, 99)):
+        with self._trava:
+            valores = sorted(self._janelas.get(etapa, ()))
+        if not valores:
+            return [0.0 for _ in ps]
+        return [valores[min(len(valores) - 1, int(len(valores) * p / 100))] for p in ps]
+
+    def resumo(self):
+        with self._trava:
+            etapas = list(self._janelas)
+        resumo = {}
+        for etapa in etapas:
+            p50, p95, p99 = self.percentis(etapa)
+            resumo[etapa] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        return resumo
+
+    def texto_overlay(self, fps=None):
+        """Texto curto para a janela da câmera: FPS, latência e as etapas mais caras."""
+        linhas = []
+        lat50, lat95, _ = self.percentis("latencia_total")
+        if fps is not None:
+            linhas.append(f"{fps:.1f} FPS | latência p50 {lat50:.0f} ms p95 {lat95:.0f} ms")
+        resumo = self.resumo()
+        resumo.pop("latencia_total", None)
+        caras = sorted(resumo.items(), key=lambda e: -e[1]["p50_ms"])[:5]
+        linhas += [f"{nome}: p50 {r['p50_ms']:.1f} p95 {r['p95_ms']:.1f} ms" for nome, r in caras]
+        return "\n".join(linhas)
+
+    def exportar(self, pasta=PASTA_RASTRO):
+        """Salva rastro_<data>.csv (um evento por linha) e rastro_<data>.json (resumo). Retorna os caminhos.
+
+        Cada exportação leva só os eventos desde a anterior (cada janela que
+        fecha grava o seu trecho) e esvazia o rastro; sem eventos novos, não
+        grava nada.
+        """
+        if not self.ativo:
+            return []
+        with self._trava:
+            eventos = list(self._eventos)
+            self._eventos.clear()
+        if not eventos:
+            return []
+        base = os.path.join(pasta, time.strftime("rastro_%Y%m%d_%H%M%S"))
+        # duas janelas fechadas no mesmo segundo não sobrescrevem uma à outra
+        n = 1
+        while os.path.exists(base + ".csv"):
+            n += 1
+            base = os.path.join(pasta, time.strftime("rastro_%Y%m%d_%H%M%S") + f"_{n}")
+        with open(base + ".csv", "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["t_s", "frame", "etapa", "ms"])
+            for t, frame, etapa, ms in eventos:
+                escritor.writerow([f"{t:.6f}", "" if frame is None else frame, etapa, f"{ms:.4f}"])
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"eventos": len(eventos), "etapas": self.resumo()}, f, ensure_ascii=False, indent=4)
+        return [base + ".csv", base + ".json"]
+
+_instrumentacao = Instrumentacao()
+
+def obter_instrumentacao():
+    return _instrumentacao
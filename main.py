@@ -1,17 +1,20 @@
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from PIL import Image, ImageTk
-import json
 import os
-from traducao import abrir_camera_traducao, abrir_camera_salvar_gesto, cadastrar_frases
+import sqlite3
+import threading
+from usuarios import BancoUsuarios, migrar_se_preciso
+from cache_imagens import CacheImagens, itens_alfabeto, TAMANHO_LETRA, TAMANHO_FRASE, PASTA_LETRAS, PASTA_FRASES
 
 # AVISO: estou utilizando python 3.11 pois o mediapipe não funciona em versões mais recentes.
 
 # ------------------------------
 # Configurações e constantes
 # ------------------------------
-BAU_PATH = "bau_de_valores.json"
+BAU_PATH = "bau_de_valores.json"      # formato antigo, migrado para o banco na primeira execução
+BANCO_USUARIOS = "usuarios.db"
+ERRO_BANCO = "Não foi possível acessar o banco de usuários. Tente novamente."
 
 BG_COLOR = "#cfe9ff"          # azul claro
 FRAME_COLOR = "#e6f2ff"       # azul bem suave
@@ -21,21 +24,100 @@ BTN_TEXT = "#0a1a3a"          # azul escuro para texto
 TITLE_FONT = ("Segoe UI", 16, "bold")
 FONT = ("Segoe UI", 12)
 
+# Lista de frases e seus arquivos
+FRASES_SIMPLES = [
+    ("Oi, tudo bem?", "oi_tudo_bem.png"),
+    ("Eu sou surdo.", "eu_sou_surdo.png"),
+    ("Meu nome é.", "meu_nome_e.png"),
+    ("Qual seu nome?", "qual_seu_nome.png"),
+    ("Hoje estou feliz.", "hoje_eu_feliz.png"),
+    ("Prazer em conhecer você.", "prazer_em_conhecer_voce.png"),
+    ("Bom dia.", "bom_dia.png"),
+    ("Boa tarde.", "boa_tarde.png"),
+    ("Boa noite.", "boa_noite.png"),
+
+]
+
+# imagens já redimensionadas das telas de Alfabeto e Frases Simples
+cache_imagens = CacheImagens()
+
 # ------------------------------
 # Funções de persistência
 # ------------------------------
+banco_usuarios = BancoUsuarios(BANCO_USUARIOS)
+_usuarios_migrados = False
+
+def _migrar_usuarios_se_preciso():
+    global _usuarios_migrados
+    if not _usuarios_migrados:
+        migrar_se_preciso(banco_usuarios, BAU_PATH)
+        _usuarios_migrados = True
+
 def carregar_usuarios():
-    if os.path.exists(BAU_PATH):
+    _migrar_usuarios_se_preciso()
+    try:
+        return banco_usuarios.carregar()
+    except Exception:
+        return {}
+
+def salvar_usuarios(usuarios):
+    banco_usuarios.salvar(usuarios)
+
+def buscar_senha(usuario):
+    """Senha de um usuário (consulta indexada, sem carregar todos)."""
+    _migrar_usuarios_se_preciso()
+    return banco_usuarios.senha(usuario)
+
+def cadastrar_usuario(usuario, senha):
+    """Cadastro atômico: retorna False se o usuário já existir (inclusive em outro quiosque)."""
+    _migrar_usuarios_se_preciso()
+    return banco_usuarios.cadastrar(usuario, senha)
+
+# ------------------------------
+# Visão computacional (carregada sob demanda)
+# ------------------------------
+# traducao importa cv2 e mediapipe, que levam segundos para carregar; por isso só
+# é importado quando uma tela de câmera abre ou, em segundo plano, após o login.
+AQUECER_VISAO = os.environ.get("LIBRAS_AQUECER", "1") != "0"
+# várias câmeras na mesma máquina (ex.: LIBRAS_CAMERAS=0,1,2); com menos de duas o botão não aparece
+CAMERAS = [int(c) if c.isdigit() else c
+           for c in (c.strip() for c in os.environ.get("LIBRAS_CAMERAS", "").split(",")) if c]
+_aquecimento = None
+
+def _modulo_traducao():
+    import traducao
+    return traducao
+
+def aquecer_visao():
+    """Importa a visão, carrega o índice de gestos e o modelo numa thread separada."""
+    global _aquecimento
+    if not AQUECER_VISAO or _aquecimento is not None:
+        return
+
+    def aquecer():
         try:
-            with open(BAU_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
+            traducao = _modulo_traducao()
+            traducao.obter_indice()
+            traducao.obter_servico().aquecer()
         except Exception:
-            return {}
-    return {}
+            # se algo falhar aqui, o erro aparece de novo quando a tela for aberta
+            pass
 
-def salvar_usuarios(usuarios):
-    with open(BAU_PATH, "w", encoding="utf-8") as f:
-        json.dump(usuarios, f, ensure_ascii=False)
+    _aquecimento = threading.Thread(target=aquecer, daemon=True)
+    _aquecimento.start()
+
+def abrir_camera_traducao():
+    _modulo_traducao().abrir_camera_traducao()
+
+def abrir_camera_salvar_gesto():
+    _modulo_traducao().abrir_camera_salvar_gesto()
+
+def cadastrar_frases():
+    _modulo_traducao().cadastrar_frases()
+
+def abrir_multi_camera():
+    import multi_camera
+    multi_camera.abrir_multi_camera(CAMERAS)
 
 # ------------------------------
 # Estilo ttk
@@ -81,11 +163,19 @@ def show_main_menu():
         .pack(pady=8, ipadx=10, ipady=6, fill="x")
     ttk.Button(container, text="Tradução", style="RoundedButton.TButton", command=abrir_camera_traducao)\
         .pack(pady=8, ipadx=10, ipady=6, fill="x")
+    if len(CAMERAS) > 1:
+        ttk.Button(container, text="Tradução – Várias Câmeras", style="RoundedButton.TButton",
+                   command=abrir_multi_camera).pack(pady=8, ipadx=10, ipady=6, fill="x")
     ttk.Button(container, text="Salvar Gestos", style="RoundedButton.TButton", command=abrir_camera_salvar_gesto)\
         .pack(pady=8, ipadx=10, ipady=6, fill="x")
     ttk.Button(container, text="Salvar Frases", style="RoundedButton.TButton", command=cadastrar_frases)\
         .pack(pady=8, ipadx=10, ipady=6, fill="x")
 
+    # carrega as imagens em segundo plano para os cliques serem instantâneos
+    cache_imagens.pre_carregar(
+        itens_alfabeto() + [(os.path.join(PASTA_FRASES, arquivo), TAMANHO_FRASE) for _, arquivo in FRASES_SIMPLES],
+        raiz=app)
+
 
 def mostrar_alfabeto():
     """Tela do alfabeto: botões A-Z que mostram imagens 150x150."""
@@ -106,11 +196,8 @@ def mostrar_alfabeto():
     imagem_label.pack()
 
     def mostrar_imagem(letra):
-        caminho = os.path.join("imagens_libras", f"{letra}.png")
-        if os.path.exists(caminho):
-            imagem = Image.open(caminho)
-            imagem = imagem.resize((150, 150))
-            imagem_tk = ImageTk.PhotoImage(imagem)
+        imagem_tk = cache_imagens.obter(os.path.join(PASTA_LETRAS, f"{letra}.png"), TAMANHO_LETRA)
+        if imagem_tk is not None:
             imagem_label.config(image=imagem_tk, text='')
             imagem_label.image = imagem_tk
         else:
@@ -158,19 +245,7 @@ def mostrar_frases_simples():
     imagem_label = tk.Label(frame_imagem, bg=BG_COLOR)
     imagem_label.pack()
 
-    # Lista de frases e seus arquivos
-    frases = [
-        ("Oi, tudo bem?", "oi_tudo_bem.png"),
-        ("Eu sou surdo.", "eu_sou_surdo.png"),
-        ("Meu nome é.", "meu_nome_e.png"),
-        ("Qual seu nome?", "qual_seu_nome.png"),
-        ("Hoje estou feliz.", "hoje_eu_feliz.png"),
-        ("Prazer em conhecer você.", "prazer_em_conhecer_voce.png"),
-        ("Bom dia.", "bom_dia.png"),
-        ("Boa tarde.", "boa_tarde.png"),
-        ("Boa noite.", "boa_noite.png"),
-
-    ]
+    frases = FRASES_SIMPLES
 
     ultima_imagem = {"arquivo": None}  # guarda arquivo atualmente mostrado (para toggle)
 
@@ -182,11 +257,8 @@ def mostrar_frases_simples():
             ultima_imagem["arquivo"] = None
             return
 
-        caminho = os.path.join("frases_libras", nome_arquivo)
-        if os.path.exists(caminho):
-            imagem = Image.open(caminho)
-            imagem = imagem.resize((955, 245))
-            imagem_tk = ImageTk.PhotoImage(imagem)
+        imagem_tk = cache_imagens.obter(os.path.join(PASTA_FRASES, nome_arquivo), TAMANHO_FRASE)
+        if imagem_tk is not None:
             imagem_label.config(image=imagem_tk, text='')
             imagem_label.image = imagem_tk
             ultima_imagem["arquivo"] = nome_arquivo
@@ -245,9 +317,15 @@ def limpar_janela():
 def login():
     username = entry_user.get().strip()
     password = entry_pass.get().strip()
-    usuarios = carregar_usuarios()
-    if username in usuarios and usuarios[username] == password:
+    try:
+        senha = buscar_senha(username)
+    except sqlite3.Error:
+        # banco travado por outro quiosque além do tempo de espera, arquivo ilegível, ...
+        messagebox.showerror("Login", ERRO_BANCO)
+        return
+    if senha is not None and senha == password:
         show_main_menu()
+        aquecer_visao()
     else:
         messagebox.showerror("Login", "Usuário ou senha incorretos.")
 
@@ -258,14 +336,17 @@ def mostrar_cadastro():
 def cadastrar():
     new_user = entry_new_user.get().strip()
     new_pass = entry_new_pass.get().strip()
-    usuarios = carregar_usuarios()
-    if new_user in usuarios:
-        messagebox.showerror("Cadastro", "Usuário já existe.")
-    elif not new_user or not new_pass:
+    if not new_user or not new_pass:
         messagebox.showerror("Cadastro", "Preencha todos os campos.")
+        return
+    try:
+        novo = cadastrar_usuario(new_user, new_pass)
+    except sqlite3.Error:
+        messagebox.showerror("Cadastro", ERRO_BANCO)
+        return
+    if not novo:
+        messagebox.showerror("Cadastro", "Usuário já existe.")
     else:
-        usuarios[new_user] = new_pass
-        salvar_usuarios(usuarios)
         messagebox.showinfo("Cadastro", "Usuário cadastrado com sucesso!")
         entry_new_user.delete(0, tk.END)
         entry_new_pass.delete(0, tk.END)
@@ -279,44 +360,45 @@ def voltar_login():
 # ------------------------------
 # Inicialização da janela
 # ------------------------------
-app = tk.Tk()
-app.title("Menu de Login")
-# app.state("zoomed")  # opcional: tela inteira. descomente se desejar
-app.configure(bg=BG_COLOR)
-
-aplicar_estilo_ttk()
-
-# Frame de login
-frame_login = tk.Frame(app, bg=FRAME_COLOR, bd=0, relief="flat")
-frame_login.pack(pady=40, padx=30, fill="x")
-
-tk.Label(frame_login, text="Login", font=TITLE_FONT, bg=FRAME_COLOR).pack(pady=(10, 5))
-tk.Label(frame_login, text="Usuário:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
-entry_user = tk.Entry(frame_login, font=FONT, bg=BG_COLOR, relief="flat")
-entry_user.pack(fill="x", padx=10, pady=5)
-tk.Label(frame_login, text="Senha:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
-entry_pass = tk.Entry(frame_login, show="*", font=FONT, bg=BG_COLOR, relief="flat")
-entry_pass.pack(fill="x", padx=10, pady=5)
-
-ttk.Button(frame_login, text="Entrar", style="RoundedButton.TButton", command=login)\
-    .pack(pady=10, padx=10, fill="x")
-ttk.Button(frame_login, text="Não tem um login? Crie um cadastro aqui",
-           style="RoundedButton.TButton", command=mostrar_cadastro).pack(pady=(0, 10), padx=10, fill="x")
-
-# Frame de cadastro (inicialmente oculto)
-frame_cadastro = tk.Frame(app, bg=FRAME_COLOR, bd=0, relief="flat")
-tk.Label(frame_cadastro, text="Cadastro", font=TITLE_FONT, bg=FRAME_COLOR).pack(pady=(10, 5))
-tk.Label(frame_cadastro, text="Novo Usuário:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
-entry_new_user = tk.Entry(frame_cadastro, font=FONT, bg=BG_COLOR, relief="flat")
-entry_new_user.pack(fill="x", padx=10, pady=5)
-tk.Label(frame_cadastro, text="Nova Senha:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
-entry_new_pass = tk.Entry(frame_cadastro, show="*", font=FONT, bg=BG_COLOR, relief="flat")
-entry_new_pass.pack(fill="x", padx=10, pady=5)
-
-ttk.Button(frame_cadastro, text="Cadastrar", style="RoundedButton.TButton", command=cadastrar)\
-    .pack(pady=10, padx=10, fill="x")
-ttk.Button(frame_cadastro, text="Voltar para o login", style="RoundedButton.TButton",
-           command=voltar_login).pack(pady=(0, 10), padx=10, fill="x")
-
-# Inicia a aplicação
-app.mainloop()
+if __name__ == "__main__":
+    app = tk.Tk()
+    app.title("Menu de Login")
+    # app.state("zoomed")  # opcional: tela inteira. descomente se desejar
+    app.configure(bg=BG_COLOR)
+
+    aplicar_estilo_ttk()
+
+    # Frame de login
+    frame_login = tk.Frame(app, bg=FRAME_COLOR, bd=0, relief="flat")
+    frame_login.pack(pady=40, padx=30, fill="x")
+
+    tk.Label(frame_login, text="Login", font=TITLE_FONT, bg=FRAME_COLOR).pack(pady=(10, 5))
+    tk.Label(frame_login, text="Usuário:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
+    entry_user = tk.Entry(frame_login, font=FONT, bg=BG_COLOR, relief="flat")
+    entry_user.pack(fill="x", padx=10, pady=5)
+    tk.Label(frame_login, text="Senha:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
+    entry_pass = tk.Entry(frame_login, show="*", font=FONT, bg=BG_COLOR, relief="flat")
+    entry_pass.pack(fill="x", padx=10, pady=5)
+
+    ttk.Button(frame_login, text="Entrar", style="RoundedButton.TButton", command=login)\
+        .pack(pady=10, padx=10, fill="x")
+    ttk.Button(frame_login, text="Não tem um login? Crie um cadastro aqui",
+               style="RoundedButton.TButton", command=mostrar_cadastro).pack(pady=(0, 10), padx=10, fill="x")
+
+    # Frame de cadastro (inicialmente oculto)
+    frame_cadastro = tk.Frame(app, bg=FRAME_COLOR, bd=0, relief="flat")
+    tk.Label(frame_cadastro, text="Cadastro", font=TITLE_FONT, bg=FRAME_COLOR).pack(pady=(10, 5))
+    tk.Label(frame_cadastro, text="Novo Usuário:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
+    entry_new_user = tk.Entry(frame_cadastro, font=FONT, bg=BG_COLOR, relief="flat")
+    entry_new_user.pack(fill="x", padx=10, pady=5)
+    tk.Label(frame_cadastro, text="Nova Senha:", font=FONT, bg=FRAME_COLOR).pack(anchor="w", padx=10)
+    entry_new_pass = tk.Entry(frame_cadastro, show="*", font=FONT, bg=BG_COLOR, relief="flat")
+    entry_new_pass.pack(fill="x", padx=10, pady=5)
+
+    ttk.Button(frame_cadastro, text="Cadastrar", style="RoundedButton.TButton", command=cadastrar)\
+        .pack(pady=10, padx=10, fill="x")
+    ttk.Button(frame_cadastro, text="Voltar para o login", style="RoundedButton.TButton",
+               command=voltar_login).pack(pady=(0, 10), padx=10, fill="x")
+
+    # Inicia a aplicação
+    app.mainloop()
@@ -0,0 +1,355 @@
+"""Várias câmeras numa máquina: um processo por câmera para captura + MediaPipe.
+
+Uso:
+    python multi_camera.py 0 1 2                          # janela com as três câmeras
+    python multi_camera.py aula1.mp4 aula2.mp4 --sem-tela --segundos 20
+
+Cada fonte (índice de câmera, arquivo de vídeo ou pasta) roda num processo próprio,
+então o MediaPipe de cada uma usa outro núcleo em vez de disputar o GIL. As
+mãos de cada frame voltam numa fila só (alguns KB por frame) para o agregador,
+que reconhece os gestos e mantém as frases e o FPS de cada câmera; a imagem de
+prévia vai por memória compartilhada, sem passar pela fila.
+"""
+import argparse
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from rastreio_mao import RastreadorMao, maos_do_resultado
+from fontes_quadros import abrir_fonte, interpretar_fonte
+from servico_visao import OPCOES_HANDS, OPCOES_RASTREIO
+
+# ===============================
+# Configuração
+# ===============================
+TAMANHO_PREVIA = (320, 240)     # (largura, altura) da imagem de cada câmera na tela
+TAMANHO_FILA = 64               # resultados esperando o agregador, somando todas as câmeras
+QUADROS_MEMORIA = 3             # a prévia sendo escrita nunca é a que o agregador pode estar lendo
+CABECALHO = 8                   # int64 com o número do último frame escrito
+INTERVALO_TELA = 33             # ms entre atualizações da janela
+
+def _forma_previa(tamanho):
+    return (QUADROS_MEMORIA, tamanho[1], tamanho[0], 3)
+
+# ===============================
+# Processo de cada câmera
+# ===============================
+def _trabalhador(indice, fonte, fila, nome_memoria, tamanho_previa, parar, opcoes_hands, opcoes_rastreio):
+    """Captura, MediaPipe e desenho da prévia de uma fonte; roda num processo separado."""
+    import mediapipe as mp
+    from pipeline_camera import ESTILO_PONTOS
+
+    # cada processo usa um núcleo; threads internas do OpenCV só disputariam CPU
+    cv2.setNumThreads(1)
+    memoria = shared_memory.SharedMemory(name=nome_memoria)
+    ultimo = np.ndarray((1,), dtype=np.int64, buffer=memoria.buf)
+    previas = np.ndarray(_forma_previa(tamanho_previa), dtype=np.uint8, buffer=memoria.buf, offset=CABECALHO)
+    hands = mp.solutions.hands.Hands(**opcoes_hands)
+    detector = RastreadorMao(hands, **opcoes_rastreio)
+    # vídeos e pastas na velocidade máxima: o FPS medido é o que a máquina aguenta
+    cap = abrir_fonte(fonte, tempo_real=False)
+    espelhado = rgb = None
+    seq = 0
+    try:
+        while not parar.is_set():
+            ret, frame = cap.read()
+            t_captura = time.perf_counter()
+            if not ret:
+                if isinstance(fonte, str):
+                    break           # fim do vídeo
+                time.sleep(0.01)
+                continue
+            seq += 1
+            if espelhado is None or espelhado.shape != frame.shape:
+                espelhado, rgb = np.empty_like(frame), np.empty_like(frame)
+            cv2.flip(frame, 1, dst=espelhado)
+            cv2.cvtColor(espelhado, cv2.COLOR_BGR2RGB, dst=rgb)
+            resultado = detector.processar(rgb, rgb=True)
+            t_hands = time.perf_counter() - t_captura
+            # coordenadas do MediaPipe já são float32: o array não perde nada e é menor na fila
+            maos = [(lado, np.array(coords, dtype=np.float32)) for lado, coords in maos_do_resultado(resultado)]
+
+            previa = previas[seq % QUADROS_MEMORIA]
+            cv2.resize(rgb, tamanho_previa, dst=previa, interpolation=cv2.INTER_AREA)
+            for hand_landmarks in resultado.multi_hand_landmarks or []:
+                mp.solutions.drawing_utils.draw_landmarks(previa, hand_landmarks,
+                                                          mp.solutions.hands.HAND_CONNECTIONS, ESTILO_PONTOS)
+            ultimo[0] = seq
+            try:
+                fila.put_nowait((indice, seq, t_captura, t_hands, maos))
+            except queue.Full:
+                # agregador atrasado: o frame aparece na tela, só não entra no histórico
+                pass
+    finally:
+        cap.release()
+        hands.close()
+        del ultimo, previas
+        memoria.close()
+        try:
+            fila.put((indice, None, time.perf_counter(), 0.0, []), timeout=1.0)
+        except queue.Full:
+            pass
+
+# ===============================
+# Estado de cada câmera no agregador
+# ===============================
+class FluxoCamera:
+    def __init__(self, indice, fonte, memoria, tamanho_previa, tradutor):
+        self.indice = indice
+        self.fonte = fonte
+        self.memoria = memoria
+        self.tradutor = tradutor
+        self._ultimo = np.ndarray((1,), dtype=np.int64, buffer=memoria.buf)
+        self._previas = np.ndarray(_forma_previa(tamanho_previa), dtype=np.uint8,
+                                   buffer=memoria.buf, offset=CABECALHO)
+        self._copia = np.empty(self._previas.shape[1:], dtype=np.uint8)
+        self._seq_exibida = 0
+        self.ativo = True
+        self.gesto = "---"
+        self.frase = ""
+        self.frames = 0
+        self.perdidos = 0           # frames que não chegaram ao agregador (fila cheia)
+        self._seq = 0
+        self._chegadas = deque(maxlen=120)
+        self._t_hands = deque(maxlen=120)
+        self._latencias = deque(maxlen=120)
+
+    def registrar(self, seq, t_captura, t_hands, gesto, frase):
+        agora = time.perf_counter()
+        self.perdidos += max(seq - self._seq - 1, 0)
+        self._seq = seq
+        self.frames += 1
+        self.gesto, self.frase = gesto, frase
+        self._chegadas.append(agora)
+        self._t_hands.append(t_hands)
+        self._latencias.append(agora - t_captura)
+
+    def imagem(self):
+        """Cópia da prévia mais nova ainda não entregue, ou None."""
+        seq = int(self._ultimo[0])
+        if seq == 0 or seq == self._seq_exibida:
+            return None
+        np.copyto(self._copia, self._previas[seq % QUADROS_MEMORIA])
+        # com 3 quadros, o que foi copiado só é reescrito depois do frame seq + 2 começar
+        if int(self._ultimo[0]) - seq >= QUADROS_MEMORIA - 1:
+            return None
+        self._seq_exibida = seq
+        return self._copia
+
+    def estatisticas(self):
+        fps = 0.0
+        if len(self._chegadas) > 1 and self._chegadas[-1] > self._chegadas[0]:
+            fps = (len(self._chegadas) - 1) / (self._chegadas[-1] - self._chegadas[0])
+        lat = sorted(self._latencias)
+        return {
+            "fonte": self.fonte,
+            "fps": fps,
+            "frames": self.frames,
+            "perdidos": self.perdidos,
+            "captura_hands_ms": 1000 * sum(self._t_hands) / len(self._t_hands) if self._t_hands else 0.0,
+            "latencia_p50_ms": 1000 * lat[len(lat) // 2] if lat else 0.0,
+            "gesto": self.gesto,
+            "frase": self.frase,
+            "ativo": self.ativo,
+        }
+
+# ===============================
+# Agregador
+# ===============================
+class AgregadorCameras:
+    """Inicia um processo por fonte e reconhece os resultados de todas numa thread só.
+
+    criar_tradutor() deve retornar um objeto com processar(maos, t) -> (gesto, frase)
+    (ex.: traducao.TradutorFluxo); cada câmera ganha o seu, então as frases de uma
+    não se misturam com as de outra.
+    """
+
+    def __init__(self, fontes, criar_tradutor, tamanho_previa=TAMANHO_PREVIA,
+                 opcoes_hands=None, opcoes_rastreio=None):
+        self.fontes = list(fontes)
+        self.criar_tradutor = criar_tradutor
+        self.tamanho_previa = tuple(tamanho_previa)
+        self.opcoes_hands = dict(OPCOES_HANDS if opcoes_hands is None else opcoes_hands)
+        self.opcoes_rastreio = dict(OPCOES_RASTREIO if opcoes_rastreio is None else opcoes_rastreio)
+        self.fluxos = []
+        self._processos = []
+        self._thread = None
+        # spawn também no Linux: fork de um processo com Tk e threads é frágil
+        self._contexto = multiprocessing.get_context("spawn")
+        self._parar = self._contexto.Event()
+        self._fila = self._contexto.Queue(maxsize=TAMANHO_FILA)
+
+    def iniciar(self):
+        bytes_memoria = CABECALHO + int(np.prod(_forma_previa(self.tamanho_previa)))
+        for indice, fonte in enumerate(self.fontes):
+            memoria = shared_memory.SharedMemory(create=True, size=bytes_memoria)
+            memoria.buf[:CABECALHO] = bytes(CABECALHO)
+            self.fluxos.append(FluxoCamera(indice, fonte, memoria, self.tamanho_previa, self.criar_tradutor()))
+            processo = self._contexto.Process(
+                target=_trabalhador, daemon=True,
+                args=(indice, fonte, self._fila, memoria.name, self.tamanho_previa, self._parar,
+                      self.opcoes_hands, self.opcoes_rastreio))
+            processo.start()
+            self._processos.append(processo)
+        self._thread = threading.Thread(target=self._receber, daemon=True)
+        self._thread.start()
+
+    def _receber(self):
+        while any(f.ativo for f in self.fluxos):
+            try:
+                indice, seq, t_captura, t_hands, maos = self._fila.get(timeout=0.2)
+            except queue.Empty:
+                if self._parar.is_set():
+                    return
+                continue
+            fluxo = self.fluxos[indice]
+            if seq is None:
+                fluxo.ativo = False
+                continue
+            gesto, frase = "---", fluxo.frase
+            if maos:
+                gesto, frase = fluxo.tradutor.processar(maos, t_captura)
+            fluxo.registrar(seq, t_captura, t_hands, gesto, frase)
+
+    @property
+    def ativo(self):
+        return any(f.ativo for f in self.fluxos) and not self._parar.is_set()
+
+    def estatisticas(self):
+        por_fluxo = [f.estatisticas() for f in self.fluxos]
+        return {"fps_total": sum(e["fps"] for e in por_fluxo), "fluxos": por_fluxo}
+
+    def parar(self):
+        self._parar.set()
+        for processo in self._processos:
+            processo.join(timeout=3.0)
+            if processo.is_alive():
+                processo.terminate()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        for fluxo in self.fluxos:
+            fluxo.ativo = False
+            fluxo._ultimo = fluxo._previas = None
+            try:
+                fluxo.memoria.close()
+                fluxo.memoria.unlink()
+            except (OSError, BufferError):
+                pass
+
+# ===============================
+# Janela
+# ===============================
+def abrir_multi_camera(fontes, ao_fechar=None):
+    """Janela com uma prévia, o gesto, a frase e o FPS de cada câmera."""
+    import tkinter as tk
+    from PIL import Image, ImageTk
+    from traducao import TradutorFluxo, exportar_rastro
+
+    agregador = AgregadorCameras(fontes, TradutorFluxo)
+    agregador.iniciar()
+
+    janela = tk.Toplevel()
+    janela.title("Tradução – Várias Câmeras")
+    colunas = 2 if len(fontes) > 1 else 1
+    paineis = []
+    for i, fonte in enumerate(fontes):
+        painel = tk.Frame(janela, bd=1, relief="groove")
+        painel.grid(row=i // colunas, column=i % colunas, padx=5, pady=5, sticky="nsew")
+        # sem imagem, width/height do Label contam caracteres e linhas: uma imagem
+        # vazia do tamanho da prévia segura o painel até o primeiro frame
+        vazia = tk.PhotoImage(width=TAMANHO_PREVIA[0], height=TAMANHO_PREVIA[1])
+        lbl_camera = tk.Label(painel, image=vazia)
+        lbl_camera.pack()
+        lbl_gesto = tk.Label(painel, text="Gesto: ---", font=("Segoe UI", 14, "bold"))
+        lbl_gesto.pack()
+        lbl_frase = tk.Label(painel, text="", font=("Segoe UI", 12, "bold"), fg="blue")
+        lbl_frase.pack()
+        lbl_fps = tk.Label(painel, text="", font=("Consolas", 9))
+        lbl_fps.pack()
+        paineis.append({"camera": lbl_camera, "gesto": lbl_gesto, "frase": lbl_frase, "fps": lbl_fps,
+                        "foto": None, "vazia": vazia, "textos": {}})
+
+    def mostrar_texto(painel, chave, texto):
+        if painel["textos"].get(chave) != texto:
+            painel[chave].config(text=texto)
+            painel["textos"][chave] = texto
+
+    def atualizar():
+        if not janela.winfo_exists():
+            return
+        for fluxo, painel in zip(agregador.fluxos, paineis):
+            imagem = fluxo.imagem()
+            if imagem is not None:
+                alt, larg = imagem.shape[:2]
+                pil = Image.frombuffer("RGB", (larg, alt), imagem, "raw", "RGB", 0, 1)
+                if painel["foto"] is None:
+                    painel["foto"] = ImageTk.PhotoImage(pil)
+                    painel["camera"].configure(image=painel["foto"], width=larg, height=alt)
+                else:
+                    painel["foto"].paste(pil)
+            e = fluxo.estatisticas()
+            mostrar_texto(painel, "gesto", f"Gesto: {e['gesto']}")
+            mostrar_texto(painel, "frase", f"Frase: {e['frase']}")
+            estado = "" if e["ativo"] else "  (encerrada)"
+            mostrar_texto(painel, "fps", f"{e['fonte']}: {e['fps']:.1f} FPS, "
+                                         f"MediaPipe {e['captura_hands_ms']:.0f} ms{estado}")
+        janela.after(INTERVALO_TELA, atualizar)
+
+    def fechar():
+        agregador.parar()
+        exportar_rastro()
+        janela.destroy()
+        if ao_fechar is not None:
+            ao_fechar()
+
+    janela.protocol("WM_DELETE_WINDOW", fechar)
+    atualizar()
+    return agregador
+
+# ===============================
+# Linha de comando
+# ===============================
+def medir(fontes, segundos):
+    """Roda sem janela e retorna as estatísticas (FPS de cada fonte e o total)."""
+    from traducao import TradutorFluxo
+
+    agregador = AgregadorCameras(fontes, TradutorFluxo)
+    agregador.iniciar()
+    try:
+        fim = time.perf_counter() + segundos
+        while time.perf_counter() < fim and agregador.ativo:
+            time.sleep(0.2)
+        return agregador.estatisticas()
+    finally:
+        agregador.parar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tradução com várias câmeras (um processo por câmera).")
+    parser.add_argument("fontes", nargs="+", help="índices de câmera (0, 1, ...), arquivos de vídeo ou pastas de imagens")
+    parser.add_argument("--sem-tela", action="store_true", help="só mede o FPS, sem abrir janela")
+    parser.add_argument("--segundos", type=float, default=10.0)
+    args = parser.parse_args(argv)
+    fontes = [interpretar_fonte(f) for f in args.fontes]
+
+    if args.sem_tela:
+        estatisticas = medir(fontes, args.segundos)
+        for e in estatisticas["fluxos"]:
+            print(f"{e['fonte']}: {e['fps']:.1f} FPS, {e['frames']} frames ({e['perdidos']} perdidos), "
+                  f"MediaPipe {e['captura_hands_ms']:.1f} ms, latência p50 {e['latencia_p50_ms']:.1f} ms")
+        print(f"Total: {estatisticas['fps_total']:.1f} FPS")
+        return
+
+    import tkinter as tk
+    raiz = tk.Tk()
+    raiz.withdraw()
+    abrir_multi_camera(fontes, ao_fechar=raiz.destroy)
+    raiz.mainloop()
+
+if __name__ == "__main__":
+    main()
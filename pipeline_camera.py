@@ -0,0 +1,469 @@
+import abc
+import queue
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from rastreio_mao import RastreadorMao, maos_do_resultado
+from fontes_quadros import Ritmo
+from agendador import AgendadorInferencia
+from instrumentacao import obter_instrumentacao
+
+mp_hands = mp.solutions.hands
+mp_draw = mp.solutions.drawing_utils
+# o desenho é feito no buffer RGB: o vermelho padrão (BGR) precisa ser invertido
+ESTILO_PONTOS = mp_draw.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2)
+TAMANHO_ANEL = 4            # frames em uso ao mesmo tempo: escrita + fila (2) + tela
+MAX_FALHAS_SEGUIDAS = 30    # frames seguidos com erro até o pipeline desistir
+MAX_RASTROS_ERRO = 5        # tracebacks completos impressos; depois, uma linha por erro
+
+# imagem: array RGB (uint8) já no tamanho pedido pela assinatura; não guardar
+# depois de exibir, porque o buffer volta a ser usado alguns frames depois.
+# maos: [(lado, coords)] de todas as mãos detectadas; coords é a primeira (ou None)
+ResultadoFrame = namedtuple("ResultadoFrame", ["imagem", "coords", "extra", "t_captura", "t_processado", "maos"])
+
+# ===============================
+# Captura
+# ===============================
+class CapturaCamera:
+    """Thread que lê a câmera sem parar e guarda só o frame mais recente."""
+
+    def __init__(self, cap):
+        self.cap = cap
+        self._cond = threading.Condition()
+        self._frame = None
+        self._t_captura = 0.0
+        self._seq = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+
+    def _rodar(self):
+        inst = obter_instrumentacao()
+        while not self._parar.is_set():
+            t0 = time.perf_counter_ns()
+            ret, frame = self.cap.read()
+            if inst.ativo:
+                inst.amostra("cap.read", (time.perf_counter_ns() - t0) / 1e6, self._seq + 1)
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._cond:
+                self._frame = frame
+                self._t_captura = time.perf_counter()
+                self._seq += 1
+                self._cond.notify_all()
+
+    def proximo(self, ultimo_seq, timeout=0.5):
+        """Espera um frame mais novo que ultimo_seq; retorna (seq, frame, t_captura) ou None."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > ultimo_seq or self._parar.is_set(), timeout)
+            if self._parar.is_set() or self._seq <= ultimo_seq:
+                return None
+            return self._seq, self._frame, self._t_captura
+
+    def parar(self):
+        self._parar.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+# ===============================
+# Assinatura (uma por janela)
+# ===============================
+class Assinatura:
+    """Fila de resultados de uma janela ligada ao pipeline.
+
+    processar(maos, t) roda na thread de inferência (ex.: reconhecimento) quando
+    há pelo menos uma mão, com a lista [(lado, coords)] de todas as mãos
+    detectadas e o tempo do frame em segundos, e o retorno vai em
+    ResultadoFrame.extra. O Tk só chama obter_resultado(). Se o pipeline
+    desistir por erros, ativo vira False e erro diz o motivo.
+    """
+
+    def __init__(self, processar=None, tamanho_fila=2, ao_cancelar=None):
+        self.processar = processar
+        self.ativo = True
+        self.erro = None
+        self._cancelada = False
+        # (largura, altura) máximas da imagem; None entrega o frame no tamanho da câmera
+        self.tamanho_exibicao = None
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._ao_cancelar = ao_cancelar
+        self._latencias = deque(maxlen=240)
+        self._exibidos = deque(maxlen=240)
+        self._ultima_publicacao = None
+        self._intervalo_publicacao = None
+
+    def _publicar(self, resultado):
+        agora = resultado.t_processado
+        if self._ultima_publicacao is not None:
+            intervalo = agora - self._ultima_publicacao
+            self._intervalo_publicacao = (intervalo if self._intervalo_publicacao is None else
+                                          self._intervalo_publicacao + 0.1 * (intervalo - self._intervalo_publicacao))
+        self._ultima_publicacao = agora
+        try:
+            self._fila.put_nowait(resultado)
+        except queue.Full:
+            # o Tk atrasou: descarta o mais antigo em vez de acumular latência
+            try:
+                self._fila.get_nowait()
+            except queue.Empty:
+                pass
+            self._fila.put_nowait(resultado)
+
+    def obter_resultado(self):
+        """Resultado mais recente ainda não exibido, ou None (chamado pelo Tk)."""
+        resultado = None
+        while True:
+            try:
+                resultado = self._fila.get_nowait()
+            except queue.Empty:
+                return resultado
+
+    def chegada_prevista(self):
+        """Quando o próximo resultado deve chegar (perf_counter); 0 se já há um na fila, None se não se sabe."""
+        if not self._fila.empty():
+            return 0.0
+        if self._intervalo_publicacao is None:
+            return None
+        prevista = self._ultima_publicacao + self._intervalo_publicacao
+        agora = time.perf_counter()
+        if prevista <= agora:
+            # atrasado: confere de novo daqui a um pedaço do intervalo, não a cada poucos ms
+            prevista = agora + self._intervalo_publicacao / 8
+        return prevista
+
+    def registrar_exibicao(self, resultado):
+        """Marca o frame como exibido para medir a latência captura -> tela."""
+        agora = time.perf_counter()
+        self._latencias.append(agora - resultado.t_captura)
+        self._exibidos.append(agora)
+
+    def estatisticas(self):
+        lat = sorted(self._latencias)
+        fps = 0.0
+        if len(self._exibidos) > 1 and self._exibidos[-1] > self._exibidos[0]:
+            fps = (len(self._exibidos) - 1) / (self._exibidos[-1] - self._exibidos[0])
+        return {
+            "fps_exibicao": fps,
+            "latencia_p50_ms": 1000 * lat[len(lat) // 2] if lat else 0.0,
+            "latencia_p95_ms": 1000 * lat[int(len(lat) * 0.95)] if lat else 0.0,
+        }
+
+    def interromper(self, erro):
+        """O pipeline parou por erro: a janela deixa de esperar frames (chamado pela thread de inferência)."""
+        self.erro = erro
+        self.ativo = False
+
+    def cancelar(self):
+        # interrompida ou não, a janela ainda precisa sair do serviço ao fechar
+        if self._cancelada:
+            return
+        self._cancelada = True
+        self.ativo = False
+        if self._ao_cancelar is not None:
+            self._ao_cancelar(self)
+
+# ===============================
+# Buffers reaproveitados
+# ===============================
+class AnelBuffers:
+    """Alguns arrays por formato, usados em rodízio em vez de alocar um por frame."""
+
+    def __init__(self, tamanho=TAMANHO_ANEL):
+        self.tamanho = tamanho
+        self._aneis = {}
+
+    def proximo(self, forma):
+        anel = self._aneis.get(forma)
+        if anel is None:
+            if len(self._aneis) > 8:
+                # o label mudou de tamanho várias vezes: esquece formatos antigos
+                self._aneis.clear()
+            anel = self._aneis[forma] = [[np.empty(forma, dtype=np.uint8) for _ in range(self.tamanho)], 0]
+        buffers, i = anel
+        anel[1] = (i + 1) % self.tamanho
+        return buffers[i]
+
+def tamanho_ajustado(larg, alt, caixa):
+    """Maior (larg, alt) com a mesma proporção que cabe na caixa, sem ampliar."""
+    if caixa is None:
+        return larg, alt
+    escala = min(caixa[0] / larg, caixa[1] / alt, 1.0)
+    return max(1, int(larg * escala)), max(1, int(alt * escala))
+
+# ===============================
+# Pipeline captura -> inferência -> assinaturas
+# ===============================
+class _PipelineBase(abc.ABC):
+    """Assinaturas, gravação e entrega dos frames; as subclasses produzem os frames em _rodar."""
+
+    def __init__(self, gravador=None):
+        self.gravador = gravador
+        self._assinaturas = []
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+        self.ativo = False
+        self.erro = None            # exceção que fez a thread desistir
+
+        self.frames_processados = 0
+        self.frames_descartados = 0
+        self.falhas = 0
+        self._falhas_seguidas = 0
+        self._buffers = AnelBuffers()
+
+    def iniciar(self):
+        self.ativo = True
+        self._thread.start()
+
+    def adicionar_assinatura(self, assinatura):
+        with self._trava:
+            self._assinaturas = self._assinaturas + [assinatura]
+            if self.erro is not None:
+                assinatura.interromper(self.erro)
+
+    def remover_assinatura(self, assinatura):
+        with self._trava:
+            self._assinaturas = [a for a in self._assinaturas if a is not assinatura]
+
+    def _entregar(self, rgb, maos, t, t_captura, quadro):
+        """Reduz a imagem (já desenhada) para cada assinatura, reconhece e publica.
+
+        t é o tempo do frame na fonte (o que o reconhecimento de movimento usa);
+        t_captura, o relógio local para medir a latência até a tela.
+        """
+        if self.gravador is not None:
+            self.gravador.gravar(t, maos, (rgb.shape[1], rgb.shape[0]))
+        coords = maos[0][1] if maos else None
+        alt, larg = rgb.shape[:2]
+        reduzidas = {}
+        for assinatura in self._assinaturas:
+            tamanho = tamanho_ajustado(larg, alt, assinatura.tamanho_exibicao)
+            imagem = reduzidas.get(tamanho)
+            if imagem is None:
+                imagem = rgb
+                if tamanho != (larg, alt):
+                    imagem = cv2.resize(rgb, tamanho, dst=self._buffers.proximo((tamanho[1], tamanho[0], 3)),
+                                        interpolation=cv2.INTER_AREA)
+                    quadro.etapa("resize")
+                reduzidas[tamanho] = imagem
+            extra = None
+            if maos and assinatura.processar is not None:
+                extra = assinatura.processar(maos, t)
+                quadro.etapa("reconhecimento")
+            assinatura._publicar(ResultadoFrame(imagem, coords, extra, t_captura, time.perf_counter(), maos))
+        self.frames_processados += 1
+
+    @abc.abstractmethod
+    def _rodar(self):
+        """Corpo da thread: produz os frames e chama _entregar até _parar ser marcado."""
+
+    def _quadro_ok(self):
+        self._falhas_seguidas = 0
+
+    def _falhou(self, erro):
+        """Um frame deu erro: registra e pula. Retorna True se a thread deve desistir.
+
+        Um erro isolado (um frame estranho, um callback que falhou uma vez) não
+        derruba a prévia; MAX_FALHAS_SEGUIDAS seguidos marcam o pipeline e as
+        assinaturas como inativos, em vez de deixar a janela esperando para sempre.
+        """
+        self.falhas += 1
+        self._falhas_seguidas += 1
+        if self._falhas_seguidas == 1:
+            if self.falhas <= MAX_RASTROS_ERRO:
+                print("[pipeline] erro no frame, pulando:")
+                traceback.print_exc()
+            else:
+                print(f"[pipeline] erro no frame, pulando: {erro!r}")
+        if self._falhas_seguidas < MAX_FALHAS_SEGUIDAS:
+            return False
+        print(f"[pipeline] {self._falhas_seguidas} frames seguidos com erro; parando a inferência: {erro!r}")
+        with self._trava:
+            self.erro = erro
+            for assinatura in self._assinaturas:
+                assinatura.interromper(erro)
+        return True
+
+    def _encerrar_thread(self):
+        if not self.ativo:
+            return False
+        self.ativo = False
+        self._parar.set()
+        return True
+
+    def aguardar(self, timeout=None):
+        """Espera a thread terminar; True se ela já saiu (depois de parar())."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _fechar_gravador(self):
+        if self.gravador is not None:
+            self.gravador.fechar()
+
+class PipelineVisao(_PipelineBase):
+    """Captura e inferência fora da thread do Tk.
+
+    A thread de inferência pega sempre o frame mais novo, roda o MediaPipe uma vez,
+    desenha os landmarks e entrega o resultado para todas as assinaturas. cap é
+    qualquer fonte com read()/release() (fontes_quadros.abrir_fonte). Entre um
+    frame e outro, o agendador segura a thread pelo limite de CPU e pelo modo
+    ocioso; os frames que chegam enquanto isso são descartados, não enfileirados.
+    Com um ControladorQualidade, o Hands e o tamanho da entrada vêm dele e podem
+    mudar entre dois frames.
+    """
+
+    def __init__(self, cap, hands, opcoes_rastreio=None, gravador=None, agendador=None, qualidade=None):
+        super().__init__(gravador)
+        self.cap = cap
+        self.hands = hands
+        self.detector = RastreadorMao(hands, **(opcoes_rastreio or {}))
+        self.captura = CapturaCamera(cap)
+        self.agendador = AgendadorInferencia() if agendador is None else agendador
+        self.qualidade = qualidade
+        self._espelhado = None
+
+    def iniciar(self):
+        self.captura.iniciar()
+        super().iniciar()
+
+    def _rodar(self):
+        inst = obter_instrumentacao()
+        ultimo_seq = 0
+        while not self._parar.is_set():
+            espera = self.agendador.proximo_inicio() - time.perf_counter()
+            if espera > 0 and self._parar.wait(espera):
+                break
+            item = self.captura.proximo(ultimo_seq)
+            if item is None:
+                continue
+            seq, frame, t_captura = item
+            # frames que chegaram enquanto a inferência anterior rodava são pulados
+            self.frames_descartados += seq - ultimo_seq - 1
+            ultimo_seq = seq
+            try:
+                self._processar_quadro(seq, frame, t_captura, inst)
+            except Exception as erro:
+                if self._falhou(erro):
+                    break
+            else:
+                self._quadro_ok()
+
+    def _processar_quadro(self, seq, frame, t_captura, inst):
+        self.agendador.registrar_captura(seq, t_captura)
+        self.agendador.inicio_quadro()
+        if self.qualidade is not None:
+            self.qualidade.aplicar(self.detector)
+        perdas = self.detector.perdas
+        quadro = inst.quadro(seq)
+
+        # espelha e converte para RGB uma vez só: o mesmo buffer vai para o
+        # MediaPipe, recebe o desenho e é a imagem exibida
+        if self._espelhado is None or self._espelhado.shape != frame.shape:
+            self._espelhado = np.empty_like(frame)
+        cv2.flip(frame, 1, dst=self._espelhado)
+        quadro.etapa("flip")
+        rgb = self._buffers.proximo(frame.shape)
+        cv2.cvtColor(self._espelhado, cv2.COLOR_BGR2RGB, dst=rgb)
+        quadro.etapa("cvtColor")
+        inicio_deteccao = time.perf_counter()
+        resultado = self.detector.processar(rgb, quadro, rgb=True)
+        custo_deteccao = time.perf_counter() - inicio_deteccao
+        maos = maos_do_resultado(resultado)
+        if maos:
+            for hand_landmarks in resultado.multi_hand_landmarks:
+                mp_draw.draw_landmarks(rgb, hand_landmarks, mp_hands.HAND_CONNECTIONS, ESTILO_PONTOS)
+            quadro.etapa("draw_landmarks")
+        self._entregar(rgb, maos, t_captura, t_captura, quadro)
+        self.agendador.fim_quadro(bool(maos))
+        if self.qualidade is not None:
+            self.qualidade.registrar(custo_deteccao, bool(maos),
+                                     self.detector.perdas > perdas, self.agendador.cpu_max)
+        inst.registrar(quadro)
+
+    def parar(self, fechar_hands=True):
+        """Encerra as threads e libera a câmera (e o modelo, se fechar_hands)."""
+        if not self._encerrar_thread():
+            return
+        self.captura.parar()
+        self._thread.join(timeout=2.0)
+        try: self.cap.release()
+        except: pass
+        self._fechar_gravador()
+        if fechar_hands and not self._thread.is_alive():
+            # o controlador de qualidade pode ter trocado o Hands do detector
+            for hands in (self.detector.hands, self.detector.hands_busca):
+                if hands is not None:
+                    try: hands.close()
+                    except: pass
+
+# ===============================
+# Reprodução de uma gravação de landmarks
+# ===============================
+TAMANHO_REPRODUCAO = (640, 480)     # gravações sem o tamanho do frame no cabeçalho
+
+def desenhar_maos(rgb, maos):
+    """Desenha landmarks dados como coordenadas (sem os protos do MediaPipe)."""
+    alt, larg = rgb.shape[:2]
+    cor = ESTILO_PONTOS.color
+    for _, coords in maos:
+        pontos = [(int(x * larg), int(y * alt)) for x, y, _ in coords]
+        for a, b in mp_hands.HAND_CONNECTIONS:
+            cv2.line(rgb, pontos[a], pontos[b], (224, 224, 224), 2)
+        for p in pontos:
+            cv2.circle(rgb, p, ESTILO_PONTOS.circle_radius, cor, ESTILO_PONTOS.thickness)
+
+class PipelineReproducao(_PipelineBase):
+    """Mesmo contrato do PipelineVisao, mas as mãos vêm de uma GravacaoLandmarks.
+
+    Não abre câmera nem MediaPipe: cada registro vira um frame preto com as mãos
+    desenhadas, e o processar das assinaturas recebe o tempo gravado, então o
+    reconhecimento vê exatamente o que viu na gravação. Terminada a gravação, o
+    último frame fica na tela.
+    """
+
+    def __init__(self, gravacao, tempo_real=True, gravador=None):
+        super().__init__(gravador)
+        self.gravacao = gravacao
+        self.ritmo = Ritmo(tempo_real)
+        larg, alt = gravacao.tamanho
+        self.tamanho = (larg, alt) if larg and alt else TAMANHO_REPRODUCAO
+        self.terminou = False
+
+    def _rodar(self):
+        inst = obter_instrumentacao()
+        larg, alt = self.tamanho
+        for seq, (t, maos) in enumerate(self.gravacao, start=1):
+            self.ritmo.esperar(t)
+            if self._parar.is_set():
+                break
+            try:
+                quadro = inst.quadro(seq)
+                rgb = self._buffers.proximo((alt, larg, 3))
+                rgb.fill(0)
+                if maos:
+                    desenhar_maos(rgb, maos)
+                    quadro.etapa("draw_landmarks")
+                self._entregar(rgb, maos, t, time.perf_counter(), quadro)
+                inst.registrar(quadro)
+            except Exception as erro:
+                if self._falhou(erro):
+                    break
+            else:
+                self._quadro_ok()
+        self.terminou = True
+
+    def parar(self, fechar_hands=True):
+        if not self._encerrar_thread():
+            return
+        self._thread.join(timeout=2.0)
+        self._fechar_gravador()
@@ -0,0 +1,269 @@
+"""Qualidade do MediaPipe ajustada ao que a máquina aguenta.
+
+O controlador mede o custo de cada frame e quantas vezes o rastreio perde a
+mão, e sobe ou desce um nível de NIVEIS (model_complexity e tamanho da
+entrada). Trocar o model_complexity exige um grafo novo: ele é criado e
+aquecido numa thread à parte enquanto o antigo continua processando, e a
+troca acontece entre dois frames, então a prévia não para. Cada nível tem
+dois grafos: um para o ROI e outro só para as buscas no frame inteiro
+(RastreadorMao.hands_busca), que não divide estado de rastreio com o primeiro.
+
+Contra ir e voltar sem parar: depois de uma troca, nenhuma decisão por
+ESPERA_TROCA segundos; descer só com o custo mediano acima do orçamento e subir
+só com o p90 bem abaixo dele; e, se um nível precisou ser abandonado logo
+depois de alcançado ou se o grafo dele não pôde ser criado, ele fica bloqueado
+por um tempo que dobra a cada vez. O custo comparado com o orçamento é só o
+do detector, sem o reconhecimento.
+
+LIBRAS_FPS_ALVO define a meta (padrão 24) e LIBRAS_QUALIDADE=fixa desliga o
+controle (fica sempre o nível de OPCOES_HANDS / OPCOES_RASTREIO).
+"""
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+# ===============================
+# Configuração
+# ===============================
+NivelQualidade = namedtuple("NivelQualidade", ["nome", "model_complexity", "lado_entrada"])
+# do mais leve ao mais completo
+NIVEIS = (
+    NivelQualidade("mínima", 0, 160),
+    NivelQualidade("leve", 0, 224),
+    NivelQualidade("normal", 1, 256),
+    NivelQualidade("alta", 1, 320),
+)
+FPS_ALVO = float(os.environ.get("LIBRAS_FPS_ALVO", "24"))
+AUTOMATICA = os.environ.get("LIBRAS_QUALIDADE", "auto") != "fixa"
+JANELA_DECISAO = 2.0        # segundos de amostras olhados a cada decisão
+AMOSTRAS_MINIMAS = 10       # menos que isso na janela: ainda não decide
+ESPERA_TROCA = 3.0          # segundos sem decidir depois de uma troca
+LIMITE_DESCER = 1.0         # custo p50 acima de LIMITE_DESCER x orçamento: desce um nível
+LIMITE_SUBIR = 0.6          # custo p90 abaixo de LIMITE_SUBIR x orçamento: sobe um nível
+LIMITE_SUBIR_INSTAVEL = 0.8 # com o rastreio instável, sobe com menos folga
+LIMITE_PERDAS = 0.2         # fração de frames com mão em que o rastreio se perdeu
+ESPERA_FALHA = 10.0         # descer antes disso depois de subir conta como falha
+BLOQUEIO_INICIAL = 30.0     # segundos que um nível que falhou fica sem ser tentado
+BLOQUEIO_MAXIMO = 300.0
+
+def nivel_de_opcoes(opcoes_hands, opcoes_rastreio):
+    """Índice em NIVEIS mais próximo das opções fixas (o ponto de partida)."""
+    lado = opcoes_rastreio.get("lado_entrada") or NIVEIS[-1].lado_entrada
+    complexidade = opcoes_hands.get("model_complexity", 1)
+    return min(range(len(NIVEIS)), key=lambda i: (NIVEIS[i].model_complexity != complexidade,
+                                                  abs(NIVEIS[i].lado_entrada - lado)))
+
+# ===============================
+# Controlador
+# ===============================
+class ControladorQualidade:
+    """Escolhe o nível de qualidade e guarda o Hands em uso.
+
+    A thread de inferência chama aplicar(detector) antes de cada frame (é ali que
+    um grafo novo, já pronto, entra no lugar do antigo) e registrar(...) depois.
+    """
+
+    def __init__(self, opcoes_hands, opcoes_rastreio, fps_alvo=FPS_ALVO, automatica=AUTOMATICA, criar_hands=None):
+        self.opcoes_hands = dict(opcoes_hands)
+        self.fps_alvo = fps_alvo
+        self.automatica = automatica
+        self._criar_hands = criar_hands or _criar_hands_mediapipe
+        self.indice = nivel_de_opcoes(opcoes_hands, opcoes_rastreio)
+        self.hands = None
+        self.hands_busca = None
+        # sem ROI todas as entradas são o frame inteiro: um grafo só basta
+        self._com_busca = bool(opcoes_rastreio.get("usar_roi", True)) and \
+            (automatica or opcoes_rastreio.get("lado_entrada") is not None)
+        self._trava = threading.Lock()
+        self._pronto = None         # (índice, hands ou None, hands_busca ou None, motivo) esperando o próximo frame
+        self._construindo = False
+        self._preparando_busca = False
+        self._amostras = deque()    # (t, custo, tem_mao, perdeu)
+        self._ultima_troca = time.perf_counter()
+        self._subiu_em = None       # (índice alcançado, instante) da última subida
+        self._bloqueios = {}        # índice -> (até quando, duração do bloqueio)
+        self.trocas = []            # (instante, de, para, motivo) das trocas aplicadas, para o rastro
+        self.falhas = []            # (instante, de, para, erro) das trocas cujo grafo não pôde ser criado
+
+    @property
+    def nivel(self):
+        return NIVEIS[self.indice]
+
+    def orcamento(self, cpu_max=1.0):
+        """Custo máximo por frame para manter fps_alvo usando no máximo cpu_max do tempo."""
+        return cpu_max / self.fps_alvo
+
+    def iniciar(self):
+        """Cria (e aquece) o Hands do nível atual; chamado uma vez, fora do Tk.
+
+        O grafo das buscas é criado depois, numa thread, para não atrasar a
+        abertura; até ele ficar pronto o RastreadorMao usa reset() no lugar.
+        """
+        with self._trava:
+            if self.hands is None:
+                self.hands = self._criar_hands(self.opcoes_hands, self.nivel.model_complexity)
+                if self._com_busca:
+                    self._preparando_busca = True
+                    threading.Thread(target=self._construir_busca, args=(self.indice,), daemon=True).start()
+            return self.hands
+
+    def descricao(self):
+        nivel = self.nivel
+        texto = f"Qualidade: {nivel.nome} (modelo {nivel.model_complexity}, {nivel.lado_entrada} px)"
+        if self._construindo:
+            texto += " – trocando..."
+        if not self.automatica:
+            texto += " – fixa"
+        return texto
+
+    # ---------- thread de inferência ----------
+    def aplicar(self, detector, agora=None):
+        """Põe no detector o nível escolhido, se o grafo dele já estiver pronto."""
+        if self._pronto is not None:
+            with self._trava:
+                indice, hands, hands_busca, motivo = self._pronto
+                self._pronto = None
+            # o detector não usa mais os antigos: só esta thread chama process()
+            if hands is not None:
+                antigo, self.hands = self.hands, hands
+                _fechar(antigo)
+            if hands_busca is not None:
+                antigo, self.hands_busca = self.hands_busca, hands_busca
+                _fechar(antigo)
+            if indice != self.indice:
+                agora = time.perf_counter() if agora is None else agora
+                # registrada só agora, quando o nível vale de fato
+                anterior, self.indice = self.indice, indice
+                if indice > anterior:
+                    self._subiu_em = (indice, agora)
+                self.trocas.append((agora, NIVEIS[anterior].nome, NIVEIS[indice].nome, motivo))
+                print(f"[qualidade] {NIVEIS[anterior].nome} -> {NIVEIS[indice].nome} ({motivo})")
+                self._amostras.clear()
+                self._ultima_troca = agora
+        detector.hands = self.hands
+        detector.hands_busca = self.hands_busca
+        if self.automatica:
+            detector.lado_entrada = self.nivel.lado_entrada
+
+    def registrar(self, custo, tem_mao, perdeu, cpu_max=1.0, agora=None):
+        """Um frame processado: custo do MediaPipe em segundos; perdeu = o rastreio no ROI falhou.
+
+        O custo é só o do detector (o que o nível muda); reconhecimento e
+        desenho não dependem da qualidade e não entram na decisão.
+        """
+        if not self.automatica:
+            return
+        agora = time.perf_counter() if agora is None else agora
+        self._amostras.append((agora, custo, tem_mao, perdeu))
+        while self._amostras and agora - self._amostras[0][0] > JANELA_DECISAO:
+            self._amostras.popleft()
+        if self._construindo or self._preparando_busca or self._pronto is not None \
+                or agora - self._ultima_troca < ESPERA_TROCA:
+            return
+        if len(self._amostras) < AMOSTRAS_MINIMAS:
+            return
+        decisao = self._decidir(cpu_max, agora)
+        if decisao is not None:
+            self._trocar(*decisao, agora)
+
+    def _decidir(self, cpu_max, agora):
+        custos = np.fromiter((c for _, c, _, _ in self._amostras), dtype=np.float64)
+        p50, p90 = np.percentile(custos, [50, 90])
+        orcamento = self.orcamento(cpu_max)
+        com_mao = sum(1 for _, _, m, _ in self._amostras if m)
+        perdas = sum(1 for _, _, _, p in self._amostras if p)
+        instavel = com_mao > 0 and perdas / com_mao > LIMITE_PERDAS
+        medida = f"custo p50 {1000 * p50:.0f} ms, p90 {1000 * p90:.0f} ms, orçamento {1000 * orcamento:.0f} ms"
+        if p50 > LIMITE_DESCER * orcamento and self.indice > 0:
+            return (self.indice - 1, medida) if self._liberado(self.indice - 1, agora) else None
+        limite = LIMITE_SUBIR_INSTAVEL if instavel else LIMITE_SUBIR
+        proximo = self.indice + 1
+        if p90 < limite * orcamento and proximo < len(NIVEIS) and self._liberado(proximo, agora):
+            return proximo, medida + (", rastreio instável" if instavel else "")
+        return None
+
+    def _liberado(self, indice, agora):
+        bloqueio = self._bloqueios.get(indice)
+        return bloqueio is None or agora >= bloqueio[0]
+
+    def _trocar(self, indice, motivo, agora):
+        anterior = self.indice
+        if indice < anterior and self._subiu_em is not None and self._subiu_em[0] == anterior \
+                and agora - self._subiu_em[1] < ESPERA_FALHA:
+            # subiu e não aguentou: não tenta de novo tão cedo
+            self._bloquear(anterior, agora)
+
+        nivel = NIVEIS[indice]
+        if nivel.model_complexity == self.nivel.model_complexity:
+            # só o tamanho da entrada muda: vale já no próximo frame
+            with self._trava:
+                self._pronto = (indice, None, None, motivo)
+            return
+        self._construindo = True
+        threading.Thread(target=self._construir, args=(indice, motivo), daemon=True).start()
+
+    def _bloquear(self, indice, agora):
+        """Deixa o nível sem ser tentado por um tempo que dobra a cada bloqueio."""
+        duracao = min(self._bloqueios.get(indice, (0.0, BLOQUEIO_INICIAL / 2))[1] * 2, BLOQUEIO_MAXIMO)
+        self._bloqueios[indice] = (agora + duracao, duracao)
+
+    def _construir(self, indice, motivo):
+        complexidade = NIVEIS[indice].model_complexity
+        hands = hands_busca = None
+        try:
+            hands = self._criar_hands(self.opcoes_hands, complexidade)
+            if self._com_busca:
+                hands_busca = self._criar_hands(self.opcoes_hands, complexidade)
+        except Exception as erro:
+            de, para = self.nivel.nome, NIVEIS[indice].nome
+            print(f"[qualidade] {de} -> {para} não aplicada ({motivo}): falha ao criar o grafo: {erro}")
+            self.falhas.append((time.perf_counter(), de, para, str(erro)))
+            _fechar(hands)
+            hands = None
+        with self._trava:
+            if hands is not None:
+                self._pronto = (indice, hands, hands_busca, motivo)
+            else:
+                # sem isso o próximo frame decidiria a mesma troca e criaria o grafo de novo;
+                # a thread de inferência não mexe nestes campos enquanto _construindo
+                agora = time.perf_counter()
+                self._bloquear(indice, agora)
+                self._ultima_troca = agora
+            self._construindo = False
+
+    def _construir_busca(self, indice):
+        try:
+            hands_busca = self._criar_hands(self.opcoes_hands, NIVEIS[indice].model_complexity)
+        except Exception as erro:
+            # sem ele o RastreadorMao continua correto, só reinicia o grafo principal nas trocas
+            print("[qualidade] falha ao criar o grafo das buscas:", erro)
+            hands_busca = None
+        with self._trava:
+            if hands_busca is not None and self._pronto is None:
+                self._pronto = (indice, None, hands_busca, None)
+            else:
+                _fechar(hands_busca)
+            self._preparando_busca = False
+
+    def fechar(self):
+        with self._trava:
+            pronto, self._pronto = self._pronto, None
+        for hands in (self.hands, self.hands_busca) + (pronto[1:3] if pronto else ()):
+            _fechar(hands)
+        self.hands = self.hands_busca = None
+
+def _fechar(hands):
+    if hands is not None:
+        try: hands.close()
+        except: pass
+
+def _criar_hands_mediapipe(opcoes_hands, model_complexity):
+    """Hands com a complexidade pedida, já aquecido com um frame vazio."""
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(**dict(opcoes_hands, model_complexity=model_complexity))
+    hands.process(np.zeros((240, 320, 3), dtype=np.uint8))
+    return hands
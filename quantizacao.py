@@ -0,0 +1,335 @@
+"""Templates quantizados (int8 ou float16) e distância com abandono precoce.
+
+Cada template normalizado (63 valores float64, 504 bytes) vira 63 int8 com uma
+escala float32 própria (71 bytes, contando o limite de erro float32) ou 63
+float16 (134 bytes). A consulta continua em float64; só os templates são
+aproximados.
+
+Conferência com o caminho exato (float64), no banco salvo e nas mãos de
+gravações .lmk (fontes_quadros.py gravar):
+    python quantizacao.py gravacao1.lmk gravacao2.lmk --gestos gestos_salvos
+Sem gravações, cada template do banco é consultado contra o resto do banco.
+"""
+import math
+
+import numpy as np
+
+from reconhecedor import (ReconhecedorGestos, Resultado, distancias_medias, nome_gesto,
+                          NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO)
+
+# ===============================
+# Constantes
+# ===============================
+DIM = NUM_PONTOS * 3
+TIPOS = ("int8", "float16")
+ETAPAS = (4, 10)            # pontos somados até cada poda; depois da última, o resto de uma vez
+ERRO_FLOAT16 = 2.0 ** -11   # erro relativo máximo do arredondamento para float16
+
+# ===============================
+# Quantização
+# ===============================
+def quantizar(vetores, tipo="int8"):
+    """(valores, escalas, erros) de vetores (N, 63).
+
+    erros[i] limita a diferença entre a distância de qualquer ponto ao template
+    quantizado e ao original (sqrt(3) vezes o erro máximo por coordenada).
+    """
+    vetores = np.asarray(vetores, dtype=np.float64).reshape(-1, DIM)
+    maximo = np.abs(vetores).max(axis=1) if len(vetores) else np.empty(0)
+    if tipo == "int8":
+        escalas = (maximo / 127).astype(np.float32)
+        escalas[escalas == 0] = 1.0
+        valores = np.rint(vetores / escalas[:, None].astype(np.float64)).astype(np.int8)
+        # a busca usa valores * escala em float32: o erro real desse produto é conferido em vez de estimado
+        erro_coord = (np.abs(dequantizar(valores, escalas, tipo) - vetores).max(axis=1)
+                      if len(vetores) else maximo)
+    elif tipo == "float16":
+        escalas = np.ones(len(vetores), dtype=np.float32)
+        valores = vetores.astype(np.float16)
+        erro_coord = np.maximum(maximo * ERRO_FLOAT16, 2.0 ** -24)
+    else:
+        raise ValueError(f"tipo deve ser um de {TIPOS}")
+    # guardado em float32, arredondado para cima para continuar sendo um limite
+    return valores, escalas, (math.sqrt(3) * erro_coord * (1 + 1e-6)).astype(np.float32)
+
+def dequantizar(valores, escalas, tipo="int8"):
+    """Templates (N, 63) em float32 a partir dos valores quantizados."""
+    aprox = valores.astype(np.float32)
+    if tipo == "int8":
+        aprox *= escalas[:, None]
+    return aprox
+
+def ordem_pontos(templates):
+    """Índices das 63 colunas com os pontos que mais variam entre os templates primeiro.
+
+    São esses pontos que separam os gestos; somados antes, fazem os candidatos
+    ruins passarem do corte já nos primeiros blocos.
+    """
+    templates = np.asarray(templates, dtype=np.float64).reshape(-1, NUM_PONTOS, 3)
+    if len(templates) < 2:
+        pontos = np.arange(NUM_PONTOS)
+    else:
+        pontos = np.argsort(-templates.var(axis=0).sum(axis=1), kind="stable")
+    return (3 * pontos[:, None] + np.arange(3)).reshape(DIM)
+
+# ===============================
+# Reconhecedor quantizado
+# ===============================
+class ReconhecedorQuantizado(ReconhecedorGestos):
+    """Banco de templates quantizados com busca por abandono precoce.
+
+    Só a forma compacta fica na memória (valores, escala e limite de erro, em
+    vez dos 504 bytes do float64). A busca lê os valores quantizados direto,
+    por blocos de pontos (ETAPAS), qualquer que seja o tamanho do banco: os
+    primeiros pontos são somados para todos, os k melhores parciais são
+    completados e viram o corte (nunca acima do LIMIAR_RECONHECIMENTO), e quem
+    já passou do corte é descartado antes de cada bloco seguinte.
+
+    Sem exatos, as distâncias são as dos templates quantizados. Com exatos (o
+    array float64 original, ex.: o memmap do ArmazemGestos, que fica no disco),
+    a poda desconta o erro da quantização e só os candidatos que sobram são
+    lidos e recalculados em float64, então o resultado é o da busca exata.
+    """
+
+    def __init__(self, gestos=None, limiar=LIMIAR_RECONHECIMENTO, tipo="int8"):
+        self.tipo = tipo
+        self._exatos_iniciais = None
+        self.comparacoes = 0        # distâncias ponto a ponto calculadas
+        self.buscas = 0
+        super().__init__(gestos, limiar)
+
+    @classmethod
+    def de_array(cls, nomes, templates, limiar=LIMIAR_RECONHECIMENTO, tipo="int8", refinar=False):
+        """Quantiza um array pronto; com refinar=True guarda a referência a ele (sem copiar um memmap)."""
+        templates = np.asarray(templates, dtype=np.float64).reshape(-1, NUM_PONTOS, 3)
+        rec = cls(limiar=limiar, tipo=tipo)
+        rec._exatos_iniciais = templates if refinar else None
+        rec._definir(list(nomes), templates)
+        return rec
+
+    def _definir(self, nomes, templates):
+        self.nomes = nomes
+        self._linhas = {nome: i for i, nome in enumerate(nomes)}
+        self._ordem = ordem_pontos(templates)
+        self.valores, self.escalas, self.erros = quantizar(self._permutar(templates), self.tipo)
+        self.exatos = self._exatos_iniciais
+        self._exatos_iniciais = None
+        self._novos = {}            # linha -> template float64 inserido depois (fora de exatos)
+        self.versao = getattr(self, "versao", 0) + 1
+
+    def _permutar(self, vetores):
+        return np.asarray(vetores, dtype=np.float64).reshape(-1, DIM)[:, self._ordem]
+
+    @property
+    def templates(self):
+        """Templates dequantizados (N, 21, 3), na ordem original dos pontos (calculado a cada acesso)."""
+        vetores = np.empty((len(self.nomes), DIM))
+        vetores[:, self._ordem] = dequantizar(self.valores, self.escalas, self.tipo)
+        return vetores.reshape(-1, NUM_PONTOS, 3)
+
+    def bytes_por_template(self):
+        """Tamanho da forma compacta (valores, escala e limite de erro)."""
+        return self.valores.itemsize * DIM + self.escalas.itemsize + self.erros.itemsize
+
+    def adicionar(self, nome, coords_normalizadas):
+        with self._trava:
+            self.versao += 1
+            valores, escalas, erros = quantizar(self._permutar(coords_normalizadas), self.tipo)
+            if self.exatos is not None:
+                # o array original (talvez um memmap só de leitura) não muda: a linha
+                # nova fica à parte, para o refino continuar exato
+                self._novos[self._linhas.get(nome, len(self.nomes))] = \
+                    np.asarray(coords_normalizadas, dtype=np.float64).reshape(DIM)
+            if nome in self._linhas:
+                i = self._linhas[nome]
+                self.valores[i], self.escalas[i], self.erros[i] = valores[0], escalas[0], erros[0]
+                return i
+            self.nomes.append(nome)
+            self._linhas[nome] = len(self.nomes) - 1
+            self.valores = np.concatenate([self.valores, valores])
+            self.escalas = np.concatenate([self.escalas, escalas])
+            self.erros = np.concatenate([self.erros, erros])
+            return len(self.nomes) - 1
+
+    def distancias(self, atual_norm):
+        atual = self._permutar(atual_norm)[0]
+        return distancias_medias(dequantizar(self.valores, self.escalas, self.tipo), atual)
+
+    def _soma_pontos(self, ids, colunas, q):
+        """Soma, por template, das distâncias ponto a ponto nas colunas, lidas dos valores quantizados.
+
+        ids None: todos os templates (fatia contígua, sem índices). Só o bloco
+        pedido é convertido para float32, nunca o banco inteiro.
+        """
+        if ids is None:
+            diff = self.valores[:, colunas].astype(np.float32)
+            escalas = self.escalas
+        else:
+            diff = self.valores[ids, colunas].astype(np.float32)
+            escalas = self.escalas[ids]
+        if self.tipo == "int8":
+            diff *= escalas[:, None]
+        diff -= q[colunas]
+        diff *= diff
+        s = diff[:, 0::3] + diff[:, 1::3]
+        s += diff[:, 2::3]
+        np.sqrt(s, out=s)
+        self.comparacoes += s.size
+        return s.sum(axis=1, dtype=np.float64)
+
+    def _exatas(self, ids, q):
+        """Somas float64 dos 21 pontos nas linhas ids (em ordem crescente) do array original.
+
+        Lê só essas linhas; as inseridas depois vêm de _novos.
+        """
+        self.comparacoes += NUM_PONTOS * len(ids)
+        antigas = ids < len(self.exatos)
+        vetores = np.empty((len(ids), DIM))
+        vetores[antigas] = self.exatos[ids[antigas]].reshape(-1, DIM)
+        if self._novos:
+            for j, i in enumerate(ids.tolist()):
+                if i in self._novos:
+                    vetores[j] = self._novos[i]
+        return distancias_medias(vetores, q) * NUM_PONTOS
+
+    def buscar(self, q, k=1):
+        """(ids, distâncias médias) dos k mais próximos dentro do limiar; q é a mão normalizada (63,)."""
+        self.buscas += 1
+        exata = q
+        q = q[self._ordem].astype(np.float32)
+        n = len(self.nomes)
+        refinar = self.exatos is not None
+        # folga relativa: a soma em float32 e por blocos difere da completa em float64
+        folga = 1 + 1e-5
+        corte = self.limiar * NUM_PONTOS
+        ids = None
+        inicio = 0
+        for fim in ETAPAS + (NUM_PONTOS,):
+            colunas = slice(3 * inicio, 3 * fim)
+            if ids is None:
+                # primeiro bloco: todos os templates
+                parcial = self._soma_pontos(None, colunas, q)
+                ids = np.arange(n)
+                # os k melhores parciais são completados já: dão um corte apertado para o resto
+                melhores = np.argpartition(parcial, k - 1)[:k] if k < n else ids
+                if refinar:
+                    totais = self._exatas(np.sort(melhores), exata)
+                else:
+                    totais = parcial[melhores] + self._soma_pontos(melhores, slice(3 * fim, DIM), q)
+                corte = min(corte, float(totais.max()))
+            else:
+                parcial += self._soma_pontos(ids, colunas, q)
+            if fim < NUM_PONTOS:
+                # limite inferior da distância total: o que já foi somado, menos o erro da quantização
+                inferior = parcial - self.erros[ids] * fim if refinar else parcial
+                vivos = np.flatnonzero(inferior <= corte * folga)
+                ids, parcial = ids[vivos], parcial[vivos]
+                if len(ids) == 0:
+                    break
+            inicio = fim
+        if refinar and len(ids):
+            ids = np.sort(ids)
+            parcial = self._exatas(ids, exata)
+        d = parcial / NUM_PONTOS
+        dentro = d <= self.limiar
+        ids, d = ids[dentro], d[dentro]
+        sel = np.lexsort((ids, d))[:k]
+        return ids[sel].tolist(), d[sel]
+
+    def reconhecer_normalizado(self, atual_norm, k=1):
+        with self._trava:
+            vazio = Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+            if len(self.nomes) == 0:
+                return vazio
+            ids, dist = self.buscar(np.asarray(atual_norm, dtype=np.float64).reshape(DIM), k)
+            top_k = [(self.nomes[i], float(d)) for i, d in zip(ids, dist)]
+            if not top_k:
+                return vazio
+            melhor_val = top_k[0][1]
+            margem = top_k[1][1] - melhor_val if len(top_k) > 1 else float("inf")
+            return Resultado(nome_gesto(top_k[0][0]), melhor_val, top_k, margem, self.limiar - melhor_val)
+
+    def reconhecer_lote(self, lista_coords, k=1):
+        """Cada mão usa a busca com abandono precoce (o corte é de cada consulta)."""
+        with self._trava:
+            return [self.reconhecer(c, k) for c in lista_coords]
+
+    def media_comparacoes(self):
+        """Distâncias ponto a ponto calculadas por busca (a busca completa faria 21 * N)."""
+        return self.comparacoes / self.buscas if self.buscas else 0.0
+
+# ===============================
+# Conferência com o caminho exato
+# ===============================
+def verificar_precisao(exato, quantizado, consultas):
+    """Compara o quantizado com o ReconhecedorGestos exato nas consultas (landmarks crus).
+
+    Retorna a concordância do gesto reconhecido, o maior erro de distância entre
+    os dois e as comparações ponto a ponto por busca.
+    """
+    iguais = 0
+    maior_erro = 0.0
+    quantizado.comparacoes = quantizado.buscas = 0
+    for coords in consultas:
+        a = exato.reconhecer(coords, k=1)
+        b = quantizado.reconhecer(coords, k=1)
+        iguais += a.nome == b.nome
+        if a.distancia <= exato.limiar and b.nome == a.nome:
+            maior_erro = max(maior_erro, abs(a.distancia - b.distancia))
+    return {
+        "consultas": len(consultas),
+        "concordancia": iguais / len(consultas) if len(consultas) else 1.0,
+        "maior_erro_distancia": maior_erro,
+        "comparacoes_por_busca": quantizado.media_comparacoes(),
+        "comparacoes_busca_completa": NUM_PONTOS * len(quantizado),
+        "bytes_por_template": quantizado.bytes_por_template(),
+        "bytes_por_template_float64": DIM * 8,
+    }
+
+def _consultas_sem_gravacao(nomes, templates, tipo, refinar):
+    """Cada template consultado contra o banco sem ele: (exato, quantizado, consulta) por template."""
+    for i in range(len(nomes)):
+        resto = [j for j in range(len(nomes)) if j != i]
+        outros = [nomes[j] for j in resto]
+        exato = ReconhecedorGestos.de_array(outros, templates[resto])
+        yield exato, ReconhecedorQuantizado.de_array(outros, templates[resto], tipo=tipo, refinar=refinar), templates[i]
+
+if __name__ == "__main__":
+    import argparse
+
+    from armazenamento_gestos import ArmazemGestos, migrar_se_preciso
+    from duas_maos import separar_banco
+    from fontes_quadros import GravacaoLandmarks
+
+    parser = argparse.ArgumentParser(description="Confere o reconhecedor quantizado contra o exato.")
+    parser.add_argument("gravacoes", nargs="*", help="gravações .lmk cujas mãos viram as consultas")
+    parser.add_argument("--gestos", default="gestos_salvos", help="base do banco de gestos (.f64/.idx)")
+    args = parser.parse_args()
+
+    migrar_se_preciso(args.gestos + ".json", args.gestos)
+    nomes, templates = ArmazemGestos(args.gestos).carregar()
+    (nomes, templates), _ = separar_banco(nomes, np.array(templates))
+    consultas = [coords for caminho in args.gravacoes
+                 for _, maos in GravacaoLandmarks(caminho) for _, coords in maos]
+    if args.gravacoes:
+        print(f"{len(nomes)} templates, {len(consultas)} mãos gravadas")
+    else:
+        print(f"{len(nomes)} templates, sem gravações: cada template contra o resto do banco")
+    for tipo in TIPOS:
+        for refinar in (False, True):
+            if consultas:
+                exato = ReconhecedorGestos.de_array(nomes, templates)
+                quantizado = ReconhecedorQuantizado.de_array(nomes, templates, tipo=tipo, refinar=refinar)
+                r = verificar_precisao(exato, quantizado, consultas)
+            else:
+                parciais = [verificar_precisao(e, q, [c]) for e, q, c in
+                            _consultas_sem_gravacao(nomes, templates, tipo, refinar)]
+                r = dict(parciais[0], consultas=len(parciais),
+                         concordancia=sum(p["concordancia"] for p in parciais) / len(parciais),
+                         maior_erro_distancia=max(p["maior_erro_distancia"] for p in parciais),
+                         comparacoes_por_busca=sum(p["comparacoes_por_busca"] for p in parciais) / len(parciais))
+            print(f"{tipo}{' + refino' if refinar else ''}: "
+                  f"concordância {100 * r['concordancia']:.1f}% em {r['consultas']} consultas, "
+                  f"erro máx {r['maior_erro_distancia']:.5f}, "
+                  f"{r['comparacoes_por_busca']:.0f} de {r['comparacoes_busca_completa']} comparações, "
+                  f"{r['bytes_por_template']} bytes/template (float64: {r['bytes_por_template_float64']})")
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+from instrumentacao import QUADRO_NULO
+from duas_maos import LADOS_MEDIAPIPE
+
+# ===============================
+# Configuração
+# ===============================
+LADO_ENTRADA = 256      # lado da imagem quadrada entregue ao MediaPipe
+MARGEM_ROI = 0.35       # folga em volta dos landmarks do frame anterior (fração do tamanho da mão)
+LADO_MIN_ROI = 0.15     # menor ROI, em fração do maior lado do frame
+INTERVALO_BUSCA = 10    # com menos mãos que max_maos, procura no frame inteiro a cada N frames
+
+# ===============================
+# Detecção com ROI
+# ===============================
+class RastreadorMao:
+    """Roda o Hands numa imagem pequena: o frame inteiro reduzido ou um recorte da mão.
+
+    Enquanto a mão está sendo rastreada, só um quadrado em volta dos landmarks do
+    frame anterior é processado; quando ela se perde, volta a procurar no frame
+    inteiro reduzido. Com max_maos=2 o quadrado cobre as duas mãos, e enquanto só
+    uma é rastreada o frame inteiro é revisto a cada intervalo_busca frames para
+    achar a outra. Toda entrada tem o mesmo tamanho (LADO_ENTRADA x LADO_ENTRADA),
+    e os landmarks são convertidos de volta para coordenadas do frame completo,
+    então normalizar_landmarks e o desenho continuam iguais.
+
+    O Hands de vídeo reaproveita as mãos da chamada anterior, nas coordenadas
+    daquela entrada. Por isso o frame inteiro e o ROI não dividem o mesmo grafo:
+    com hands_busca, as buscas no frame inteiro vão para ele; sem, o grafo é
+    reiniciado (reset) ao trocar de geometria enquanto guarda mãos da outra.
+    """
+
+    def __init__(self, hands, lado_entrada=LADO_ENTRADA, margem=MARGEM_ROI, usar_roi=True,
+                 max_maos=1, intervalo_busca=INTERVALO_BUSCA, hands_busca=None):
+        self.hands = hands
+        self.hands_busca = hands_busca
+        self.lado_entrada = lado_entrada
+        self.margem = margem
+        self.usar_roi = usar_roi
+        self.max_maos = max_maos
+        self.intervalo_busca = intervalo_busca
+        self._roi = None            # (x0, y0, lado) em pixels do frame completo
+        self._frames_roi = 0        # frames seguidos no ROI com menos de max_maos mãos
+        self.buscas_completas = 0
+        self.buscas_roi = 0
+        self.perdas = 0             # vezes em que a mão sumiu do ROI do frame anterior
+        self.resets = 0             # reinícios do grafo por troca de geometria (sem hands_busca)
+        self._estado_hands = (None, False, False)  # (grafo, entrada era o frame inteiro, achou mãos)
+
+    def processar(self, frame_bgr, quadro=QUADRO_NULO, rgb=False):
+        """Retorna o resultado do Hands com landmarks em coordenadas do frame completo.
+
+        quadro (instrumentacao.Quadro) recebe o tempo de cada etapa, se a medição estiver ligada.
+        Com rgb=True o frame já está em RGB e a conversão de cor é pulada.
+        """
+        if self.lado_entrada is None:
+            entrada = frame_bgr if rgb else cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            quadro.etapa("cvtColor_entrada")
+            resultado = self.hands.process(entrada)
+            quadro.etapa("hands.process")
+            return resultado
+
+        alt, larg = frame_bgr.shape[:2]
+        resultado = None
+        if self.usar_roi and self._roi is not None and self._frames_roi < self.intervalo_busca:
+            self.buscas_roi += 1
+            resultado = self._processar_quadrado(frame_bgr, *self._roi, quadro, rgb)
+            if not resultado.multi_hand_landmarks:
+                resultado = None
+                self.perdas += 1
+        if resultado is None:
+            # rastreio perdido (ou desligado): procura no frame inteiro reduzido
+            self.buscas_completas += 1
+            lado = max(larg, alt)
+            resultado = self._processar_quadrado(frame_bgr, (larg - lado) / 2, (alt - lado) / 2, lado,
+                                                 quadro, rgb, completo=True)
+
+        self._roi = None
+        if resultado.multi_hand_landmarks:
+            self._roi = self._roi_de(resultado.multi_hand_landmarks, larg, alt)
+            if len(resultado.multi_hand_landmarks) < self.max_maos:
+                self._frames_roi += 1
+            else:
+                self._frames_roi = 0
+        if self._frames_roi > self.intervalo_busca:
+            self._frames_roi = 0
+        return resultado
+
+    def _grafo(self, completo):
+        """Hands para esta entrada (frame inteiro ou ROI), sem ponto de partida de outra geometria."""
+        if completo and self.hands_busca is not None:
+            return self.hands_busca
+        anterior, completo_anterior, com_maos = self._estado_hands
+        if anterior is self.hands and com_maos and completo != completo_anterior:
+            self.hands.reset()
+            self.resets += 1
+        return self.hands
+
+    def _processar_quadrado(self, frame_bgr, x0, y0, lado, quadro=QUADRO_NULO, rgb=False, completo=False):
+        alt, larg = frame_bgr.shape[:2]
+        s = self.lado_entrada / lado
+        # recorte + redução + borda preta num único warp
+        m = np.float32([[s, 0, -x0 * s], [0, s, -y0 * s]])
+        entrada = cv2.warpAffine(frame_bgr, m, (self.lado_entrada, self.lado_entrada),
+                                 flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        quadro.etapa("warpAffine")
+        if not rgb:
+            entrada = cv2.cvtColor(entrada, cv2.COLOR_BGR2RGB)
+            quadro.etapa("cvtColor_entrada")
+        hands = self._grafo(completo)
+        resultado = hands.process(entrada)
+        quadro.etapa("hands.process")
+        if hands is self.hands:
+            self._estado_hands = (hands, completo, bool(resultado.multi_hand_landmarks))
+        for hand_landmarks in resultado.multi_hand_landmarks or []:
+            for lm in hand_landmarks.landmark:
+                lm.x = (x0 + lm.x * lado) / larg
+                lm.y = (y0 + lm.y * lado) / alt
+                # z do MediaPipe tem a mesma escala de x
+                lm.z = lm.z * lado / larg
+        quadro.etapa("mapeamento_roi")
+        return resultado
+
+    def _roi_de(self, multi_hand_landmarks, larg, alt):
+        xs = [lm.x * larg for mao in multi_hand_landmarks for lm in mao.landmark]
+        ys = [lm.y * alt for mao in multi_hand_landmarks for lm in mao.landmark]
+        cx, cy = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+        tamanho = max(max(xs) - min(xs), max(ys) - min(ys))
+        lado = max(tamanho * (1 + 2 * self.margem), LADO_MIN_ROI * max(larg, alt))
+        return cx - lado / 2, cy - lado / 2, lado
+
+def maos_do_resultado(resultado):
+    """[(lado, coords)] de cada mão detectada, na ordem do MediaPipe; lado é "Esquerda", "Direita" ou None."""
+    maos = []
+    lados = resultado.multi_handedness or []
+    for i, hand_landmarks in enumerate(resultado.multi_hand_landmarks or []):
+        lado = LADOS_MEDIAPIPE.get(lados[i].classification[0].label) if i < len(lados) else None
+        maos.append((lado, [(lm.x,lm.y,lm.z) for lm in hand_landmarks.landmark]))
+    return maos
@@ -0,0 +1,258 @@
+import math
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# ===============================
+# Constantes
+# ===============================
+NUM_PONTOS = 21
+LIMIAR_RECONHECIMENTO = 0.40
+LIMIAR_MOVIMENTO = 0.03     # maior variação por coordenada normalizada tratada como "mão parada"
+SEM_GESTO = "---"
+SEPARADOR_AMOSTRA = "#"     # "A#1", "A#2": vários templates do mesmo gesto, reconhecidos como "A"
+
+Resultado = namedtuple("Resultado", ["nome", "distancia", "top_k", "margem", "margem_limiar"])
+
+# ===============================
+# Nomes no banco
+# ===============================
+def chave_amostra(nome, i):
+    """Nome da linha no banco para o i-ésimo template de um gesto com vários."""
+    return f"{nome}{SEPARADOR_AMOSTRA}{i}"
+
+def nome_gesto(chave):
+    """Nome do gesto de uma linha do banco ("A#2" -> "A"; sem sufixo numérico, a própria chave)."""
+    nome, sep, i = chave.rpartition(SEPARADOR_AMOSTRA)
+    return nome if sep and nome and i.isdigit() else chave
+
+# ===============================
+# Normalização e Distância
+# ===============================
+def normalizar_array(landmarks):
+    """Centraliza no pulso (ponto 0) e divide pela distância média ao pulso.
+
+    Retorna um array (21, 3) float64 com os mesmos valores, bit a bit, da
+    versão em listas (benchmark.normalizar_landmarks_antigo).
+    """
+    pts = np.array(landmarks, dtype=np.float64).reshape(-1, 3)
+    if len(pts) == 0:
+        return pts
+
+    centralizados = pts - pts[0]
+    # o ** do Python usa pow() da libm, que às vezes difere de x*x no último bit;
+    # elevar ao quadrado pelo mesmo caminho mantém os resultados bit a bit
+    quad = np.array([v**2 for v in centralizados.ravel().tolist()]).reshape(-1, 3)
+    normas = np.sqrt(quad[:, 0] + quad[:, 1] + quad[:, 2])
+
+    # soma sequencial e divisão pelo total de pontos, igual ao sum() original
+    escala = sum(normas.tolist()) / len(centralizados)
+    if escala == 0: escala = 1.0
+
+    return centralizados / escala
+
+def normalizar_landmarks(landmarks):
+    if landmarks is None or len(landmarks) == 0:
+        return []
+    return normalizar_array(landmarks).tolist()
+
+def media_distancia(a,b):
+    if not a or not b or len(a)!=len(b):
+        return float("inf")
+    s = sum([math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2 + (p1[2]-p2[2])**2)
+             for p1,p2 in zip(a,b)])
+    return s/len(a)
+
+def distancias_medias(vetores, q):
+    """media_distancia de q (63,) contra cada linha de vetores (N, 63), de uma só vez.
+
+    É a média das normas dos 21 pontos, portanto uma métrica (vale a desigualdade
+    triangular).
+    """
+    diff = vetores - q
+    diff *= diff
+    s = diff[:, 0::3] + diff[:, 1::3]
+    s += diff[:, 2::3]
+    np.sqrt(s, out=s)
+    return s.mean(axis=1)
+
+BLOCO_LOTE = 1 << 16        # elementos por bloco no cálculo em lote (~512 KB de float64, cabe no cache)
+
+def distancias_medias_lote(vetores, consultas):
+    """distancias_medias de cada consulta (B, 63) contra vetores (N, 63): matriz (B, N).
+
+    Faz as mesmas operações na mesma ordem, então cada linha é igual bit a bit à
+    chamada individual. O banco é percorrido em blocos para limitar a memória.
+    """
+    b, dim = consultas.shape
+    saida = np.empty((b, len(vetores)))
+    passo = max(1, BLOCO_LOTE // max(b * dim, 1))
+    for i in range(0, len(vetores), passo):
+        diff = vetores[None, i:i + passo] - consultas[:, None]
+        diff *= diff
+        s = diff[..., 0::3] + diff[..., 1::3]
+        s += diff[..., 2::3]
+        np.sqrt(s, out=s)
+        saida[:, i:i + passo] = s.mean(axis=2)
+    return saida
+
+# ===============================
+# Reconhecedor vetorizado
+# ===============================
+class ReconhecedorGestos:
+    """Banco de gestos em um array contíguo (N, 21, 3) comparado de uma só vez."""
+
+    def __init__(self, gestos=None, limiar=LIMIAR_RECONHECIMENTO):
+        # a busca pode rodar numa thread de inferência enquanto a tela de salvar insere
+        self._trava = threading.RLock()
+        self.limiar = limiar
+        self._definir([], np.empty((0, NUM_PONTOS, 3), dtype=np.float64))
+        if gestos:
+            self.carregar(gestos)
+
+    @classmethod
+    def de_array(cls, nomes, templates, limiar=LIMIAR_RECONHECIMENTO):
+        """Usa um array já pronto (ex.: memmap) sem copiar, quando possível."""
+        rec = cls(limiar=limiar)
+        rec._definir(list(nomes), np.ascontiguousarray(templates, dtype=np.float64).reshape(-1, NUM_PONTOS, 3))
+        return rec
+
+    def carregar(self, gestos):
+        nomes, templates = [], []
+        for nome, coords in gestos.items():
+            arr = np.asarray(coords, dtype=np.float64)
+            # entradas com formato diferente nunca casariam (distância infinita)
+            if arr.shape != (NUM_PONTOS, 3):
+                continue
+            nomes.append(nome)
+            templates.append(arr)
+        if templates:
+            self._definir(nomes, np.ascontiguousarray(np.stack(templates)))
+        else:
+            self._definir(nomes, np.empty((0, NUM_PONTOS, 3), dtype=np.float64))
+
+    def _definir(self, nomes, templates):
+        self.nomes = nomes
+        self.templates = templates
+        self._linhas = {nome: i for i, nome in enumerate(nomes)}
+        self.versao = getattr(self, "versao", 0) + 1
+
+    def adicionar(self, nome, coords_normalizadas):
+        """Insere ou substitui um gesto; retorna a linha dele no banco."""
+        with self._trava:
+            self.versao += 1
+            arr = np.asarray(coords_normalizadas, dtype=np.float64).reshape(1, NUM_PONTOS, 3)
+            if nome in self._linhas:
+                i = self._linhas[nome]
+                if not self.templates.flags.writeable:
+                    # banco vindo de um memmap somente leitura
+                    self.templates = np.array(self.templates)
+                self.templates[i] = arr[0]
+                return i
+            self.nomes.append(nome)
+            self._linhas[nome] = len(self.nomes) - 1
+            self.templates = np.ascontiguousarray(np.concatenate([self.templates, arr]))
+            return len(self.nomes) - 1
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def distancias(self, atual_norm):
+        """Distância média ponto a ponto entre a mão atual e todos os templates."""
+        atual = np.asarray(atual_norm, dtype=np.float64).reshape(NUM_PONTOS * 3)
+        return distancias_medias(self.templates.reshape(-1, NUM_PONTOS * 3), atual)
+
+    def reconhecer(self, coords_atual, k=3):
+        """Normaliza as coordenadas cruas e retorna o melhor gesto, o top-k e as margens."""
+        if len(self.nomes) == 0 or coords_atual is None or len(coords_atual) != NUM_PONTOS:
+            return Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        return self.reconhecer_normalizado(normalizar_array(coords_atual), k)
+
+    def reconhecer_normalizado(self, atual_norm, k=3):
+        with self._trava:
+            if len(self.nomes) == 0:
+                return Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+            d = self.distancias(atual_norm)
+            return self._resultado(d, k)
+
+    def reconhecer_lote(self, lista_coords, k=1):
+        """Reconhece várias mãos de uma vez (uma matriz de distâncias só).
+
+        Retorna um Resultado por mão, na mesma ordem; mãos sem 21 pontos dão "---".
+        """
+        vazio = Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        resultados = [vazio] * len(lista_coords)
+        validas = [i for i, c in enumerate(lista_coords) if c is not None and len(c) == NUM_PONTOS]
+        if not validas:
+            return resultados
+        consultas = np.stack([normalizar_array(lista_coords[i]).reshape(NUM_PONTOS * 3) for i in validas])
+        with self._trava:
+            if len(self.nomes) == 0:
+                return resultados
+            d = distancias_medias_lote(self.templates.reshape(-1, NUM_PONTOS * 3), consultas)
+            for linha, i in enumerate(validas):
+                resultados[i] = self._resultado(d[linha], k)
+        return resultados
+
+    def _resultado(self, d, k):
+        return resultado_de_distancias(self.nomes, d, k, self.limiar)
+
+def resultado_de_distancias(nomes, d, k, limiar):
+    """Monta o Resultado (melhor, top-k e margens) a partir das distâncias para cada nome."""
+    k = max(1, min(k, len(d)))
+    candidatos = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+    ordem = candidatos[np.lexsort((candidatos, d[candidatos]))]
+    top_k = [(nomes[i], float(d[i])) for i in ordem]
+
+    # em caso de empate, o primeiro template vence (igual ao laço original)
+    melhor_idx = int(np.argmin(d))
+    melhor_val = float(d[melhor_idx])
+
+    if len(d) > 1:
+        segundo = float(np.partition(d, 1)[1])
+        margem = segundo - melhor_val
+    else:
+        margem = float("inf")
+
+    nome = nome_gesto(nomes[melhor_idx]) if melhor_val <= limiar else SEM_GESTO
+    return Resultado(nome, melhor_val, top_k, margem, limiar - melhor_val)
+
+# ===============================
+# Portão de movimento
+# ===============================
+class PortaoMovimento:
+    """Reaproveita o último resultado enquanto a mão praticamente não se mexe.
+
+    A comparação é com os landmarks do último reconhecimento feito de fato (não do
+    frame anterior), então um movimento lento não se acumula sem ser visto. Se cada
+    coordenada muda no máximo delta, a distância para qualquer template muda no
+    máximo sqrt(3) * delta, o que mantém o resultado estável para limiares pequenos.
+    """
+
+    def __init__(self, reconhecedor, limiar_movimento=LIMIAR_MOVIMENTO):
+        self.reconhecedor = reconhecedor
+        self.limiar_movimento = limiar_movimento
+        self.frames = 0
+        self.pulados = 0
+        self._ultimo_norm = None
+        self._ultimo_resultado = None
+        self._versao = None
+
+    def reconhecer(self, coords_atual, k=1):
+        if coords_atual is None or len(coords_atual) != NUM_PONTOS:
+            return self.reconhecedor.reconhecer(coords_atual, k)
+        self.frames += 1
+        atual = normalizar_array(coords_atual)
+        if (self._ultimo_norm is not None and self._versao == self.reconhecedor.versao
+                and np.abs(atual - self._ultimo_norm).max() < self.limiar_movimento):
+            self.pulados += 1
+            return self._ultimo_resultado
+
+        self._versao = self.reconhecedor.versao
+        self._ultimo_resultado = self.reconhecedor.reconhecer_normalizado(atual, k)
+        self._ultimo_norm = atual
+        return self._ultimo_resultado
+
+    def taxa_pulos(self):
+        return self.pulados / self.frames if self.frames else 0.0
@@ -0,0 +1,170 @@
+import os
+import threading
+
+from pipeline_camera import PipelineVisao, PipelineReproducao, Assinatura
+from qualidade_visao import ControladorQualidade
+from fontes_quadros import GravadorLandmarks, GravacaoLandmarks, abrir_fonte, e_gravacao, interpretar_fonte
+
+# ===============================
+# Configuração
+# ===============================
+INDICE_CAMERA = 0
+# câmera, vídeo, pasta de imagens ou gravação .lmk; veja fontes_quadros
+FONTE = os.environ.get("LIBRAS_FONTE") or INDICE_CAMERA
+ESPERA_ENCERRAMENTO = 5.0   # segundos que uma nova abertura espera a captura anterior largar o modelo
+# grava as mãos de cada frame processado num .lmk, para reproduzir depois
+ARQUIVO_GRAVACAO = os.environ.get("LIBRAS_GRAVAR") or None
+# duas mãos: sinais de Libras feitos com as duas mãos também são salvos e reconhecidos
+OPCOES_HANDS = dict(max_num_hands=2,
+                    model_complexity=1,
+                    min_detection_confidence=0.6,
+                    min_tracking_confidence=0.6)
+# lado_entrada=None desliga a redução/ROI e processa o frame inteiro como antes
+OPCOES_RASTREIO = dict(lado_entrada=256, margem=0.35, usar_roi=True,
+                       max_maos=OPCOES_HANDS["max_num_hands"])
+
+# ===============================
+# Serviço de visão compartilhado
+# ===============================
+class ServicoVisao:
+    """Uma câmera e um MediaPipe Hands para o processo inteiro.
+
+    Cada janela chama assinar() e recebe a própria fila de resultados. A câmera é
+    aberta na primeira assinatura e liberada quando a última é cancelada; o modelo
+    é criado e aquecido uma vez só e reaproveitado entre aberturas. Se a fonte é
+    uma gravação de landmarks, o MediaPipe nem é carregado. Abrir e parar a
+    câmera acontece em threads à parte (o Tk nunca espera): a assinatura volta na
+    hora e os resultados começam a chegar quando o pipeline fica pronto, e uma
+    nova abertura só usa o modelo depois que a thread de inferência anterior saiu.
+    """
+
+    def __init__(self, fonte=FONTE, opcoes_hands=None, opcoes_rastreio=None, gravar=ARQUIVO_GRAVACAO):
+        self.fonte = interpretar_fonte(fonte)
+        self.gravar = gravar
+        self.opcoes_hands = dict(OPCOES_HANDS if opcoes_hands is None else opcoes_hands)
+        self.opcoes_rastreio = dict(OPCOES_RASTREIO if opcoes_rastreio is None else opcoes_rastreio)
+        self._trava = threading.Lock()
+        self._encerrou = threading.Condition(self._trava)
+        # o controlador guarda o Hands em uso (que pode ser trocado por outro nível)
+        self.qualidade = ControladorQualidade(self.opcoes_hands, self.opcoes_rastreio)
+        self._pipeline = None
+        self._abrindo = False       # uma thread está criando o pipeline
+        self._pendentes = []        # assinaturas esperando o pipeline que está sendo aberto
+        self._encerrando = None     # pipeline antigo parando numa thread à parte
+        self._ativas = set()        # assinaturas ainda não canceladas (pendentes ou no pipeline)
+
+    def aquecer(self):
+        """Cria o grafo do Hands e roda um frame vazio para carregar o modelo."""
+        if e_gravacao(self.fonte):
+            return None
+        return self.qualidade.iniciar()
+
+    def assinar(self, processar=None):
+        """Nova assinatura, sem esperar a câmera abrir (chamado pelo Tk).
+
+        Se a abertura falhar, a assinatura é interrompida (ativo False, erro com o motivo).
+        """
+        assinatura = Assinatura(processar, ao_cancelar=self._cancelar)
+        with self._trava:
+            self._ativas.add(assinatura)
+            if self._pipeline is not None:
+                self._pipeline.adicionar_assinatura(assinatura)
+                return assinatura
+            self._pendentes.append(assinatura)
+            if not self._abrindo:
+                self._abrindo = True
+                threading.Thread(target=self._abrir, daemon=True).start()
+        return assinatura
+
+    def _abrir(self):
+        """Thread de abertura: espera a captura anterior, aquece o modelo e liga os pendentes."""
+        try:
+            with self._trava:
+                self._esperar_encerramento()
+            # o aquecimento e a abertura da câmera levam segundos: fora da trava
+            pipeline = self._criar_pipeline(self.aquecer())
+        except Exception as erro:
+            print("[visão] falha ao abrir a câmera:", erro)
+            with self._trava:
+                self._abrindo = False
+                pendentes, self._pendentes = self._pendentes, []
+                self._ativas.difference_update(pendentes)
+            for assinatura in pendentes:
+                assinatura.interromper(erro)
+            return
+        with self._trava:
+            self._abrindo = False
+            pendentes, self._pendentes = self._pendentes, []
+            pipeline.iniciar()
+            if pendentes:
+                self._pipeline = pipeline
+                for assinatura in pendentes:
+                    pipeline.adicionar_assinatura(assinatura)
+                return
+            # todas as janelas fecharam enquanto abria
+            self._encerrando = pipeline
+        threading.Thread(target=self._encerrar, args=(pipeline,), daemon=True).start()
+
+    def _criar_pipeline(self, hands):
+        if e_gravacao(self.fonte):
+            return PipelineReproducao(GravacaoLandmarks(self.fonte), gravador=self._gravador())
+        cap = abrir_fonte(self.fonte)
+        if not cap.isOpened():
+            cap.release()
+            raise OSError(f"não foi possível abrir a fonte {self.fonte}")
+        return PipelineVisao(cap, hands, self.opcoes_rastreio, self._gravador(), qualidade=self.qualidade)
+
+    def _gravador(self):
+        # cada abertura da câmera grava por cima do mesmo arquivo
+        return GravadorLandmarks(self.gravar) if self.gravar else None
+
+    def _cancelar(self, assinatura):
+        with self._trava:
+            if assinatura not in self._ativas:
+                # já descartada por uma abertura que falhou
+                return
+            self._ativas.discard(assinatura)
+            if assinatura in self._pendentes:
+                # a thread de abertura encerra o pipeline se não sobrar ninguém
+                self._pendentes.remove(assinatura)
+                return
+            self._pipeline.remover_assinatura(assinatura)
+            if self._ativas:
+                return
+            antigo, self._pipeline = self._pipeline, None
+            self._encerrando = antigo
+        # parar() junta as threads (até alguns segundos): fora da trava e fora do Tk
+        threading.Thread(target=self._encerrar, args=(antigo,), daemon=True).start()
+
+    def _encerrar(self, pipeline):
+        pipeline.parar(fechar_hands=False)
+        # o Hands é do serviço: só fica livre quando a thread de inferência saiu de fato
+        while not pipeline.aguardar(1.0):
+            pass
+        with self._trava:
+            if self._encerrando is pipeline:
+                self._encerrando = None
+            self._encerrou.notify_all()
+
+    def _esperar_encerramento(self):
+        """Com a trava, na thread de abertura: espera o pipeline anterior largar o Hands."""
+        if self._encerrou.wait_for(lambda: self._encerrando is None, ESPERA_ENCERRAMENTO):
+            return
+        # a thread antiga continua presa no Hands: o próximo pipeline usa grafos novos
+        print("[visão] a captura anterior não terminou; criando outro modelo")
+        self._encerrando = None
+        self.qualidade = ControladorQualidade(self.opcoes_hands, self.opcoes_rastreio)
+
+    @property
+    def pipeline(self):
+        return self._pipeline
+
+_servico = None
+_trava_servico = threading.Lock()
+
+def obter_servico():
+    global _servico
+    with _trava_servico:
+        if _servico is None:
+            _servico = ServicoVisao()
+        return _servico
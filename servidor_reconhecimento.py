@@ -0,0 +1,336 @@
+"""Servidor de reconhecimento compartilhado (asyncio, TCP local ou socket Unix).
+
+Uso:
+    python servidor_reconhecimento.py                       # 127.0.0.1:8765
+    python servidor_reconhecimento.py --unix /tmp/libras.sock
+
+Protocolo: uma linha JSON por pedido e uma por resposta, na mesma ordem.
+    {"id": 1, "sessao": "quiosque1", "maos": [[[x, y, z], ... 21 pontos], ...],
+     "lados": ["Esquerda", "Direita"]}                      # lados é opcional
+    -> {"id": 1, "gestos": [{"nome": "A", "distancia": 0.12}],
+        "gesto": {"nome": "A", "distancia": 0.12}, "frase": "Bom dia"}
+    {"id": 2, "sessao": "quiosque1", "tipo": "reiniciar"}   -> limpa o histórico de frases
+    {"id": 3, "tipo": "estatisticas"}
+
+"gestos" tem o gesto de uma mão de cada mão; "gesto" é o que vai para a frase,
+como nas janelas de câmera: com duas mãos, um gesto de duas mãos que case com
+elas vence o melhor gesto de uma mão. Pedidos que
+chegam juntos (de qualquer conexão) são reconhecidos num lote só. O banco de
+gestos e o frases_salvas.json são recarregados quando mudam no disco.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from reconhecedor import ReconhecedorGestos, NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO
+from duas_maos import ReconhecedorDuasMaos, separar_banco, LADOS
+from indice_gestos import IndiceGestos
+from armazenamento_gestos import ArmazemGestos, migrar_se_preciso
+from frases import ARQUIVO_FRASES, AutomatoFrases, HistoricoFrases, carregar_frases
+
+# ===============================
+# Configuração
+# ===============================
+ENDERECO = "127.0.0.1"
+PORTA = 8765
+MAX_LOTE = 64               # pedidos por lote
+JANELA_LOTE = 0.001         # segundos esperando mais pedidos depois do primeiro
+INTERVALO_RECARGA = 1.0     # segundos entre verificações dos arquivos
+SESSAO_EXPIRA = 600.0       # segundos sem pedidos até a sessão ser esquecida
+LIMITE_LINHA = 1 << 20
+
+def _mao_valida(mao):
+    """21 pontos [x, y, z], todos números finitos."""
+    if not (isinstance(mao, list) and len(mao) == NUM_PONTOS
+            and all(isinstance(p, list) and len(p) == 3 for p in mao)):
+        return False
+    coords = np.asarray(mao)
+    # strings e None viram dtype de texto/objeto e são recusados aqui
+    return coords.dtype.kind in "iuf" and bool(np.isfinite(coords).all())
+
+def _gesto_json(r):
+    return {"nome": r.nome, "distancia": None if r.distancia == float("inf") else round(r.distancia, 4)}
+
+# ===============================
+# Servidor
+# ===============================
+class ServidorReconhecimento:
+    def __init__(self, base_gestos="gestos_salvos", arquivo_frases=ARQUIVO_FRASES,
+                 usar_indice=False, max_lote=MAX_LOTE, janela_lote=JANELA_LOTE):
+        self.base_gestos = base_gestos
+        self.armazem = ArmazemGestos(base_gestos)
+        self.arquivo_frases = arquivo_frases
+        self.usar_indice = usar_indice
+        self.max_lote = max_lote
+        self.janela_lote = janela_lote
+        self.reconhecedor = None
+        self.duas_maos = None
+        self.automato = None
+        self._assinatura_gestos = None
+        self._assinatura_frases = None
+        self._sessoes = {}          # sessao -> [HistoricoFrases, último uso]
+        self._fila = None
+        # um worker só: os lotes rodam em ordem, então o histórico de cada sessão também
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.pedidos = 0
+        self.lotes = 0
+        self.recargas = 0
+
+    # -------------------------------
+    # Dados e recarga
+    # -------------------------------
+    def _assinatura(self, caminhos):
+        assinatura = []
+        for caminho in caminhos:
+            try:
+                st = os.stat(caminho)
+                assinatura.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                assinatura.append(None)
+        return assinatura
+
+    def _carregar_gestos(self):
+        migrar_se_preciso(self.base_gestos + ".json", self.base_gestos)
+        assinatura = self._assinatura([self.armazem.arquivo_dados, self.armazem.arquivo_nomes])
+        nomes, templates = self.armazem.carregar()
+        # cópia em memória: um memmap aberto impediria o app de reescrever o arquivo no Windows
+        (nomes, templates), (chaves, partes) = separar_banco(nomes, np.array(templates))
+        classe = IndiceGestos if self.usar_indice else ReconhecedorGestos
+        self.reconhecedor = classe.de_array(nomes, templates, limiar=LIMIAR_RECONHECIMENTO)
+        self.duas_maos = ReconhecedorDuasMaos(chaves, partes, limiar=LIMIAR_RECONHECIMENTO)
+        self._assinatura_gestos = assinatura
+
+    def _carregar_frases(self):
+        assinatura = self._assinatura([self.arquivo_frases])
+        self.automato = AutomatoFrases(carregar_frases(self.arquivo_frases))
+        self._assinatura_frases = assinatura
+        for sessao in self._sessoes.values():
+            sessao[0].trocar_automato(self.automato)
+
+    def _recarregar_se_mudou(self):
+        """Roda no executor, entre lotes, para não trocar os dados no meio de um."""
+        mudou = False
+        if self._assinatura([self.armazem.arquivo_dados, self.armazem.arquivo_nomes]) != self._assinatura_gestos:
+            self._carregar_gestos()
+            mudou = True
+        if self._assinatura([self.arquivo_frases]) != self._assinatura_frases:
+            self._carregar_frases()
+            mudou = True
+        agora = time.monotonic()
+        for sessao in [s for s, (_, uso) in self._sessoes.items() if agora - uso > SESSAO_EXPIRA]:
+            del self._sessoes[sessao]
+        if mudou:
+            self.recargas += 1
+            print(f"Dados recarregados: {len(self.reconhecedor)} gestos, {len(self.automato.frases)} frases")
+
+    async def _vigiar_arquivos(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(INTERVALO_RECARGA)
+            try:
+                await loop.run_in_executor(self._executor, self._recarregar_se_mudou)
+            except Exception as erro:
+                # arquivo no meio de uma gravação: tenta de novo na próxima volta
+                print("Falha ao recarregar:", erro)
+
+    # -------------------------------
+    # Lotes
+    # -------------------------------
+    async def _agrupar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            if self.janela_lote > 0 and self._fila.empty():
+                # pouca carga: espera um instante para outros pedidos entrarem no lote
+                await asyncio.sleep(self.janela_lote)
+            while len(lote) < self.max_lote and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            # enquanto este lote roda, os próximos pedidos se acumulam na fila
+            try:
+                respostas = await loop.run_in_executor(self._executor, self._processar_lote,
+                                                       [pedido for pedido, _ in lote])
+            except Exception as erro:
+                respostas = [{"id": pedido.get("id"), "erro": str(erro)} for pedido, _ in lote]
+            for (_, futuro), resposta in zip(lote, respostas):
+                if not futuro.done():
+                    futuro.set_result(resposta)
+
+    def _processar_lote(self, pedidos):
+        self.lotes += 1
+        self.pedidos += len(pedidos)
+        maos, donos = [], []
+        for i, pedido in enumerate(pedidos):
+            for coords in pedido["maos"]:
+                maos.append(coords)
+                donos.append(i)
+        por_pedido = [[] for _ in pedidos]
+        try:
+            resultados = self.reconhecedor.reconhecer_lote(maos, k=1)
+            for dono, r in zip(donos, resultados):
+                por_pedido[dono].append(r)
+        except Exception:
+            # um pedido ruim não derruba o lote: cada um é reconhecido sozinho e só ele falha
+            for i, pedido in enumerate(pedidos):
+                try:
+                    por_pedido[i] = self.reconhecedor.reconhecer_lote(pedido["maos"], k=1)
+                except Exception as erro:
+                    por_pedido[i] = erro
+
+        agora = time.monotonic()
+        respostas = []
+        for pedido, resultados_pedido in zip(pedidos, por_pedido):
+            try:
+                if isinstance(resultados_pedido, Exception):
+                    raise resultados_pedido
+                respostas.append(self._responder_pedido(pedido, resultados_pedido, agora))
+            except Exception as erro:
+                respostas.append({"id": pedido.get("id"), "erro": str(erro)})
+        return respostas
+
+    def _responder_pedido(self, pedido, resultados_pedido, agora):
+        sessao = self._sessao(pedido.get("sessao", ""), agora)
+        if pedido.get("_reiniciar"):
+            sessao[0] = HistoricoFrases(self.automato)
+            return {"id": pedido.get("id"), "ok": True}
+        resposta = {"id": pedido.get("id"), "gestos": [_gesto_json(r) for r in resultados_pedido]}
+        historico = sessao[0]
+        if resultados_pedido:
+            gesto = resultados_pedido[0]
+            if len(resultados_pedido) > 1:
+                maos = list(zip(pedido.get("lados") or [None] * len(pedido["maos"]), pedido["maos"]))
+                gesto = self.duas_maos.reconhecer(maos, k=1)
+                if gesto.nome == SEM_GESTO:
+                    gesto = min(resultados_pedido[:2], key=lambda r: r.distancia)
+            resposta["gesto"] = _gesto_json(gesto)
+            historico.atualizar(gesto.nome)
+        resposta["frase"] = historico.frases_atuais[0] if historico.frases_atuais else ""
+        return resposta
+
+    def _sessao(self, nome, agora):
+        sessao = self._sessoes.get(nome)
+        if sessao is None:
+            sessao = self._sessoes[nome] = [HistoricoFrases(self.automato), agora]
+        sessao[1] = agora
+        return sessao
+
+    # -------------------------------
+    # Conexões
+    # -------------------------------
+    def _tratar(self, pedido, futuro):
+        tipo = pedido.get("tipo", "reconhecer")
+        if tipo == "reconhecer":
+            maos = pedido.get("maos")
+            if maos is None and "landmarks" in pedido:
+                maos = [pedido["landmarks"]]
+            if not isinstance(maos, list) or not all(_mao_valida(m) for m in maos):
+                futuro.set_result({"id": pedido.get("id"), "erro": "maos deve ser uma lista de mãos 21x3"})
+                return
+            lados = pedido.get("lados")
+            if lados is not None and (not isinstance(lados, list) or len(lados) != len(maos)
+                                      or not all(lado is None or lado in LADOS for lado in lados)):
+                futuro.set_result({"id": pedido.get("id"), "erro": f"lados deve ter um de {LADOS} (ou null) por mão"})
+                return
+            pedido["maos"] = maos
+            self._fila.put_nowait((pedido, futuro))
+        elif tipo == "reiniciar":
+            # vai pela fila para respeitar a ordem dos pedidos da sessão
+            self._fila.put_nowait(({"id": pedido.get("id"), "sessao": pedido.get("sessao", ""),
+                                    "maos": [], "_reiniciar": True}, futuro))
+        elif tipo == "estatisticas":
+            futuro.set_result({"id": pedido.get("id"), "pedidos": self.pedidos, "lotes": self.lotes,
+                               "pedidos_por_lote": self.pedidos / self.lotes if self.lotes else 0.0,
+                               "sessoes": len(self._sessoes), "gestos": len(self.reconhecedor),
+                               "gestos_duas_maos": len(self.duas_maos),
+                               "frases": len(self.automato.frases), "recargas": self.recargas})
+        else:
+            futuro.set_result({"id": pedido.get("id"), "erro": f"tipo desconhecido: {tipo}"})
+
+    async def _atender(self, leitor, escritor):
+        loop = asyncio.get_running_loop()
+        pendentes = asyncio.Queue()
+        tarefa_escrita = asyncio.create_task(self._responder(escritor, pendentes))
+        try:
+            while True:
+                try:
+                    linha = await leitor.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not linha:
+                    break
+                futuro = loop.create_future()
+                try:
+                    pedido = json.loads(linha)
+                    if not isinstance(pedido, dict):
+                        raise ValueError
+                except ValueError:
+                    futuro.set_result({"erro": "JSON inválido"})
+                else:
+                    self._tratar(pedido, futuro)
+                pendentes.put_nowait(futuro)
+        finally:
+            pendentes.put_nowait(None)
+            await tarefa_escrita
+            escritor.close()
+
+    async def _responder(self, escritor, pendentes):
+        # cliente pode mandar vários pedidos sem esperar; as respostas saem na ordem
+        while True:
+            futuro = await pendentes.get()
+            if futuro is None:
+                return
+            resposta = await futuro
+            try:
+                escritor.write((json.dumps(resposta, ensure_ascii=False) + "\n").encode("utf-8"))
+                if pendentes.empty():
+                    await escritor.drain()
+            except ConnectionError:
+                return
+
+    async def rodar(self, endereco=ENDERECO, porta=PORTA, unix=None):
+        self._fila = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._carregar_gestos)
+        await loop.run_in_executor(self._executor, self._carregar_frases)
+        if unix:
+            servidor = await asyncio.start_unix_server(self._atender, path=unix, limit=LIMITE_LINHA)
+            print(f"Servidor em {unix}")
+        else:
+            servidor = await asyncio.start_server(self._atender, endereco, porta, limit=LIMITE_LINHA)
+            print(f"Servidor em {endereco}:{porta}")
+        print(f"{len(self.reconhecedor)} gestos, {len(self.automato.frases)} frases")
+        tarefas = [asyncio.create_task(self._agrupar()), asyncio.create_task(self._vigiar_arquivos())]
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            self._executor.shutdown(wait=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de reconhecimento de Libras.")
+    parser.add_argument("--endereco", default=ENDERECO)
+    parser.add_argument("--porta", type=int, default=PORTA)
+    parser.add_argument("--unix", help="caminho de um socket Unix (em vez de TCP)")
+    parser.add_argument("--gestos", default="gestos_salvos", help="base do banco de gestos (.f64/.idx)")
+    parser.add_argument("--frases", default=ARQUIVO_FRASES)
+    parser.add_argument("--indice", action="store_true", help="usa o IndiceGestos (bancos grandes)")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE)
+    parser.add_argument("--janela-lote-ms", type=float, default=JANELA_LOTE * 1000)
+    args = parser.parse_args(argv)
+
+    servidor = ServidorReconhecimento(args.gestos, args.frases, usar_indice=args.indice,
+                                      max_lote=args.max_lote, janela_lote=args.janela_lote_ms / 1000)
+    try:
+        asyncio.run(servidor.rodar(args.endereco, args.porta, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,309 @@
-import cv2
-import mediapipe as mp
+import os
+import threading
+import time
 import tkinter as tk
+import numpy as np
 from PIL import Image, ImageTk
-import json
-import os
-import math
+from reconhecedor import (normalizar_landmarks, nome_gesto, PortaoMovimento,
+                          LIMIAR_RECONHECIMENTO, SEM_GESTO)
+from indice_gestos import IndiceGestos
+from quantizacao import ReconhecedorQuantizado, TIPOS
+from duas_maos import (ReconhecedorDuasMaos, ReconhecedorMaos, separar_banco, chave_mao,
+                       LADOS, SEPARADOR_MAO)
+from trajetorias import (ReconhecedorTrajetorias, JanelaTrajetoria, normalizar_trajetoria, caminho_pulso,
+                         FORMA_TRAJETORIA, DURACAO_TRAJETORIA, QUADROS_MINIMOS, MOVIMENTO_MINIMO)
+from armazenamento_gestos import ArmazemGestos, migrar_se_preciso
+from frases import AutomatoFrases, HistoricoFrases, carregar_frases, salvar_frases
+from servico_visao import obter_servico
+from instrumentacao import obter_instrumentacao
+from agendador import AgendadorTela
 
 # ===============================
 # Arquivos de dados
 # ===============================
 ARQUIVO_GESTOS = "gestos_salvos.json"
-ARQUIVO_FRASES = "frases_salvas.json"
+BASE_GESTOS = "gestos_salvos"            # gestos_salvos.f64 + gestos_salvos.idx
+BASE_TRAJETORIAS = "trajetorias_salvas"  # gestos com movimento, mesmo formato com outra forma
+# LIBRAS_QUANTIZADO=int8 (ou float16): gestos de uma mão no ReconhecedorQuantizado, com
+# refino exato que lê só as linhas candidatas do banco float64, em vez do IndiceGestos
+QUANTIZADO = os.environ.get("LIBRAS_QUANTIZADO") or None
 
 # ===============================
 # Utilitários
 # ===============================
-def carregar_gestos():
-    if os.path.exists(ARQUIVO_GESTOS):
-        try:
-            with open(ARQUIVO_GESTOS, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def salvar_gestos(gestos):
-    with open(ARQUIVO_GESTOS, "w", encoding="utf-8") as f:
-        json.dump(gestos, f, ensure_ascii=False, indent=4)
-
-def carregar_frases():
-    if os.path.exists(ARQUIVO_FRASES):
-        try:
-            with open(ARQUIVO_FRASES, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {"frases": []}
-    return {"frases": []}
-
-def salvar_frases(frases):
-    with open(ARQUIVO_FRASES, "w", encoding="utf-8") as f:
-        json.dump(frases, f, ensure_ascii=False, indent=4)
+armazem_gestos = ArmazemGestos(BASE_GESTOS)
+armazem_trajetorias = ArmazemGestos(BASE_TRAJETORIAS, forma=FORMA_TRAJETORIA)
+
+def _migrar_gestos_se_preciso():
+    migrar_se_preciso(ARQUIVO_GESTOS, BASE_GESTOS)
+
+def salvar_gesto(nome, coords_normalizadas):
+    """Acrescenta um gesto ao banco sem reescrever os demais."""
+    _migrar_gestos_se_preciso()
+    armazem_gestos.salvar(nome, coords_normalizadas)
+
+def salvar_gesto_duas_maos(nome, partes):
+    """Grava as duas mãos de um gesto composto juntas. partes: {lado: coords normalizadas}."""
+    _migrar_gestos_se_preciso()
+    armazem_gestos.salvar_varios([(chave_mao(nome, lado), coords) for lado, coords in partes.items()])
 
 # ===============================
-# Mediapipe
+# Índice de gestos e autômato de frases compartilhados
 # ===============================
-mp_hands = mp.solutions.hands
-mp_draw = mp.solutions.drawing_utils
+_indice = None
+_duas_maos = None
+_trajetorias = None
+_automato = None
+# o aquecimento do main.py pode carregar o índice enquanto uma janela abre
+_trava_dados = threading.Lock()
+
+def _carregar_reconhecedores():
+    global _indice, _duas_maos
+    with _trava_dados:
+        if _indice is None:
+            _migrar_gestos_se_preciso()
+            (nomes, templates), (chaves, partes) = separar_banco(*armazem_gestos.carregar())
+            _duas_maos = ReconhecedorDuasMaos(chaves, partes, limiar=LIMIAR_RECONHECIMENTO)
+            if QUANTIZADO in TIPOS:
+                _indice = ReconhecedorQuantizado.de_array(nomes, templates, limiar=LIMIAR_RECONHECIMENTO,
+                                                          tipo=QUANTIZADO, refinar=True)
+            else:
+                _indice = IndiceGestos.de_array(nomes, templates, limiar=LIMIAR_RECONHECIMENTO)
+
+def obter_indice():
+    """Índice (gestos de uma mão) carregado uma vez e atualizado a cada gesto salvo (sem reconstruir).
+
+    É um IndiceGestos ou, com LIBRAS_QUANTIZADO, um ReconhecedorQuantizado.
+    """
+    _carregar_reconhecedores()
+    return _indice
+
+def obter_duas_maos():
+    """Gestos de duas mãos, carregados junto com o índice."""
+    _carregar_reconhecedores()
+    return _duas_maos
+
+def obter_trajetorias():
+    """Gestos com movimento, carregados uma vez e atualizados a cada trajetória salva."""
+    global _trajetorias
+    with _trava_dados:
+        if _trajetorias is None:
+            nomes, templates = armazem_trajetorias.carregar()
+            _trajetorias = ReconhecedorTrajetorias(nomes, np.array(templates))
+        return _trajetorias
+
+def obter_automato():
+    """Autômato de frases compartilhado; cadastrar_frases acrescenta nele sem recriar."""
+    global _automato
+    with _trava_dados:
+        if _automato is None:
+            _automato = AutomatoFrases(carregar_frases())
+        return _automato
 
 # ===============================
-# Normalização e Distância
+# Reconhecimento de um fluxo de câmera
 # ===============================
-def normalizar_landmarks(landmarks):
-    if not landmarks or len(landmarks) == 0:
-        return []
-
-    pts = [[float(p[0]), float(p[1]), float(p[2])] for p in landmarks]
-    base_x, base_y, base_z = pts[0]
-    centralizados = [[p[0]-base_x, p[1]-base_y, p[2]-base_z] for p in pts]
+ESPERA_GRAVACAO = 2.0       # segundos a mais esperando a mão aparecer ao gravar um movimento
+
+class TradutorFluxo:
+    """Estado do reconhecimento de uma câmera: portão de movimento, janela de trajetória e frases.
+
+    processar(maos, t) recebe as mãos de um frame e retorna (gesto, frase). Cada
+    câmera precisa do seu, mas os bancos de gestos e o autômato são compartilhados.
+    """
+
+    def __init__(self):
+        indice = obter_indice()
+        self.reconhecedor = ReconhecedorMaos(indice, obter_duas_maos(), uma_mao=PortaoMovimento(indice))
+        self.trajetorias = obter_trajetorias()
+        self.janela_movimento = JanelaTrajetoria()
+        self.historico = HistoricoFrases(obter_automato())
+
+    def processar(self, maos, t=None):
+        gesto = self.reconhecedor.reconhecer(maos, k=1).nome
+        if len(maos) == 1:
+            self.janela_movimento.adicionar(maos[0][1], t)
+            # mão parada: fica o gesto estático, e a DTW nem roda
+            if len(self.trajetorias) and self.janela_movimento.em_movimento():
+                movimento = self.trajetorias.reconhecer_trajetoria(self.janela_movimento.trajetoria(), k=1)
+                if movimento.nome != SEM_GESTO:
+                    gesto = movimento.nome
+        else:
+            self.janela_movimento.limpar()
+        return gesto, self.historico.atualizar(gesto)
+
+class GravacaoMovimento:
+    """Grava um movimento para salvar, na thread de inferência (como TradutorFluxo.processar).
+
+    processar(maos, t) vai na assinatura e junta as coords da primeira mão com o
+    tempo t do frame, então a duração não depende do ritmo da tela. O Tk só
+    chama iniciar() e, a cada volta, concluida().
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._nome = None
+        self._inicio = None
+        self._quadros = []
+        self._pronta = None
+        self._iniciada_em = None
+
+    def iniciar(self, nome):
+        with self._trava:
+            self._nome, self._inicio, self._quadros, self._pronta = nome, None, [], None
+            self._iniciada_em = time.perf_counter()
+
+    def processar(self, maos, t):
+        with self._trava:
+            if self._nome is None:
+                return None
+            # o movimento conta a partir do primeiro frame com mão
+            if self._inicio is None:
+                self._inicio = t
+            self._quadros.append(maos[0][1])
+            if t - self._inicio >= DURACAO_TRAJETORIA:
+                self._pronta = (self._nome, self._quadros)
+                self._nome = None
+        return None
+
+    def concluida(self):
+        """(nome, quadros) quando a gravação terminou, senão None.
+
+        Se a mão some e nenhum frame fecha a duração, desiste depois de
+        ESPERA_GRAVACAO e entrega o que tiver (poucos quadros viram erro na tela).
+        """
+        with self._trava:
+            pronta, self._pronta = self._pronta, None
+            if (pronta is None and self._nome is not None
+                    and time.perf_counter() - self._iniciada_em > DURACAO_TRAJETORIA + ESPERA_GRAVACAO):
+                pronta = (self._nome, self._quadros)
+                self._nome = None
+            return pronta
 
-    soma = sum([math.sqrt(p[0]**2+p[1]**2+p[2]**2) for p in centralizados])
-    escala = soma / len(centralizados) if len(centralizados)>0 else 1.0
-    if escala == 0: escala = 1.0
+# ===============================
+# Exibição da câmera
+# ===============================
+FPS_EXIBICAO = 30           # ritmo da tela, independente do ritmo da inferência
+
+class ExibidorCamera:
+    """Mostra os frames de uma assinatura num label, no máximo FPS_EXIBICAO vezes por segundo.
+
+    Usa um PhotoImage só (paste) em vez de criar um por frame, e pede ao pipeline
+    a imagem já reduzida para o tamanho do label. espera_ms() diz quando a janela
+    deve chamar de novo: quando houver frame novo e a tela puder desenhar.
+    """
+
+    def __init__(self, lbl_camera, assinatura, fps=FPS_EXIBICAO):
+        self.lbl = lbl_camera
+        self.assinatura = assinatura
+        self.agendador = AgendadorTela(fps)
+        self._foto = None
+        lbl_camera.bind("<Configure>", self._ao_redimensionar)
+
+    def _ao_redimensionar(self, evento):
+        borda = 2 * (int(self.lbl.cget("borderwidth")) + int(self.lbl.cget("highlightthickness")))
+        self.assinatura.tamanho_exibicao = (max(evento.width - borda, 1), max(evento.height - borda, 1))
+
+    def proximo_resultado(self):
+        """Resultado mais recente, se já for hora de desenhar; senão None (fica na fila)."""
+        if not self.agendador.pode_mostrar():
+            return None
+        return self.assinatura.obter_resultado()
+
+    def espera_ms(self):
+        """Milissegundos até o próximo tick da janela."""
+        return self.agendador.espera_ms(self.assinatura.chegada_prevista())
+
+    def mostrar_falha(self):
+        """Avisa no lugar da prévia se o pipeline parou por erro (a janela continua aberta)."""
+        if self.assinatura.erro is not None:
+            self.lbl.configure(image="", text=f"A câmera parou por um erro:\n{self.assinatura.erro}",
+                               fg="red", wraplength=400)
+            self._foto = None
+
+    def mostrar(self, resultado):
+        inst = obter_instrumentacao()
+        t0 = time.perf_counter_ns()
+        agora = time.perf_counter()
+
+        alt, larg = resultado.imagem.shape[:2]
+        # só embrulha o array; o paste copia para o Tk antes do buffer ser reusado
+        imagem = Image.frombuffer("RGB", (larg, alt), resultado.imagem, "raw", "RGB", 0, 1)
+        if self._foto is None or (self._foto.width(), self._foto.height()) != (larg, alt):
+            self._foto = ImageTk.PhotoImage(imagem)
+            self.lbl.configure(image=self._foto)
+        else:
+            self._foto.paste(imagem)
+        self.assinatura.registrar_exibicao(resultado)
+        self.agendador.mostrou(agora)
+        if inst.ativo:
+            inst.amostra("PhotoImage.paste", (time.perf_counter_ns() - t0) / 1e6)
+            inst.amostra("latencia_total", 1000 * (time.perf_counter() - resultado.t_captura))
 
-    normalizados = [[p[0]/escala, p[1]/escala, p[2]/escala] for p in centralizados]
-    return normalizados
+# ===============================
+# Medição de desempenho (LIBRAS_PERF=1 ou --perf)
+# ===============================
+INTERVALO_OVERLAY = 500     # ms entre atualizações do texto de desempenho
+
+def ligar_overlay_desempenho(janela, lbl_camera, assinatura):
+    """Texto de FPS/latência por cima da imagem da câmera, se a medição estiver ligada."""
+    inst = obter_instrumentacao()
+    if not inst.ativo:
+        return
+    lbl_overlay = tk.Label(janela, text="", font=("Consolas", 9), justify="left",
+                           bg="black", fg="#00ff00", anchor="nw")
+    lbl_overlay.place(in_=lbl_camera, x=4, y=4)
+
+    def atualizar_overlay():
+        if not assinatura.ativo:
+            return
+        fps = assinatura.estatisticas()["fps_exibicao"]
+        texto = inst.texto_overlay(fps)
+        agendador = getattr(obter_servico().pipeline, "agendador", None)
+        if agendador is not None:
+            e = agendador.estatisticas()
+            texto += (f"\ncâmera {e['fps_camera']:.0f} FPS | inferência {e['custo_ms']:.0f} ms"
+                      f" | CPU máx {100 * e['cpu_max']:.0f}%{' | ocioso' if e['ocioso'] else ''}")
+        lbl_overlay.config(text=texto)
+        janela.after(INTERVALO_OVERLAY, atualizar_overlay)
+
+    atualizar_overlay()
+
+def exportar_rastro():
+    inst = obter_instrumentacao()
+    if inst.ativo:
+        for caminho in inst.exportar():
+            print(f"Rastro de desempenho salvo em {caminho}")
+
+def ligar_indicador_qualidade(janela):
+    """Linha com o nível de qualidade do MediaPipe em uso (muda sozinho conforme a carga)."""
+    lbl_qualidade = tk.Label(janela, text="", font=("Segoe UI", 9), fg="gray")
+    lbl_qualidade.pack(side="bottom", anchor="e", padx=8)
+    servico = obter_servico()
+
+    def atualizar_indicador():
+        if not lbl_qualidade.winfo_exists():
+            return
+        if servico.pipeline is not None and getattr(servico.pipeline, "qualidade", None) is not None:
+            texto = f"{servico.qualidade.descricao()} | meta {servico.qualidade.fps_alvo:.0f} FPS"
+            if lbl_qualidade.cget("text") != texto:
+                lbl_qualidade.config(text=texto)
+        janela.after(INTERVALO_OVERLAY, atualizar_indicador)
 
-def media_distancia(a,b):
-    if not a or not b or len(a)!=len(b):
-        return float("inf")
-    s = sum([math.sqrt((p1[0]-p2[0])**2 + (p1[1]-p2[1])**2 + (p1[2]-p2[2])**2)
-             for p1,p2 in zip(a,b)])
-    return s/len(a)
+    atualizar_indicador()
 
 # ===============================
 # Função de tradução
 # ===============================
 def abrir_camera_traducao():
-    gestos_salvos = carregar_gestos()
-    frases_salvas = carregar_frases()
+    tradutor = TradutorFluxo()
 
     janela = tk.Toplevel()
     janela.title("Tradução em Tempo Real")
     janela.geometry("900x700")
 
     lbl_camera = tk.Label(janela)
-    lbl_camera.pack(pady=10)
+    lbl_camera.pack(pady=10, fill="both", expand=True)
 
     lbl_saida_gesto = tk.Label(janela, text="Gesto: ---", font=("Segoe UI", 20, "bold"))
     lbl_saida_gesto.pack(pady=5)
@@ -92,82 +311,49 @@ def abrir_camera_traducao():
     lbl_saida_frase = tk.Label(janela, text="", font=("Segoe UI", 18, "bold"), fg="blue")
     lbl_saida_frase.pack(pady=5)
 
-    cap = cv2.VideoCapture(0)
-    hands = mp_hands.Hands(max_num_hands=1,
-                           model_complexity=1,
-                           min_detection_confidence=0.6,
-                           min_tracking_confidence=0.6)
-
-    LIMIAR_RECONHECIMENTO = 0.40
-    gestos_recentes = []
     frase_atual = ""
+    textos_exibidos = {}
 
-    def reconhecer_por_coords(coords_atual):
-        atual_norm = normalizar_landmarks(coords_atual)
-        melhor = None
-        melhor_val = float("inf")
+    def mostrar_texto(lbl, texto):
+        # reconfigurar o label a cada frame custa tempo da thread do Tk à toa
+        if textos_exibidos.get(lbl) != texto:
+            lbl.config(text=texto)
+            textos_exibidos[lbl] = texto
 
-        for nome, coords_salvas in gestos_salvos.items():
-            d = media_distancia(atual_norm, coords_salvas)
-            if d < melhor_val:
-                melhor_val = d
-                melhor = nome
-        if melhor_val <= LIMIAR_RECONHECIMENTO:
-            return melhor
-        return "---"
+    # roda na thread de inferência: o histórico vê todos os frames, inclusive
+    # os que a tela pula por estar num ritmo menor
+    assinatura = obter_servico().assinar(processar=tradutor.processar)
+    exibidor = ExibidorCamera(lbl_camera, assinatura)
 
     def atualizar():
-        nonlocal gestos_recentes, frase_atual
-        ret, frame = cap.read()
-        if not ret:
-            janela.after(10, atualizar)
+        nonlocal frase_atual
+        if not assinatura.ativo:
+            exibidor.mostrar_falha()
+            return
+        resultado = exibidor.proximo_resultado()
+        if resultado is None:
+            janela.after(exibidor.espera_ms(), atualizar)
             return
 
-        frame = cv2.flip(frame,1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        resultado = hands.process(rgb)
-        gesto_atual = "---"
-
-        if resultado.multi_hand_landmarks:
-            hand_landmarks = resultado.multi_hand_landmarks[0]
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            coords = [(lm.x,lm.y,lm.z) for lm in hand_landmarks.landmark]
-            gesto_atual = reconhecer_por_coords(coords)
-
-            # Atualiza lista de gestos recentes
-            if gesto_atual != "---":
-                if len(gestos_recentes) == 0 or gestos_recentes[-1] != gesto_atual:
-                    gestos_recentes.append(gesto_atual)
-                    # Limita tamanho da lista
-                    if len(gestos_recentes) > 10:
-                        gestos_recentes.pop(0)
-
-            # Verifica se a sequência de gestos corresponde a alguma frase
-            frase_encontrada = False
-            for f in frases_salvas.get("frases", []):
-                seq = f["sequencia"]
-                if len(gestos_recentes) >= len(seq) and gestos_recentes[-len(seq):] == seq:
-                    frase_atual = f["nome"]
-                    frase_encontrada = True
-                    break
-            if not frase_encontrada:
-                frase_atual = ""
-
-        lbl_saida_gesto.config(text=f"Gesto: {gesto_atual}")
-        lbl_saida_frase.config(text=f"Frase: {frase_atual}")
-
-        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        imgtk = ImageTk.PhotoImage(image=img)
-        lbl_camera.imgtk = imgtk
-        lbl_camera.configure(image=imgtk)
-
-        janela.after(10, atualizar)
+        gesto_atual = SEM_GESTO
+
+        if resultado.coords is not None:
+            gesto_atual, frase_atual = resultado.extra
+
+        mostrar_texto(lbl_saida_gesto, f"Gesto: {gesto_atual}")
+        mostrar_texto(lbl_saida_frase, f"Frase: {frase_atual}")
+
+        exibidor.mostrar(resultado)
+
+        janela.after(exibidor.espera_ms(), atualizar)
 
     atualizar()
+    ligar_overlay_desempenho(janela, lbl_camera, assinatura)
+    ligar_indicador_qualidade(janela)
 
     def fechar():
-        try: cap.release()
-        except: pass
+        assinatura.cancelar()
+        exportar_rastro()
         janela.destroy()
 
     janela.protocol("WM_DELETE_WINDOW", fechar)
@@ -181,7 +367,7 @@ def abrir_camera_salvar_gesto():
     janela.geometry("900x700")
 
     lbl_camera = tk.Label(janela)
-    lbl_camera.pack(pady=10)
+    lbl_camera.pack(pady=10, fill="both", expand=True)
 
     tk.Label(janela, text="Nome do gesto:", font=("Segoe UI",12)).pack()
     entry_nome = tk.Entry(janela,font=("Segoe UI",12))
@@ -193,58 +379,93 @@ def abrir_camera_salvar_gesto():
     btn_salvar = tk.Button(janela, text="Salvar Gesto", font=("Segoe UI",12), bg="#c8e6c9")
     btn_salvar.pack(pady=10)
 
-    cap = cv2.VideoCapture(0)
-    hands = mp_hands.Hands(max_num_hands=1,
-                           model_complexity=1,
-                           min_detection_confidence=0.6,
-                           min_tracking_confidence=0.6)
+    btn_movimento = tk.Button(janela, text="Gravar Movimento", font=("Segoe UI",12), bg="#bbdefb")
+    btn_movimento.pack(pady=5)
 
-    gestos_existentes = carregar_gestos()
-    ultimo_coords = None
+    ultimas_maos = []
+    # o movimento é gravado na thread de inferência, com todos os frames e o tempo de cada um
+    gravacao = GravacaoMovimento()
+
+    assinatura = obter_servico().assinar(processar=gravacao.processar)
+    exibidor = ExibidorCamera(lbl_camera, assinatura)
 
     def capturar():
-        nonlocal ultimo_coords
-        ret, frame = cap.read()
-        if not ret:
-            janela.after(10, capturar)
+        nonlocal ultimas_maos
+        if not assinatura.ativo:
+            exibidor.mostrar_falha()
+            return
+        gravada = gravacao.concluida()
+        if gravada is not None:
+            salvar_movimento(*gravada)
+        resultado = exibidor.proximo_resultado()
+        if resultado is None:
+            janela.after(exibidor.espera_ms(), capturar)
             return
-        frame = cv2.flip(frame,1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        resultado = hands.process(rgb)
-        ultimo_coords = None
-        if resultado.multi_hand_landmarks:
-            hand_landmarks = resultado.multi_hand_landmarks[0]
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            ultimo_coords = [(lm.x,lm.y,lm.z) for lm in hand_landmarks.landmark]
-
-        img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        imgtk = ImageTk.PhotoImage(image=img)
-        lbl_camera.imgtk = imgtk
-        lbl_camera.configure(image=imgtk)
-
-        janela.after(10, capturar)
+        ultimas_maos = resultado.maos
+
+        exibidor.mostrar(resultado)
+
+        janela.after(exibidor.espera_ms(), capturar)
 
     capturar()
+    ligar_overlay_desempenho(janela, lbl_camera, assinatura)
+    ligar_indicador_qualidade(janela)
 
     def salvar_click():
-        nonlocal ultimo_coords
         nome = entry_nome.get().strip()
-        if not nome:
+        if not nome or SEPARADOR_MAO in nome or nome_gesto(nome) != nome:
             lbl_status.config(text="Digite um nome válido!", fg="red")
             return
-        if ultimo_coords is None:
+        if not ultimas_maos:
             lbl_status.config(text="Nenhuma mão detectada!", fg="red")
             return
-        normalizado = normalizar_landmarks(ultimo_coords)
-        gestos_existentes[nome] = normalizado
-        salvar_gestos(gestos_existentes)
-        lbl_status.config(text=f"Gesto '{nome}' salvo!", fg="green")
+        if len(ultimas_maos) == 1:
+            normalizado = normalizar_landmarks(ultimas_maos[0][1])
+            salvar_gesto(nome, normalizado)
+            obter_indice().adicionar(nome, normalizado)
+            lbl_status.config(text=f"Gesto '{nome}' salvo!", fg="green")
+            return
+        # duas mãos: uma parte por lado; se o MediaPipe não distinguir os lados,
+        # a mão mais à esquerda da imagem (já espelhada) é a esquerda
+        (lado_a, coords_a), (lado_b, coords_b) = ultimas_maos[:2]
+        if {lado_a, lado_b} != set(LADOS):
+            primeiro = coords_a[0][0] <= coords_b[0][0]
+            lado_a, lado_b = LADOS if primeiro else LADOS[::-1]
+        partes = {lado_a: normalizar_landmarks(coords_a), lado_b: normalizar_landmarks(coords_b)}
+        salvar_gesto_duas_maos(nome, partes)
+        for lado, normalizado in partes.items():
+            obter_duas_maos().adicionar(nome, lado, normalizado)
+        lbl_status.config(text=f"Gesto '{nome}' (duas mãos) salvo!", fg="green")
 
     btn_salvar.config(command=salvar_click)
 
+    def salvar_movimento(nome, quadros):
+        btn_movimento.config(state="normal")
+        if len(quadros) < QUADROS_MINIMOS:
+            lbl_status.config(text="Mão não detectada durante o movimento!", fg="red")
+            return
+        if caminho_pulso(quadros) < MOVIMENTO_MINIMO:
+            lbl_status.config(text="Quase sem movimento: use Salvar Gesto para gestos parados.", fg="red")
+            return
+        trajetoria = normalizar_trajetoria(quadros)
+        armazem_trajetorias.salvar(nome, trajetoria)
+        obter_trajetorias().adicionar(nome, trajetoria)
+        lbl_status.config(text=f"Movimento '{nome}' salvo!", fg="green")
+
+    def gravar_click():
+        nome = entry_nome.get().strip()
+        if not nome or SEPARADOR_MAO in nome or nome_gesto(nome) != nome:
+            lbl_status.config(text="Digite um nome válido!", fg="red")
+            return
+        gravacao.iniciar(nome)
+        btn_movimento.config(state="disabled")
+        lbl_status.config(text=f"Gravando: faça o movimento ({DURACAO_TRAJETORIA:.0f} s)...", fg="blue")
+
+    btn_movimento.config(command=gravar_click)
+
     def fechar():
-        try: cap.release()
-        except: pass
+        assinatura.cancelar()
+        exportar_rastro()
         janela.destroy()
 
     janela.protocol("WM_DELETE_WINDOW", fechar)
@@ -281,6 +502,7 @@ def cadastrar_frases():
             return
         frases.append({"nome": frase, "sequencia": sequencia})
         salvar_frases({"frases": frases})
+        obter_automato().adicionar(frase, sequencia)
         lbl_status.config(text=f"Frase '{frase}' salva!", fg="green")
         entry_frase.delete(0,tk.END)
         entry_sequencia.delete(0,tk.END)
@@ -0,0 +1,191 @@
+"""Tradução offline de vídeos e pastas de imagens, sem câmera nem Tk.
+
+Uso:
+    python traducao_lote.py aula1.mp4 aula2.mp4 pasta_de_fotos/ -o saida.jsonl -j 8
+
+Cada linha da saída é um JSON: um registro "gesto" por frame e um registro
+"frase" sempre que uma frase de frases_salvas.json é reconhecida.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from reconhecedor import SEM_GESTO, LIMIAR_RECONHECIMENTO
+from indice_gestos import IndiceGestos
+from armazenamento_gestos import ArmazemGestos, migrar_se_preciso
+from frases import ARQUIVO_FRASES, HistoricoFrases, carregar_frases
+from duas_maos import ReconhecedorDuasMaos, ReconhecedorMaos, separar_banco
+from rastreio_mao import RastreadorMao, maos_do_resultado
+from servico_visao import OPCOES_HANDS, OPCOES_RASTREIO
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".bmp")
+FRAMES_POR_TRECHO = 300
+FPS_IMAGENS = 1.0
+RECUO_BUSCA = 2.0           # segundos antes do trecho para onde o vídeo é posicionado
+
+# ===============================
+# Worker (um Hands por processo)
+# ===============================
+_hands_video = None
+_hands_imagem = None
+_reconhecedor = None
+
+def _iniciar_worker(nomes, templates):
+    """nomes e templates vêm do processo principal: os workers nunca abrem o banco,
+    que ao carregar pode se reparar e compactar (e vários ao mesmo tempo se atropelariam)."""
+    global _hands_video, _hands_imagem, _reconhecedor
+    # cada processo usa um núcleo; threads internas do OpenCV só disputariam CPU
+    cv2.setNumThreads(1)
+    _hands_video = mp.solutions.hands.Hands(**OPCOES_HANDS)
+    _hands_imagem = mp.solutions.hands.Hands(static_image_mode=True, **{
+        k: v for k, v in OPCOES_HANDS.items() if k != "min_tracking_confidence"})
+    (nomes, templates), (chaves, partes) = separar_banco(nomes, templates)
+    _reconhecedor = ReconhecedorMaos(IndiceGestos.de_array(nomes, templates, limiar=LIMIAR_RECONHECIMENTO),
+                                     ReconhecedorDuasMaos(chaves, partes, limiar=LIMIAR_RECONHECIMENTO))
+
+def _reconhecer(frame, detector):
+    # espelhado como na câmera ao vivo, igual aos templates salvos
+    maos = maos_do_resultado(detector.processar(cv2.flip(frame, 1)))
+    if not maos:
+        return None, None
+    r = _reconhecedor.reconhecer(maos, k=1)
+    return r.nome, r.distancia
+
+def _abrir_antes(caminho, inicio):
+    """VideoCapture e o primeiro frame lido (ret, frame, t) em ou antes de inicio segundos.
+
+    O seek do OpenCV não é exato em muitos codecs: ele é feito um pouco antes e,
+    se ainda assim passar do ponto, de novo mais para trás, até o começo.
+    """
+    recuo = RECUO_BUSCA
+    while True:
+        cap = cv2.VideoCapture(caminho)
+        alvo = max(0.0, inicio - recuo)
+        if alvo > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, 1000 * alvo)
+        ret, frame = cap.read()
+        t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if not ret or t <= inicio or alvo == 0:
+            return cap, ret, frame, t
+        cap.release()
+        recuo *= 4
+
+def _processar_trecho(trecho):
+    """Processa os frames [inicio, fim) de um vídeo (em segundos) ou de uma lista de imagens (índices)."""
+    tipo, caminho, inicio, fim, fps = trecho
+    registros = []
+    if tipo == "video":
+        # cada trecho começa sem rastreio herdado de outro ponto do vídeo
+        _hands_video.reset()
+        detector = RastreadorMao(_hands_video, **OPCOES_RASTREIO)
+        cap, ret, frame, t = _abrir_antes(caminho, inicio)
+        # leitura sequencial; cada frame pertence ao trecho que contém o seu tempo,
+        # então trechos vizinhos não se sobrepõem nem deixam buraco
+        while ret and (fim is None or t < fim):
+            if t >= inicio:
+                gesto, dist = _reconhecer(frame, detector)
+                registros.append((round(t * fps), t, gesto, dist))
+            ret, frame = cap.read()
+            t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        cap.release()
+    else:
+        detector = RastreadorMao(_hands_imagem, usar_roi=False,
+                                 lado_entrada=OPCOES_RASTREIO.get("lado_entrada"))
+        for i, arquivo in enumerate(caminho[inicio:fim], start=inicio):
+            frame = cv2.imread(arquivo)
+            if frame is None:
+                continue
+            gesto, dist = _reconhecer(frame, detector)
+            registros.append((i, i / fps, gesto, dist))
+    return registros
+
+# ===============================
+# Divisão do trabalho
+# ===============================
+def _trechos(entrada, frames_por_trecho):
+    """Divide um vídeo ou uma pasta de imagens em trechos (tipo, caminho, inicio, fim, fps).
+
+    Em vídeos, inicio e fim são segundos (fim None: até o fim); em imagens, índices.
+    """
+    if os.path.isdir(entrada):
+        imagens = sorted(os.path.join(entrada, f) for f in os.listdir(entrada)
+                         if f.lower().endswith(EXTENSOES_IMAGEM))
+        return [("imagens", imagens, i, min(i + frames_por_trecho, len(imagens)), FPS_IMAGENS)
+                for i in range(0, len(imagens), frames_por_trecho)]
+
+    cap = cv2.VideoCapture(entrada)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    # vídeos são divididos por tempo; a contagem de frames só serve para planejar
+    # (é 0 ou aproximada em muitos formatos): o último trecho vai até o fim do arquivo
+    if total <= 0:
+        return [("video", entrada, 0.0, None, fps)]
+    inicios = [i / fps for i in range(0, total, frames_por_trecho)]
+    return [("video", entrada, inicio, fim, fps)
+            for inicio, fim in zip(inicios, inicios[1:] + [None])]
+
+def traduzir(entradas, saida, processos=None, frames_por_trecho=FRAMES_POR_TRECHO,
+             base_gestos="gestos_salvos", arquivo_gestos="gestos_salvos.json",
+             arquivo_frases=ARQUIVO_FRASES):
+    """Escreve em saida (arquivo texto) uma linha JSON por frame e por frase detectada."""
+    frases_salvas = carregar_frases(arquivo_frases)
+    # migra e carrega (o que repara e compacta o banco) uma vez só, antes de abrir o pool
+    migrar_se_preciso(arquivo_gestos, base_gestos)
+    nomes, templates = ArmazemGestos(base_gestos).carregar()
+    # cópia: um memmap não vai para os workers
+    templates = np.array(templates)
+    with multiprocessing.Pool(processes=processos, initializer=_iniciar_worker,
+                              initargs=(nomes, templates)) as pool:
+        # os trechos de todos os arquivos vão numa fila só: nenhum worker fica parado
+        # esperando o último trecho de um arquivo para começar o próximo
+        tarefas = [(n, trecho) for n, entrada in enumerate(entradas)
+                   for trecho in _trechos(entrada, frames_por_trecho)]
+        historicos = [HistoricoFrases(frases_salvas) for _ in entradas]
+        frases_anteriores = [""] * len(entradas)
+        # imap mantém a ordem dos trechos, então o histórico de frases de cada arquivo segue o vídeo
+        for (n, _), registros in zip(tarefas, pool.imap(_processar_trecho, [t for _, t in tarefas])):
+            entrada = entradas[n]
+            for frame, t, gesto, dist in registros:
+                saida.write(json.dumps({
+                    "tipo": "gesto", "arquivo": entrada, "frame": frame, "t": round(t, 3),
+                    "gesto": gesto or SEM_GESTO,
+                    "distancia": None if dist is None or dist == float("inf") else round(dist, 4),
+                }, ensure_ascii=False) + "\n")
+                if gesto is None:
+                    continue
+                frase = historicos[n].atualizar(gesto)
+                if frase and frase != frases_anteriores[n]:
+                    saida.write(json.dumps({
+                        "tipo": "frase", "arquivo": entrada, "frame": frame, "t": round(t, 3),
+                        "frase": frase,
+                    }, ensure_ascii=False) + "\n")
+                frases_anteriores[n] = frase
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tradução de Libras em lote (vídeos ou pastas de imagens).")
+    parser.add_argument("entradas", nargs="+", help="arquivos de vídeo ou pastas com imagens")
+    parser.add_argument("-o", "--saida", help="arquivo JSONL de saída (padrão: stdout)")
+    parser.add_argument("-j", "--processos", type=int, default=None, help="número de processos (padrão: núcleos)")
+    parser.add_argument("--frames-por-trecho", type=int, default=FRAMES_POR_TRECHO)
+    parser.add_argument("--gestos", default="gestos_salvos", help="base do banco de gestos (.f64/.idx)")
+    parser.add_argument("--frases", default=ARQUIVO_FRASES)
+    args = parser.parse_args(argv)
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    try:
+        traduzir(args.entradas, saida, args.processos, args.frames_por_trecho,
+                 base_gestos=args.gestos, arquivo_gestos=args.gestos + ".json",
+                 arquivo_frases=args.frases)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Gestos com movimento (J, H, Z e a maioria dos sinais de palavras).
+
+Uma trajetória é uma sequência curta de quadros, reamostrada para
+TAMANHO_TRAJETORIA quadros. Cada quadro tem a forma da mão normalizada (21
+pontos, como nos gestos estáticos) e um 22º ponto com o deslocamento do pulso
+desde o início, em tamanhos de mão. A comparação é por DTW (dynamic time
+warping) com faixa de Sakoe-Chiba, podada por LB_Keogh e com abandono precoce.
+
+Ajuste do custo da busca:
+    python trajetorias.py
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from reconhecedor import Resultado, NUM_PONTOS, LIMIAR_RECONHECIMENTO, SEM_GESTO
+
+# ===============================
+# Configuração
+# ===============================
+TAMANHO_TRAJETORIA = 16     # quadros depois da reamostragem
+PONTOS_TRAJETORIA = NUM_PONTOS + 1
+FORMA_TRAJETORIA = (TAMANHO_TRAJETORIA, PONTOS_TRAJETORIA, 3)
+DURACAO_TRAJETORIA = 1.0    # segundos gravados no salvar e mantidos na janela ao vivo
+QUADROS_MINIMOS = 8         # quadros reais mínimos para formar uma trajetória
+INTERVALO_MAXIMO = 0.25     # segundos sem mão que interrompem a trajetória
+FAIXA_DTW = 2               # quadros de desalinhamento permitidos (faixa de Sakoe-Chiba)
+BLOCO_LB = 4                # quadros por etapa do LB_Keogh; quem já passou do corte sai antes da próxima
+PESO_DESLOCAMENTO = 4.0     # o pulso é 1 de 22 pontos: sem peso o movimento quase não contaria
+MOVIMENTO_MINIMO = 0.5      # caminho do pulso (em tamanhos de mão) para a janela contar como movimento
+LIMIAR_TRAJETORIA = LIMIAR_RECONHECIMENTO
+
+# ===============================
+# Normalização
+# ===============================
+def _normalizar_quadro(coords):
+    """(forma normalizada (21, 3), pulso (3,), escala) de um quadro cru."""
+    pts = np.asarray(coords, dtype=np.float64).reshape(NUM_PONTOS, 3)
+    centralizados = pts - pts[0]
+    escala = float(np.sqrt((centralizados * centralizados).sum(axis=1)).mean())
+    if escala == 0: escala = 1.0
+    return centralizados / escala, pts[0].copy(), escala
+
+def _reamostrar(seq, n):
+    """Interpolação linear de seq (T, ...) para n quadros igualmente espaçados."""
+    if len(seq) == 1:
+        return np.repeat(seq, n, axis=0)
+    pos = np.linspace(0, len(seq) - 1, n)
+    i0 = np.minimum(pos.astype(np.int64), len(seq) - 2)
+    w = (pos - i0).reshape((-1,) + (1,) * (seq.ndim - 1))
+    return seq[i0] * (1 - w) + seq[i0 + 1] * w
+
+def _montar(formas, pulsos, escalas, n=TAMANHO_TRAJETORIA):
+    deslocamento = (pulsos - pulsos[0]) / escalas[0] * PESO_DESLOCAMENTO
+    quadros = np.concatenate([formas, deslocamento[:, None, :]], axis=1)
+    return _reamostrar(quadros, n)
+
+def normalizar_trajetoria(lista_coords, n=TAMANHO_TRAJETORIA):
+    """Trajetória (n, 22, 3) a partir dos landmarks crus de cada quadro."""
+    quadros = [_normalizar_quadro(c) for c in lista_coords]
+    return _montar(np.stack([q[0] for q in quadros]), np.stack([q[1] for q in quadros]),
+                   np.array([q[2] for q in quadros]), n)
+
+def caminho_pulso(lista_coords):
+    """Comprimento do caminho do pulso, em tamanhos de mão (do primeiro quadro)."""
+    quadros = [_normalizar_quadro(c) for c in lista_coords]
+    pulsos = np.stack([q[1] for q in quadros])
+    return float(np.sqrt((np.diff(pulsos, axis=0) ** 2).sum(axis=1)).sum()) / quadros[0][2]
+
+# ===============================
+# Janela ao vivo
+# ===============================
+class JanelaTrajetoria:
+    """Últimos DURACAO_TRAJETORIA segundos de quadros da mão, já normalizados."""
+
+    def __init__(self, duracao=DURACAO_TRAJETORIA):
+        self.duracao = duracao
+        self._quadros = deque()      # (t, forma, pulso, escala)
+
+    def adicionar(self, coords, t=None):
+        t = time.perf_counter() if t is None else t
+        if self._quadros and t - self._quadros[-1][0] > INTERVALO_MAXIMO:
+            # a mão sumiu: o movimento anterior não continua neste
+            self._quadros.clear()
+        self._quadros.append((t,) + _normalizar_quadro(coords))
+        while t - self._quadros[0][0] > self.duracao:
+            self._quadros.popleft()
+
+    def limpar(self):
+        self._quadros.clear()
+
+    def __len__(self):
+        return len(self._quadros)
+
+    def em_movimento(self, minimo=MOVIMENTO_MINIMO):
+        """Se o pulso andou o bastante na janela; mão parada fica só com o reconhecimento estático."""
+        if len(self._quadros) < QUADROS_MINIMOS:
+            return False
+        pulsos = np.stack([q[2] for q in self._quadros])
+        caminho = np.sqrt((np.diff(pulsos, axis=0) ** 2).sum(axis=1)).sum()
+        return caminho / self._quadros[0][3] >= minimo
+
+    def trajetoria(self, n=TAMANHO_TRAJETORIA):
+        """(n, 22, 3) da janela, ou None se ainda houver poucos quadros."""
+        if len(self._quadros) < QUADROS_MINIMOS:
+            return None
+        return _montar(np.stack([q[1] for q in self._quadros]), np.stack([q[2] for q in self._quadros]),
+                       np.array([q[3] for q in self._quadros]), n)
+
+# ===============================
+# DTW podado
+# ===============================
+def _media_normas(quad):
+    """Média das normas dos pontos, com quad (..., 3 * pontos) já ao quadrado.
+
+    Soma x, y e z por fatias, como distancias_medias: reduzir um eixo de tamanho 3 é bem mais lento.
+    """
+    s = quad[..., 0::3] + quad[..., 1::3]
+    s += quad[..., 2::3]
+    np.sqrt(s, out=s)
+    return s.mean(axis=-1)
+
+def _custos(a, b):
+    """Distância média ponto a ponto entre cada quadro de a e cada quadro de b: (len(a), len(b))."""
+    diff = a.reshape(len(a), 1, -1) - b.reshape(1, len(b), -1)
+    diff *= diff
+    return _media_normas(diff)
+
+def envelope(q, faixa=FAIXA_DTW):
+    """(superior, inferior) de q em cada quadro, sobre os quadros a até faixa de distância."""
+    sup, inf = q.copy(), q.copy()
+    for s in range(1, faixa + 1):
+        np.maximum(sup[s:], q[:-s], out=sup[s:])
+        np.maximum(sup[:-s], q[s:], out=sup[:-s])
+        np.minimum(inf[s:], q[:-s], out=inf[s:])
+        np.minimum(inf[:-s], q[s:], out=inf[:-s])
+    return sup, inf
+
+def lb_keogh(templates, sup, inf):
+    """Limite inferior do custo de cada quadro de cada template: (M, n).
+
+    Todo caminho da DTW passa por cada quadro do template pelo menos uma vez, e
+    dentro da faixa o quadro da consulta está na caixa [inf, sup]; a distância
+    de cada ponto até a caixa não passa da distância até o quadro de verdade.
+    """
+    m, n = templates.shape[:2]
+    templates = templates.reshape(m, n, -1)
+    fora = templates - sup.reshape(n, -1)
+    np.maximum(fora, 0.0, out=fora)
+    abaixo = inf.reshape(n, -1) - templates
+    np.maximum(abaixo, 0.0, out=abaixo)
+    fora += abaixo
+    fora *= fora
+    return _media_normas(fora)
+
+def dtw_podado(a, b, faixa=FAIXA_DTW, corte=float("inf"), resto=None):
+    """Custo total da DTW entre a e b (mesmo tamanho), ou inf se passar do corte.
+
+    resto[i] é um limite inferior do custo das linhas i.. de a (ex.: soma do
+    LB_Keogh); com ele a conta é abandonada assim que não pode mais ficar abaixo do corte.
+    """
+    n = len(a)
+    custo = _custos(a, b).tolist()
+    inf = float("inf")
+    anterior = [inf] * n
+    for i in range(n):
+        atual = [inf] * n
+        linha = custo[i]
+        for j in range(max(0, i - faixa), min(n, i + faixa + 1)):
+            if i == 0 and j == 0:
+                melhor = 0.0
+            else:
+                melhor = anterior[j]
+                if j > 0:
+                    if anterior[j - 1] < melhor: melhor = anterior[j - 1]
+                    if atual[j - 1] < melhor: melhor = atual[j - 1]
+            atual[j] = melhor + linha[j]
+        restante = resto[i + 1] if resto is not None and i + 1 < n else 0.0
+        if min(atual) + restante > corte:
+            return inf
+        anterior = atual
+    return anterior[n - 1] if anterior[n - 1] <= corte else inf
+
+# ===============================
+# Reconhecedor de trajetórias
+# ===============================
+class ReconhecedorTrajetorias:
+    """Banco de trajetórias (M, 16, 22, 3) comparado por DTW.
+
+    O LB_Keogh é calculado vetorizado, BLOCO_LB quadros por vez, e os templates
+    cujo limite parcial já passa do limiar saem antes do bloco seguinte. A DTW de
+    verdade roda em ordem crescente de limite inferior e para quando o limite já
+    não pode vencer o k-ésimo melhor (nem o limiar). Cada DTW também é abandonada
+    no meio se o custo parcial mais o limite das linhas restantes passar do corte.
+    """
+
+    def __init__(self, nomes=(), templates=None, limiar=LIMIAR_TRAJETORIA, faixa=FAIXA_DTW):
+        # a busca roda na thread de inferência enquanto a tela de salvar insere
+        self._trava = threading.RLock()
+        self.limiar = limiar
+        self.faixa = faixa
+        self.nomes = list(nomes)
+        if templates is None or len(self.nomes) == 0:
+            templates = np.empty((0,) + FORMA_TRAJETORIA)
+        self.templates = np.ascontiguousarray(templates, dtype=np.float64).reshape((-1,) + FORMA_TRAJETORIA)
+        self._linhas = {nome: i for i, nome in enumerate(self.nomes)}
+        self.versao = 0
+        self.dtw_calculadas = 0
+        self.dtw_abandonadas = 0
+
+    def adicionar(self, nome, trajetoria):
+        """Insere ou substitui uma trajetória já normalizada."""
+        arr = np.asarray(trajetoria, dtype=np.float64).reshape((1,) + FORMA_TRAJETORIA)
+        with self._trava:
+            if nome in self._linhas:
+                if not self.templates.flags.writeable:
+                    self.templates = np.array(self.templates)
+                self.templates[self._linhas[nome]] = arr[0]
+            else:
+                self._linhas[nome] = len(self.nomes)
+                self.nomes.append(nome)
+                self.templates = np.ascontiguousarray(np.concatenate([self.templates, arr]))
+            self.versao += 1
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def reconhecer_trajetoria(self, q, k=1):
+        """Melhor trajetória para q (16, 22, 3); distância é o custo da DTW por quadro."""
+        vazio = Resultado(SEM_GESTO, float("inf"), [], float("inf"), -float("inf"))
+        if q is None:
+            return vazio
+        with self._trava:
+            if len(self.nomes) == 0:
+                return vazio
+            n = len(q)
+            limite = self.limiar * n
+            ids, lb_quadros = self._limites(q, limite)
+            # resto[m, i]: limite inferior do custo das linhas i.. do template m
+            resto = np.cumsum(lb_quadros[:, ::-1], axis=1)[:, ::-1]
+            lb = resto[:, 0]
+
+            corte = limite
+            melhores = []               # (custo, indice), no máximo k, em ordem
+            for m in np.argsort(lb, kind="stable"):
+                if lb[m] > corte:
+                    break
+                self.dtw_calculadas += 1
+                custo = dtw_podado(self.templates[ids[m]], q, self.faixa, corte, resto[m].tolist())
+                if custo == float("inf"):
+                    self.dtw_abandonadas += 1
+                    continue
+                melhores.append((custo, int(ids[m])))
+                melhores.sort()
+                del melhores[k:]
+                if len(melhores) == k:
+                    corte = min(limite, melhores[-1][0])
+
+            if not melhores:
+                return vazio
+            top_k = [(self.nomes[m], c / n) for c, m in melhores]
+        melhor_val = top_k[0][1]
+        margem = top_k[1][1] - melhor_val if len(top_k) > 1 else float("inf")
+        return Resultado(top_k[0][0], melhor_val, top_k, margem, self.limiar - melhor_val)
+
+    def _limites(self, q, limite):
+        """(ids, LB_Keogh por quadro) dos templates cujo limite inferior não passa de limite."""
+        sup, inf = envelope(q, self.faixa)
+        n = len(q)
+        ids = np.arange(len(self.nomes))
+        lb_quadros = np.zeros((len(ids), n))
+        soma = np.zeros(len(ids))
+        for i in range(0, n, BLOCO_LB):
+            # no primeiro bloco todos estão vivos: fatia sem cópia
+            templates = self.templates[:, i:i + BLOCO_LB] if i == 0 else self.templates[ids, i:i + BLOCO_LB]
+            bloco = lb_keogh(templates, sup[i:i + BLOCO_LB], inf[i:i + BLOCO_LB])
+            lb_quadros[:, i:i + BLOCO_LB] = bloco
+            soma += bloco.sum(axis=1)
+            vivos = soma <= limite
+            if not vivos.all():
+                ids, lb_quadros, soma = ids[vivos], lb_quadros[vivos], soma[vivos]
+            if len(ids) == 0:
+                break
+        return ids, lb_quadros
+
+    def reconhecer_exato(self, q, k=1):
+        """Mesma busca sem poda (DTW contra todos), para conferir a versão podada."""
+        n = len(q)
+        with self._trava:
+            custos = np.array([dtw_podado(t, q, self.faixa) for t in self.templates]) / n
+            ordem = np.argsort(custos, kind="stable")[:k]
+            return [(self.nomes[i], float(custos[i])) for i in ordem if custos[i] <= self.limiar]
+
+# ===============================
+# Medição da poda
+# ===============================
+if __name__ == "__main__":
+    import json
+    import sys
+
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else "gestos_salvos.json"
+    with open(arquivo, "r", encoding="utf-8") as f:
+        formas = [np.asarray(c, dtype=np.float64) for c in json.load(f).values()]
+    rng = np.random.default_rng(0)
+
+    def sintetica(forma, direcao, ruido=0.03):
+        passos = np.linspace(0, 1, 30)[:, None]
+        pulsos = passos * direcao + rng.normal(0, ruido / 10, (30, 3))
+        return [forma - forma[0] + p + rng.normal(0, ruido, forma.shape) for p in pulsos]
+
+    for m in (100, 300, 1000):
+        direcoes = rng.normal(0, 1, (m, 3)) * [1, 1, 0.2]
+        bases = [formas[i % len(formas)] for i in range(m)]
+        rec = ReconhecedorTrajetorias([f"T{i}" for i in range(m)],
+                                      np.stack([normalizar_trajetoria(sintetica(b, d)) for b, d in zip(bases, direcoes)]))
+        consultas = [normalizar_trajetoria(sintetica(bases[i], direcoes[i])) for i in rng.integers(m, size=50)]
+        t0 = time.perf_counter()
+        podados = [rec.reconhecer_trajetoria(q).nome for q in consultas]
+        t1 = time.perf_counter()
+        exatos = [(rec.reconhecer_exato(q) or [(SEM_GESTO, 0)])[0][0] for q in consultas[:10]]
+        t2 = time.perf_counter()
+        iguais = sum(p == e for p, e in zip(podados, exatos))
+        print(f"{m} templates: podado {1000 * (t1 - t0) / len(consultas):.2f} ms, "
+              f"exato {1000 * (t2 - t1) / 10:.2f} ms, "
+              f"DTW por busca {rec.dtw_calculadas / len(consultas):.1f} "
+              f"({rec.dtw_abandonadas / len(consultas):.1f} abandonadas), iguais {iguais}/10")
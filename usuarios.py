@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+
+# ===============================
+# Configuração
+# ===============================
+ARQUIVO_BANCO = "usuarios.db"
+ARQUIVO_JSON = "bau_de_valores.json"
+ESPERA_TRAVA = 10.0     # segundos esperando outro quiosque liberar o arquivo
+
+# ===============================
+# Banco de usuários
+# ===============================
+class BancoUsuarios:
+    """Usuários num SQLite: busca pelo nome via índice e cadastro atômico.
+
+    Vários processos (quiosques) podem usar o mesmo arquivo: o SQLite trava o
+    arquivo durante cada escrita, então dois cadastros simultâneos não se perdem.
+    O journal padrão (e não WAL) é usado porque funciona também em pasta de rede.
+    """
+
+    def __init__(self, caminho=ARQUIVO_BANCO):
+        self.caminho = caminho
+        self._conexao = None
+        self._trava = threading.Lock()
+
+    def _conectar(self):
+        if self._conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=ESPERA_TRAVA, check_same_thread=False)
+            with conexao:
+                conexao.execute("CREATE TABLE IF NOT EXISTS usuarios ("
+                                "nome TEXT PRIMARY KEY NOT NULL, senha TEXT NOT NULL)")
+            self._conexao = conexao
+        return self._conexao
+
+    def senha(self, usuario):
+        """Senha do usuário, ou None se ele não existir."""
+        with self._trava:
+            linha = self._conectar().execute("SELECT senha FROM usuarios WHERE nome = ?",
+                                             (usuario,)).fetchone()
+        return None if linha is None else linha[0]
+
+    def cadastrar(self, usuario, senha):
+        """Insere um usuário novo; retorna False se o nome já existir."""
+        with self._trava:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute("INSERT INTO usuarios (nome, senha) VALUES (?, ?)", (usuario, senha))
+            except sqlite3.IntegrityError:
+                return False
+        return True
+
+    def importar(self, usuarios):
+        """Insere vários usuários numa transação só, ignorando nomes já cadastrados.
+
+        Retorna quantos foram inseridos.
+        """
+        with self._trava:
+            conexao = self._conectar()
+            antes = conexao.total_changes
+            with conexao:
+                conexao.executemany("INSERT OR IGNORE INTO usuarios (nome, senha) VALUES (?, ?)",
+                                    [(str(nome), str(senha)) for nome, senha in usuarios.items()])
+            return conexao.total_changes - antes
+
+    def vazio(self):
+        with self._trava:
+            return self._conectar().execute("SELECT 1 FROM usuarios LIMIT 1").fetchone() is None
+
+    def carregar(self):
+        """Todos os usuários como dicionário {nome: senha} (mesmo formato do JSON antigo)."""
+        with self._trava:
+            return dict(self._conectar().execute("SELECT nome, senha FROM usuarios"))
+
+    def salvar(self, usuarios):
+        """Grava (insere ou atualiza) todos os usuários do dicionário numa transação.
+
+        Usuários que existem no banco e não estão no dicionário são mantidos, para
+        não apagar cadastros feitos por outro quiosque desde o último carregar().
+        """
+        with self._trava:
+            conexao = self._conectar()
+            with conexao:
+                conexao.executemany("INSERT INTO usuarios (nome, senha) VALUES (?, ?) "
+                                    "ON CONFLICT(nome) DO UPDATE SET senha = excluded.senha",
+                                    list(usuarios.items()))
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+# ===============================
+# Migração do bau_de_valores.json
+# ===============================
+def migrar_json(arquivo_json=ARQUIVO_JSON, caminho=ARQUIVO_BANCO):
+    """Copia os usuários do JSON para o banco; quem já existe no banco é mantido.
+
+    Retorna quantos usuários foram inseridos.
+    """
+    with open(arquivo_json, "r", encoding="utf-8") as f:
+        usuarios = json.load(f)
+    banco = BancoUsuarios(caminho)
+    try:
+        return banco.importar(usuarios)
+    finally:
+        banco.fechar()
+
+def migrar_se_preciso(banco, arquivo_json=ARQUIVO_JSON):
+    """Migra o JSON só se o banco ainda não tiver nenhum usuário."""
+    if not os.path.exists(arquivo_json):
+        return
+    try:
+        if banco.vazio():
+            with open(arquivo_json, "r", encoding="utf-8") as f:
+                banco.importar(json.load(f))
+    except (ValueError, OSError, sqlite3.Error):
+        pass
+
+if __name__ == "__main__":
+    import sys
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_JSON
+    destino = sys.argv[2] if len(sys.argv) > 2 else ARQUIVO_BANCO
+    inseridos = migrar_json(origem, destino)
+    print(f"{inseridos} usuário(s) migrado(s) para {destino}")